@@ -0,0 +1,41 @@
+"""
+Camada de dados do sistema de ponto.
+
+Importar o pacote não abre o banco nem carrega os submódulos: cada nome abaixo é
+carregado no primeiro acesso, e a conexão só é aberta por BancoSQLite(...) ou
+abrir_banco(...).
+"""
+import importlib
+
+# nome exportado -> submódulo que o define
+_EXPORTS = {
+    "BancoSQLite": "banco.bancoSQlite",
+    "PoolConexoes": "banco.conexao",
+    "PERFIS": "banco.conexao",
+    "aplicar_migracoes": "banco.migracoes",
+    "apurar_dia": "banco.apuracao",
+    "RoteadorEmpresas": "banco.empresas",
+    "dividir_banco": "banco.empresas",
+    "BackupBanco": "banco.bkp_banco",
+}
+
+__all__ = ["abrir_banco", *_EXPORTS]
+
+
+def abrir_banco(db_path=None, perfil="interativo"):
+    """Abre (e migra, se preciso) o banco de ponto. Ver BancoSQLite."""
+    from banco.bancoSQlite import BancoSQLite
+    return BancoSQLite(db_path, perfil=perfil)
+
+
+def __getattr__(nome):
+    modulo = _EXPORTS.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module 'banco' has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,209 @@
+"""
+Acompanhamento em tempo real dos arquivos do relógio (modo "tail").
+
+O REP acrescenta linhas ao mesmo arquivo o dia todo. Em vez de ler o arquivo inteiro
+de novo, BancoSQLite.acompanhar_arquivos guarda em leitura_arquivo (migração 8) a
+posição em bytes logo após a última linha completa e, a cada alteração, lê só o que
+foi acrescentado (ler_acrescimo). Uma linha ainda sem a quebra de linha final fica
+para a próxima leitura.
+
+As alterações chegam pelo inotify (Linux, via ctypes, sem dependências) e, onde ele
+não existe (Windows, macOS) ou não funciona, por polling do tamanho, da data e do
+inode dos arquivos (ver criar_observador).
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from banco.registro_log import obter_logger
+
+logger = obter_logger("importacao")
+
+# Bytes lidos por vez; um acréscimo maior é gravado em várias transações
+LIMITE_LEITURA = 8 * 1024 * 1024
+
+
+class Acrescimo:
+    """Trecho acrescentado a um arquivo desde a última leitura (ver ler_acrescimo)."""
+
+    __slots__ = ("dados", "inicio", "fim", "dispositivo", "inode", "reiniciado")
+
+    def __init__(self, dados: bytes, inicio: int, fim: int, dispositivo: int, inode: int, reiniciado: bool):
+        self.dados = dados  # só linhas completas
+        self.inicio = inicio  # posição onde a leitura começou
+        self.fim = fim  # próxima posição a ler
+        self.dispositivo = dispositivo
+        self.inode = inode
+        self.reiniciado = reiniciado  # arquivo trocado ou truncado: lido de novo desde o início
+
+
+def ler_acrescimo(caminho: str, posicao: int = 0, dispositivo: Optional[int] = None, inode: Optional[int] = None,
+                  limite: int = LIMITE_LEITURA) -> Acrescimo:
+    """
+    Lê as linhas completas acrescentadas ao arquivo depois de `posicao`.
+
+    Args:
+        caminho: Arquivo do relógio
+        posicao: Byte onde a última leitura parou
+        dispositivo: st_dev do arquivo na última leitura (None na primeira)
+        inode: st_ino do arquivo na última leitura (None na primeira)
+        limite: Máximo de bytes lidos
+
+    Returns:
+        Acrescimo: Linhas lidas e a nova posição (igual a `inicio` se não há linha completa nova)
+
+    Raises:
+        OSError: Arquivo inexistente ou ilegível
+    """
+    with open(caminho, "rb") as arquivo:
+        info = os.fstat(arquivo.fileno())
+        trocado = inode is not None and (dispositivo, inode) != (info.st_dev, info.st_ino)
+        reiniciado = posicao > 0 and (trocado or info.st_size < posicao)
+        if reiniciado:
+            posicao = 0
+        dados = b""
+        if info.st_size > posicao:
+            arquivo.seek(posicao)
+            dados = arquivo.read(min(info.st_size - posicao, limite))
+
+    tamanho = dados.rfind(b"\n") + 1
+    if not tamanho and len(dados) >= limite:
+        tamanho = len(dados)  # "linha" maior que o limite: consumida (vira linha inválida)
+    return Acrescimo(dados[:tamanho], posicao, posicao + tamanho, info.st_dev, info.st_ino, reiniciado)
+
+
+def _assinatura(caminho: str) -> Optional[Tuple[int, int, int, int]]:
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns
+
+
+class ObservadorPolling:
+    """Compara tamanho, data e inode dos arquivos a cada `intervalo` segundos."""
+
+    def __init__(self, intervalo: float = 2.0):
+        self.intervalo = intervalo
+        self._assinaturas: Optional[Dict[str, Optional[tuple]]] = None
+
+    def aguardar(self, caminhos: Iterable[str], parar: threading.Event) -> Set[str]:
+        """
+        Espera o intervalo e devolve os arquivos de `caminhos` alterados desde a chamada anterior.
+
+        A primeira chamada toma o estado atual como base (a leitura inicial é de quem chama).
+        """
+        caminhos = list(caminhos)
+        if self._assinaturas is None:
+            self._assinaturas = {caminho: _assinatura(caminho) for caminho in caminhos}
+        if parar.wait(self.intervalo):
+            return set()
+        alterados = set()
+        for caminho in caminhos:
+            atual = _assinatura(caminho)
+            if caminho not in self._assinaturas or self._assinaturas[caminho] != atual:
+                alterados.add(caminho)
+            self._assinaturas[caminho] = atual
+        return alterados
+
+    def fechar(self) -> None:
+        pass
+
+
+class ObservadorInotify:
+    """
+    inotify nas pastas dos arquivos (pega também arquivos trocados ou criados depois).
+
+    A cada `varredura` segundos devolve todos os arquivos mesmo sem evento, para o
+    caso de alterações que o inotify não vê (ex.: pasta de rede montada).
+    """
+
+    _IN_MODIFY, _IN_CLOSE_WRITE, _IN_MOVED_TO, _IN_CREATE = 0x002, 0x008, 0x080, 0x100
+    _IN_NONBLOCK, _IN_CLOEXEC = os.O_NONBLOCK, 0o2000000
+    _EVENTO = struct.Struct("iIII")  # wd, mask, cookie, len (seguido do nome)
+
+    def __init__(self, varredura: float = 60.0):
+        biblioteca = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(biblioteca or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, f"inotify_init1: {os.strerror(erro)}")
+        self.varredura = varredura
+        self._pastas: Dict[int, str] = {}  # wd -> pasta
+        self._ultima_varredura = time.monotonic()
+
+    def _observar(self, pasta: str) -> None:
+        if pasta in self._pastas.values():
+            return
+        mascara = self._IN_MODIFY | self._IN_CLOSE_WRITE | self._IN_MOVED_TO | self._IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(pasta), mascara)
+        if wd < 0:
+            erro = ctypes.get_errno()
+            logger.warning("Pasta '%s' não pode ser observada pelo inotify: %s", pasta, os.strerror(erro))
+            return
+        self._pastas[wd] = pasta
+
+    def aguardar(self, caminhos: Iterable[str], parar: threading.Event) -> Set[str]:
+        """
+        Espera eventos e devolve os arquivos alterados nas pastas de `caminhos` (inclusive
+        arquivos que ainda não estão em `caminhos`, como o criado pelo REP na virada do dia).
+        """
+        caminhos = set(caminhos)
+        for caminho in caminhos:
+            self._observar(os.path.dirname(caminho))
+
+        alterados = set()
+        while not alterados and not parar.is_set():
+            if time.monotonic() - self._ultima_varredura >= self.varredura:
+                self._ultima_varredura = time.monotonic()
+                return caminhos
+            # Timeout curto para perceber o pedido de parada
+            prontos, _, _ = select.select([self._fd], [], [], 0.5)
+            if not prontos:
+                continue
+            try:
+                dados = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            posicao = 0
+            while posicao < len(dados):
+                wd, _, _, tamanho = self._EVENTO.unpack_from(dados, posicao)
+                nome = dados[posicao + self._EVENTO.size:posicao + self._EVENTO.size + tamanho].rstrip(b"\0")
+                posicao += self._EVENTO.size + tamanho
+                pasta = self._pastas.get(wd)
+                if pasta is not None and nome:
+                    alterados.add(os.path.join(pasta, os.fsdecode(nome)))
+        return alterados
+
+    def fechar(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def criar_observador(intervalo: float = 2.0, inotify: bool = True):
+    """
+    Observador de arquivos: inotify no Linux (se disponível), senão polling.
+
+    Args:
+        intervalo: Segundos entre as verificações do polling
+        inotify: False força o polling (ex.: pastas de rede onde o inotify não recebe eventos)
+
+    Returns:
+        ObservadorInotify ou ObservadorPolling
+    """
+    if inotify and sys.platform.startswith("linux"):
+        try:
+            observador = ObservadorInotify()
+            logger.debug("Acompanhando os arquivos pelo inotify")
+            return observador
+        except (OSError, AttributeError) as e:
+            logger.info("inotify indisponível (%s); acompanhando os arquivos por polling", e)
+    return ObservadorPolling(intervalo)
@@ -0,0 +1,175 @@
+"""
+Apuração diária do ponto de um funcionário.
+
+Seleciona as marcações de manhã/tarde mostradas nos relatórios e calcula as horas
+trabalhadas, extras e faltantes do dia. As funções são puras e mantêm a tabela
+materializada ponto_dia.
+"""
+from datetime import date
+from typing import Iterable, Optional, Sequence, Set, Tuple
+
+HORARIO_VAZIO = "00:00:00"
+
+# Jornada prevista por dia da semana, em horas (0=Segunda, 6=Domingo)
+JORNADA_POR_DIA_SEMANA = {
+    0: 8,  # Segunda
+    1: 8,  # Terça
+    2: 8,  # Quarta
+    3: 8,  # Quinta
+    4: 8,  # Sexta
+    5: 4,  # Sábado
+    6: 0,  # Domingo
+}
+
+
+# date(1970, 1, 1).toordinal(): ponto.dia_local + ORDINAL_EPOCA == date.toordinal()
+ORDINAL_EPOCA = 719163
+
+
+def dia_local(data_iso: str) -> int:
+    """Converte 'YYYY-MM-DD' no dia de ponto.dia_local (dias desde 1970-01-01)."""
+    return date.fromisoformat(data_iso[:10]).toordinal() - ORDINAL_EPOCA
+
+
+def segundos_do_horario(horario: str) -> int:
+    """Converte 'HH:MM:SS' em segundos desde a meia-noite."""
+    return int(horario[0:2]) * 3600 + int(horario[3:5]) * 60 + int(horario[6:8])
+
+
+def formatar_horas(segundos: int) -> str:
+    """Formata uma duração em segundos como 'HH:MM'."""
+    horas, minutos = divmod(int(segundos // 60), 60)
+    return f"{horas:02d}:{minutos:02d}"
+
+
+# Horários de referência do espelho de ponto: (coluna, horário alvo, tipo, período).
+# O período separa manhã e tarde em INICIO_TARDE; em cada coluna fica a marcação
+# do tipo e período indicados mais próxima do horário alvo. Os alvos podem ser
+# ajustados; as quatro colunas são as mesmas da tabela ponto_dia.
+HORARIOS_REFERENCIA = (
+    ("entrada_manha", "08:00:00", "entrada", "manha"),
+    ("saida_manha", "12:00:00", "saida", "manha"),
+    ("entrada_tarde", "13:00:00", "entrada", "tarde"),
+    ("saida_tarde", "18:00:00", "saida", "tarde"),
+)
+INICIO_TARDE = "13:00:00"
+
+
+class SeletorHorarios:
+    """
+    Distribui as marcações do dia nas colunas do espelho de ponto em uma única passada.
+
+    Cada marcação é convertida para segundos uma vez e comparada apenas com as
+    colunas do seu tipo e período. Em caso de empate fica a primeira marcação.
+    """
+
+    def __init__(self, horarios_referencia=HORARIOS_REFERENCIA, inicio_tarde: str = INICIO_TARDE):
+        self.colunas = tuple(coluna for coluna, _, _, _ in horarios_referencia)
+        self.inicio_tarde = segundos_do_horario(inicio_tarde)
+
+        # (é tarde?, tipo) -> [(índice da coluna, alvo em segundos)]
+        self._alvos = {}
+        for indice, (_, alvo, tipo, periodo) in enumerate(horarios_referencia):
+            self._alvos.setdefault((periodo == "tarde", tipo), []).append((indice, segundos_do_horario(alvo)))
+
+    def selecionar_convertidas(self, marcacoes: Iterable[Tuple[int, str, str]]) -> tuple:
+        """Mesmo que selecionar, recebendo (segundos, horario, tipo) já convertidos."""
+        quantidade = len(self.colunas)
+        melhores = [HORARIO_VAZIO] * quantidade
+        distancias = [None] * quantidade
+        alvos = self._alvos
+        inicio_tarde = self.inicio_tarde
+
+        for segundos, horario, tipo in marcacoes:
+            for indice, alvo in alvos.get((segundos >= inicio_tarde, tipo), ()):
+                distancia = segundos - alvo if segundos >= alvo else alvo - segundos
+                atual = distancias[indice]
+                if atual is None or distancia < atual:
+                    distancias[indice] = distancia
+                    melhores[indice] = horario
+        return tuple(melhores)
+
+    def selecionar(self, marcacoes: Iterable[Tuple[str, str]]) -> tuple:
+        """
+        Args:
+            marcacoes: (horario 'HH:MM:SS', tipo) do dia, em ordem cronológica
+
+        Returns:
+            tuple: Um horário por coluna de horarios_referencia; "00:00:00" quando não houver
+        """
+        return self.selecionar_convertidas(
+            (segundos_do_horario(horario), horario, tipo) for horario, tipo in marcacoes
+        )
+
+
+SELETOR_PADRAO = SeletorHorarios()
+
+
+def selecionar_horarios(marcacoes: Sequence[Tuple[str, str]]) -> Tuple[str, str, str, str]:
+    """
+    Seleciona as marcações exibidas no espelho de ponto.
+
+    Args:
+        marcacoes: Lista de (horario 'HH:MM:SS', tipo) do dia, em ordem cronológica
+
+    Returns:
+        tuple: (entrada_manha, saida_manha, entrada_tarde, saida_tarde); "00:00:00" quando não houver
+    """
+    return SELETOR_PADRAO.selecionar(marcacoes)
+
+
+def _trabalhado_convertidas(convertidas: Iterable[Tuple[int, str, str]]) -> int:
+    """Soma os intervalos entrada -> saída a partir de (segundos, horario, tipo)."""
+    trabalhado = 0
+    entrada = None
+    for segundos, _, tipo in sorted(convertidas, key=lambda m: (m[0], m[2])):
+        if tipo == "entrada":
+            entrada = segundos
+        elif tipo == "saida" and entrada is not None:
+            trabalhado += segundos - entrada
+            entrada = None
+    return trabalhado
+
+
+def segundos_trabalhados(marcacoes: Iterable[Tuple[str, str]]) -> int:
+    """Soma os intervalos entrada -> saída do dia (uma entrada repetida substitui a anterior)."""
+    return _trabalhado_convertidas((segundos_do_horario(horario), horario, tipo) for horario, tipo in marcacoes)
+
+
+def segundos_jornada(data_iso: str, feriados: Optional[Set[str]] = None) -> int:
+    """Jornada prevista para a data 'YYYY-MM-DD', em segundos (zero em feriados)."""
+    if feriados and data_iso in feriados:
+        return 0
+    return JORNADA_POR_DIA_SEMANA[date.fromisoformat(data_iso).weekday()] * 3600
+
+
+def apurar_dia(data_iso: str, marcacoes: Sequence[Tuple[str, str]],
+               feriados: Optional[Set[str]] = None, jornada: Optional[int] = None) -> tuple:
+    """
+    Apura um dia de trabalho.
+
+    Args:
+        data_iso: Data 'YYYY-MM-DD'
+        marcacoes: Lista de (horario, tipo) do dia, em ordem cronológica
+        feriados: Datas de feriado, usadas quando a jornada não for informada
+        jornada: Segundos previstos para o dia (calendário da jornada do funcionário)
+
+    Returns:
+        tuple: (entrada_manha, saida_manha, entrada_tarde, saida_tarde,
+                segundos_trabalhados, segundos_jornada, segundos_extras, segundos_faltantes)
+    """
+    # Converte cada marcação uma única vez para a seleção e para a soma
+    convertidas = [(segundos_do_horario(horario), horario, tipo) for horario, tipo in marcacoes]
+    return apurar_dia_convertidas(data_iso, convertidas, feriados, jornada)
+
+
+def apurar_dia_convertidas(data_iso: str, convertidas: Sequence[Tuple[int, str, str]],
+                           feriados: Optional[Set[str]] = None, jornada: Optional[int] = None) -> tuple:
+    """Mesmo que apurar_dia, recebendo (segundos, horario, tipo), ex.: com ponto.segundo_local."""
+    trabalhado = _trabalhado_convertidas(convertidas)
+
+    if jornada is None:
+        jornada = segundos_jornada(data_iso, feriados)
+    extras = max(trabalhado - jornada, 0)
+    faltantes = max(jornada - trabalhado, 0)
+    return (*SELETOR_PADRAO.selecionar_convertidas(convertidas), trabalhado, jornada, extras, faltantes)
@@ -0,0 +1,95 @@
+"""
+Apuração de horas trabalhadas/extras/faltantes de um período inteiro com NumPy.
+
+Mesmas regras de banco.apuracao, mas calculadas para todos os funcionário/dia de
+uma vez a partir de vetores de inteiros (dia ordinal, segundos desde a meia-noite
+e tipo da marcação), sem laço Python por marcação.
+"""
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from banco.apuracao import JORNADA_POR_DIA_SEMANA, formatar_horas
+
+TIPO_ENTRADA = 0
+TIPO_SAIDA = 1
+TIPO_OUTRO = 2
+
+# Jornada em segundos indexada por date.weekday()
+_JORNADA_SEGUNDOS = np.array([JORNADA_POR_DIA_SEMANA[dia] * 3600 for dia in range(7)], dtype=np.int64)
+
+
+def ordinais_das_datas(datas_iso: Iterable[str]) -> np.ndarray:
+    """Converte datas 'YYYY-MM-DD' em dias ordinais (date.toordinal), convertendo cada data distinta uma vez."""
+    datas = np.asarray(list(datas_iso) if not isinstance(datas_iso, np.ndarray) else datas_iso)
+    if datas.size == 0:
+        return np.empty(0, dtype=np.int64)
+    unicas, inverso = np.unique(datas, return_inverse=True)
+    ordinais = np.fromiter((date.fromisoformat(d).toordinal() for d in unicas), dtype=np.int64, count=len(unicas))
+    return ordinais[inverso]
+
+
+def formatar_horas_vetor(segundos: np.ndarray) -> list:
+    """formatar_horas aplicado a um vetor, formatando cada duração distinta uma única vez."""
+    unicos, inverso = np.unique(np.asarray(segundos, dtype=np.int64) // 60, return_inverse=True)
+    textos = [formatar_horas(minutos * 60) for minutos in unicos.tolist()]
+    return [textos[i] for i in inverso.tolist()]
+
+
+def apurar_periodo(funcionarios: np.ndarray, dias: np.ndarray, segundos: np.ndarray, tipos: np.ndarray,
+                   feriados: Iterable[int] = (), jornadas: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Apura todos os funcionário/dia do período.
+
+    Args:
+        funcionarios: Código inteiro do funcionário de cada marcação
+        dias: Dia ordinal (date.toordinal) de cada marcação
+        segundos: Segundos desde a meia-noite de cada marcação
+        tipos: TIPO_ENTRADA, TIPO_SAIDA ou TIPO_OUTRO (sem tipo; ignorada no pareamento)
+        feriados: Dias ordinais com jornada zero (usado quando jornadas não é informado)
+        jornadas: Segundos previstos do dia de cada marcação, vindos do calendário da jornada
+
+    Returns:
+        tuple: Vetores por funcionário/dia: (funcionario, dia, trabalhado, jornada, extras, faltantes),
+               em segundos e ordenados por (funcionario, dia)
+    """
+    if len(funcionarios) == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio, vazio, vazio, vazio, vazio
+
+    # Mesma ordem do sorted((horario, tipo)) da apuração diária: entrada antes de saída no empate
+    ordem = np.lexsort((tipos, segundos, dias, funcionarios))
+    f = np.asarray(funcionarios, dtype=np.int64)[ordem]
+    d = np.asarray(dias, dtype=np.int64)[ordem]
+    s = np.asarray(segundos, dtype=np.int64)[ordem]
+    t = np.asarray(tipos, dtype=np.int8)[ordem]
+
+    novo_grupo = np.empty(len(f), dtype=bool)
+    novo_grupo[0] = True
+    novo_grupo[1:] = (f[1:] != f[:-1]) | (d[1:] != d[:-1])
+    grupo = np.cumsum(novo_grupo) - 1
+    inicios = np.flatnonzero(novo_grupo)
+
+    # Uma saída só fecha intervalo se a marcação anterior do mesmo dia for uma entrada
+    # (entradas repetidas substituem a anterior; saídas sem entrada aberta são ignoradas).
+    # Marcações sem tipo (TIPO_OUTRO) ficam fora do pareamento, como na apuração diária,
+    # mas o dia delas continua no resultado
+    validas = np.flatnonzero(t != TIPO_OUTRO)
+    gv, sv, tv = grupo[validas], s[validas], t[validas]
+    pares = (gv[1:] == gv[:-1]) & (tv[:-1] == TIPO_ENTRADA) & (tv[1:] == TIPO_SAIDA)
+    trabalhado = np.bincount(gv[1:][pares], weights=(sv[1:] - sv[:-1])[pares],
+                             minlength=len(inicios)).astype(np.int64)
+
+    dia_grupo = d[inicios]
+    if jornadas is not None:
+        jornada = np.asarray(jornadas, dtype=np.int64)[ordem][inicios]
+    else:
+        jornada = _JORNADA_SEGUNDOS[(dia_grupo + 6) % 7]  # toordinal() % 7 == 1 é segunda-feira
+        feriados = np.fromiter(feriados, dtype=np.int64)
+        if feriados.size:
+            jornada = np.where(np.isin(dia_grupo, feriados), 0, jornada)
+
+    extras = np.maximum(trabalhado - jornada, 0)
+    faltantes = np.maximum(jornada - trabalhado, 0)
+    return f[inicios], dia_grupo, trabalhado, jornada, extras, faltantes
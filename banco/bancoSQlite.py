@@ -1,80 +1,151 @@
 import sqlite3
 import os
 import time
-from datetime import timedelta
 from typing import Dict, List, Any, Optional, Union
 from pathlib import Path
-import colorlog
 import logging
-import datetime
 import contextlib
-from datetime import datetime
-from typing import Dict, Any
-from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QMessageBox
+import threading
+import warnings
+from datetime import date, datetime
+from itertools import islice
+
+from banco.apuracao import ORDINAL_EPOCA, dia_local, formatar_horas
+from banco.cache import CacheConsultas
+from banco.conexao import PERFIL_PADRAO, PoolConexoes
+from banco.exportacao import contexto_exportacao, criar_layout
+from banco.exportacao_colunar import caminho_particao, classe_gravador, criar_conjunto
+from banco.construtor_sql import COLUNAS_CONTROLE, ConstrutorSQL, validar_identificador
+from banco.leitor_afd import iterar_registros
+from banco.migracoes import (DIA_LOCAL_SQL, JORNADA_PADRAO_ID, SEGUNDO_LOCAL_SQL, aplicar_migracoes,
+                             criar_indices_cadastro)
+from banco.registro_log import Agregador, configurar_logs, obter_logger
+from banco.ponto_compacto import MARCA_ENTRADA, MARCA_SAIDA, PontoCompacto
+from banco.relatorios import RelatorioCancelado
 
 
 def setup_logger() -> logging.Logger:
-    """Configura e retorna um logger colorido."""
-    handler = colorlog.StreamHandler()
-    handler.setFormatter(
-        colorlog.ColoredFormatter(
-            '%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            log_colors={
-                'DEBUG': 'cyan',
-                'INFO': 'green',
-                'WARNING': 'yellow',
-                'ERROR': 'red',
-                'CRITICAL': 'red,bg_white',
-            }
-        )
-    )
-
-    logger = colorlog.getLogger('SQLiteDB')
-    logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
+    """
+    Configura os logs com o padrão (console colorido, INFO) na primeira vez que é chamada
+    (ao abrir o banco, não na importação). Para níveis por categoria ou o arquivo JSON,
+    chame banco.registro_log.configurar_logs antes de abrir o banco.
+    """
+    raiz = obter_logger()
+    if not raiz.handlers:
+        configurar_logs()
+    return raiz
 
-    # Remove handlers duplicados
-    for handler in logger.handlers[:-1]:
-        logger.removeHandler(handler)
 
-    return logger
-
-
-logger = setup_logger()
+logger = obter_logger()
+log_consulta = obter_logger("consulta")
+log_escrita = obter_logger("escrita")
+log_ponto = obter_logger("ponto")
+log_importacao = obter_logger("importacao")
 
 
 class BancoSQLite:
     """Classe para gerenciar operações com banco de dados SQLite."""
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[Union[str, Path]] = None, perfil: str = PERFIL_PADRAO):
         super().__init__()
-        """Inicializa a conexão com o banco de dados."""
+        """
+        Inicializa a conexão com o banco de dados.
+
+        Args:
+            db_path: Arquivo do banco (padrão: banco/ponto_uniconte.db)
+            perfil: Perfil de PRAGMAs das conexões: "interativo", "importacao" ou "relatorio"
+                    (só leitura: as migrações e a apuração pendente da abertura rodam
+                    com o perfil padrão, as demais escritas falham)
+        """
+        setup_logger()
         try:
-            self.db_path = Path(__file__).parent.parent / "banco" / "ponto_uniconte.db"
+            self.db_path = Path(db_path) if db_path else Path(__file__).parent.parent / "banco" / "ponto_uniconte.db"
             os.makedirs(self.db_path.parent, exist_ok=True)
 
-            self.conn = sqlite3.connect(str(self.db_path))
-            self.cursor = self.conn.cursor()
-            self.cache = {}  # Cache para armazenar os dados das tabelas
-            self.cache_timeout = 60  # Tempo máximo do cache (em segundos)
-            self.last_update = {}  # Última atualização do cache
-            logger.info(f"Banco de dados inicializado em: {self.db_path}")
-            self.criar_tabelas_log_ponto()
-            self.cadastro_ponto_alteracao()
+            # Uma conexão por thread; as escritas passam pela fila do pool
+            self.pool = PoolConexoes(self.db_path, perfil=perfil)
+            self._local = threading.local()
+            self.cache = CacheConsultas()  # Cache de consultas invalidado pelas escritas
+            self.sql = ConstrutorSQL(lambda: self.conn)  # SQL memorizado e esquema das tabelas
+            self.instrumentacao = None  # ver instrumentar()
+            self._marcacoes_gravadas = Agregador(log_ponto, "Marcações gravadas")  # resumo no lugar de uma linha por marcação
+            logger.info("Banco de dados inicializado em: %s", self.db_path)
+            with self.pool.perfil_thread(PERFIL_PADRAO) if perfil != PERFIL_PADRAO else contextlib.nullcontext():
+                with self.pool.fila_escrita:
+                    aplicar_migracoes(self.conn)
+                self.atualizar_ponto_dia()
 
         except Exception as e:
-            logger.error(f"Erro na inicialização do banco: {str(e)}")
+            logger.error("Erro na inicialização do banco: %s", e)
             raise
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Conexão da thread atual (cada thread usa a sua)."""
+        return self.pool.conexao()
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """Cursor da thread atual, mantido por compatibilidade; prefira um cursor por operação."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None or getattr(self._local, "conn", None) is not self.conn:
+            cursor = self._local.cursor = self.conn.cursor()
+            self._local.conn = self.conn
+        return cursor
+
+    def perfil(self, perfil: str):
+        """
+        Context manager que troca o perfil de PRAGMAs da conexão da thread atual
+        durante o bloco (ex.: "importacao" numa carga grande, "relatorio" num relatório).
+        """
+        return self.pool.perfil_thread(perfil)
+
     @contextlib.contextmanager
     def transaction(self):
-        """Context manager para gerenciar transações."""
+        """
+        Context manager para gerenciar transações.
+
+        A transação entra na fila de escrita do pool (uma por vez, na ordem de chegada)
+        e pode ser aninhada; só a mais externa faz commit/rollback.
+
+        Yields:
+            sqlite3.Cursor: Cursor novo na conexão da thread atual
+        """
+        externa = self.pool.fila_escrita.profundidade == 0
         try:
-            yield
-            self.conn.commit()
-        except Exception as e:
-            self.conn.rollback()
-            raise e
+            with self.pool.escrita() as conn:
+                cursor = conn.cursor()
+                try:
+                    yield cursor
+                finally:
+                    cursor.close()
+        finally:
+            if externa:
+                # Invalida o cache só depois do commit, para nenhuma leitura concorrente
+                # guardar o estado anterior à escrita com a versão nova
+                alteradas, self._local.tabelas_alteradas = getattr(self._local, "tabelas_alteradas", None), None
+                if alteradas:
+                    self.cache.invalidar(*alteradas)
+
+    def _marcar_alteracao(self, *tabelas: str) -> None:
+        """Registra escrita nas tabelas; o cache delas é invalidado ao fim da transação."""
+        if not self.pool.fila_escrita.profundidade:
+            self.cache.invalidar(*tabelas)
+            return
+        pendentes = getattr(self._local, "tabelas_alteradas", None)
+        if pendentes is None:
+            pendentes = self._local.tabelas_alteradas = set()
+        pendentes.update(tabelas)
+
+    def invalidar_cache(self, *tabelas: str) -> None:
+        """
+        Invalida o cache de consultas das tabelas (todas, se nenhuma for informada).
+        Necessário só quando o banco é alterado por fora desta classe.
+        """
+        if tabelas:
+            self.cache.invalidar(*tabelas)
+        else:
+            self.cache.limpar()
 
     def criar_tabela(self, nome_tabela: str, campos: Dict[str, str]) -> bool:
         """
@@ -89,24 +160,17 @@ class BancoSQLite:
             bool: True se a tabela foi criada com sucesso, False caso contrário
         """
         try:
-            campos_sql = ', '.join([f"{nome} {tipo}" for nome, tipo in campos.items()])
-
-            query = f"""
-                CREATE TABLE IF NOT EXISTS {nome_tabela} (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    {campos_sql},
-                    data_cadastro TEXT,
-                    ultima_modificacao TEXT
-                )
-            """
+            query = self.sql.criar_tabela(nome_tabela, tuple(campos.items()))
 
-            with self.transaction():
-                self.cursor.execute(query)
-                logger.info(f"Tabela '{nome_tabela}' criada com sucesso")
+            with self.transaction() as cursor:
+                cursor.execute(query)
+                criar_indices_cadastro(cursor, nome_tabela)
+                log_escrita.info("Tabela '%s' criada com sucesso", nome_tabela)
+            self.sql.invalidar_esquema(nome_tabela)
             return True
 
         except Exception as e:
-            logger.error(f"Erro ao criar tabela '{nome_tabela}': {str(e)}")
+            log_escrita.error("Erro ao criar tabela '%s': %s", nome_tabela, e)
             return False
 
     def _converter_valor(self, valor: Any) -> Any:
@@ -134,26 +198,27 @@ class BancoSQLite:
 
             # Verifica se o registro já existe
             valor_chave = dados.get(campo_chave)
-            query_verificacao = f"SELECT * FROM {nome_tabela} WHERE {campo_chave} = ?"
+            query_verificacao = self.sql.selecionar(nome_tabela, (campo_chave,))
 
-            with self.transaction():
-                self.cursor.execute(query_verificacao, (self._converter_valor(valor_chave),))
-                registro_existente = self.cursor.fetchone()
+            with self.transaction() as cursor:
+                cursor.execute(query_verificacao, (self._converter_valor(valor_chave),))
+                registro_existente = cursor.fetchone()
 
                 if registro_existente:
                     # Prepara dados para atualização
                     dados['ultima_modificacao'] = timestamp
 
-                    # Monta a query de UPDATE
-                    set_clause = ', '.join([f"{campo} = ?" for campo in dados.keys()])
-                    query = f"UPDATE {nome_tabela} SET {set_clause} WHERE {campo_chave} = ?"
+                    # Monta a query de UPDATE (colunas em ordem fixa: o mesmo SQL para o mesmo conjunto)
+                    colunas = tuple(sorted(dados))
+                    query = self.sql.atualizar(nome_tabela, colunas, campo_chave)
 
                     # Prepara valores para UPDATE
-                    valores = [self._converter_valor(v) for v in dados.values()]
+                    valores = [self._converter_valor(dados[campo]) for campo in colunas]
                     valores.append(self._converter_valor(valor_chave))  # Adiciona o valor da chave
 
-                    self.cursor.execute(query, valores)
-                    logger.info(f"Registro atualizado com sucesso em '{nome_tabela}'")
+                    cursor.execute(query, valores)
+                    self._marcar_alteracao(nome_tabela)
+                    log_escrita.debug("Registro atualizado com sucesso em '%s'", nome_tabela)
                 else:
                     # Insere novo registro
                     dados.update({
@@ -161,22 +226,176 @@ class BancoSQLite:
                         'ultima_modificacao': timestamp
                     })
 
-                    campos = ', '.join(dados.keys())
-                    placeholders = ', '.join(['?' for _ in dados])
-                    query = f"INSERT INTO {nome_tabela} ({campos}) VALUES ({placeholders})"
+                    colunas = tuple(sorted(dados))
+                    query = self.sql.inserir(nome_tabela, colunas)
 
-                    valores = [self._converter_valor(v) for v in dados.values()]
+                    valores = [self._converter_valor(dados[campo]) for campo in colunas]
 
-                    self.cursor.execute(query, valores)
-                    logger.info(f"Registro inserido com sucesso em '{nome_tabela}'")
+                    cursor.execute(query, valores)
+                    self._marcar_alteracao(nome_tabela)
+                    log_escrita.debug("Registro inserido com sucesso em '%s'", nome_tabela)
 
                 return True
 
         except Exception as e:
-            logger.error(f"Erro ao inserir/atualizar registro em '{nome_tabela}': {str(e)}")
+            log_escrita.error("Erro ao inserir/atualizar registro em '%s': %s", nome_tabela, e)
 
             return e
 
+    def _tem_chave_unica(self, cursor: sqlite3.Cursor, nome_tabela: str, campo_chave: str) -> bool:
+        """
+        Informa se campo_chave já é único na tabela (INTEGER PRIMARY KEY ou índice único
+        só nessa coluna), condição do ON CONFLICT. Não altera o esquema.
+        """
+        self.sql.validar(nome_tabela, (campo_chave,))
+        campo = campo_chave.lower()
+        if campo == "rowid":
+            return True
+        cursor.execute(f"PRAGMA table_info({nome_tabela})")
+        chave_primaria = [(nome.lower(), tipo.upper()) for _, nome, tipo, _, _, pk in cursor.fetchall() if pk]
+        if chave_primaria == [(campo, "INTEGER")]:
+            return True
+        cursor.execute(f"PRAGMA index_list({nome_tabela})")
+        for _, nome_indice, unico, _, parcial in cursor.fetchall():
+            if unico and not parcial:
+                cursor.execute(f"PRAGMA index_info({nome_indice})")
+                if [(coluna or "").lower() for _, _, coluna in cursor.fetchall()] == [campo]:
+                    return True
+        return False
+
+    def inserir_ou_atualizar_registros(self, nome_tabela: str, registros, campo_chave: str,
+                                       tamanho_lote: int = 1000) -> Optional[dict]:
+        """
+        Versão em lote de inserir_ou_atualizar_registro (ex.: sincronizar o cadastro vindo da folha).
+
+        Os registros são agrupados pelo conjunto de colunas e gravados com executemany
+        e INSERT ... ON CONFLICT(campo_chave) DO UPDATE, um commit a cada tamanho_lote
+        registros. O ON CONFLICT exige que campo_chave já seja único na tabela (chave
+        primária ou índice único); senão cada registro faz UPDATE e, se nada foi
+        atualizado, INSERT (ainda um commit por lote).
+
+        Args:
+            nome_tabela: Nome da tabela
+            registros: Iterável de dicionários, como em inserir_ou_atualizar_registro;
+                       data_cadastro e ultima_modificacao, se vierem, são ignorados
+            campo_chave: Nome do campo que serve como chave única
+            tamanho_lote: Registros por transação
+
+        Returns:
+            dict: resultados (um por registro, na ordem recebida: "inserido", "atualizado"
+                  ou "erro: <mensagem>"), inseridos, atualizados, erros, segundos e
+                  registros_por_segundo; None se a tabela não puder ser preparada
+        """
+        inicio = time.perf_counter()
+        resultados = []
+        try:
+            cursor = self.conn.cursor()
+            try:
+                com_conflito = self._tem_chave_unica(cursor, nome_tabela, campo_chave)
+            finally:
+                cursor.close()
+        except Exception as e:
+            log_escrita.error("Erro ao preparar gravação em lote em '%s': %s", nome_tabela, e)
+            return None
+
+        lote = []
+        for dados in registros:
+            lote.append(dados)
+            if len(lote) >= tamanho_lote:
+                resultados.extend(self._gravar_lote_registros(nome_tabela, lote, campo_chave, com_conflito))
+                lote = []
+        if lote:
+            resultados.extend(self._gravar_lote_registros(nome_tabela, lote, campo_chave, com_conflito))
+
+        decorrido = time.perf_counter() - inicio
+        estatisticas = {
+            "resultados": resultados,
+            "inseridos": resultados.count("inserido"),
+            "atualizados": resultados.count("atualizado"),
+            "erros": sum(1 for r in resultados if r.startswith("erro")),
+            "segundos": round(decorrido, 3),
+            "registros_por_segundo": round(len(resultados) / decorrido) if decorrido else 0,
+        }
+        log_escrita.info(
+            "Gravação em lote em '%s': %d inseridos, %d atualizados, %d erros em %.2f s",
+            nome_tabela, estatisticas['inseridos'], estatisticas['atualizados'], estatisticas['erros'], decorrido,
+            extra={chave: valor for chave, valor in estatisticas.items() if chave != "resultados"}
+        )
+        return estatisticas
+
+    def _gravar_lote_registros(self, nome_tabela: str, lote: list, campo_chave: str, com_conflito: bool) -> list:
+        """Grava um lote numa transação; retorna o resultado de cada registro."""
+        timestamp = datetime.now().isoformat()
+        resultados = [None] * len(lote)
+
+        # Agrupa pelo conjunto de colunas (a ordem das chaves do dicionário não importa); as
+        # colunas de controle vindas do chamador ficam de fora, quem as preenche é a gravação
+        grupos = {}
+        for posicao, dados in enumerate(lote):
+            colunas = tuple(sorted(c for c in dados if c.lower() not in COLUNAS_CONTROLE))
+            grupos.setdefault(colunas, []).append(posicao)
+
+        chaves = [self._converter_valor(dados.get(campo_chave)) for dados in lote]
+        try:
+            with self.transaction() as cursor:
+                # Quais chaves já existem, para informar inserido/atualizado por registro
+                existentes = set()
+                distintas = list({chave for chave in chaves if chave is not None})
+                for i in range(0, len(distintas), 500):
+                    parte = distintas[i:i + 500]
+                    cursor.execute(
+                        f"SELECT {campo_chave} FROM {nome_tabela} WHERE {campo_chave} IN ({', '.join('?' * len(parte))})",
+                        parte
+                    )
+                    existentes.update(linha[0] for linha in cursor.fetchall())
+
+                for colunas, posicoes in grupos.items():
+                    if campo_chave not in colunas:
+                        for posicao in posicoes:
+                            resultados[posicao] = f"erro: campo chave '{campo_chave}' ausente"
+                        continue
+                    if com_conflito:
+                        insert = self.sql.upsert(nome_tabela, colunas, campo_chave)
+                    else:
+                        insert = self.sql.inserir(nome_tabela, (*colunas, *COLUNAS_CONTROLE))
+                        update = self.sql.atualizar(nome_tabela, (*colunas, "ultima_modificacao"), campo_chave)
+                    valores = {posicao: [self._converter_valor(lote[posicao][c]) for c in colunas]
+                               for posicao in posicoes}
+
+                    if com_conflito:
+                        try:
+                            cursor.executemany(insert, [(*valores[p], timestamp, timestamp) for p in posicoes])
+                            ok = posicoes
+                        except sqlite3.Error:
+                            # Algum registro inválido: grava um a um para isolar os erros
+                            ok = []
+                            for p in posicoes:
+                                try:
+                                    cursor.execute(insert, (*valores[p], timestamp, timestamp))
+                                    ok.append(p)
+                                except sqlite3.Error as e:
+                                    resultados[p] = f"erro: {e}"
+                    else:
+                        ok = []
+                        for p in posicoes:
+                            try:
+                                cursor.execute(update, (*valores[p], timestamp, chaves[p]))
+                                if cursor.rowcount == 0:
+                                    cursor.execute(insert, (*valores[p], timestamp, timestamp))
+                                ok.append(p)
+                            except sqlite3.Error as e:
+                                resultados[p] = f"erro: {e}"
+
+                    for p in ok:
+                        resultados[p] = "atualizado" if chaves[p] in existentes else "inserido"
+                        if chaves[p] is not None:
+                            existentes.add(chaves[p])
+                self._marcar_alteracao(nome_tabela)
+        except Exception as e:
+            log_escrita.error("Erro ao gravar lote em '%s': %s", nome_tabela, e)
+            return [f"erro: {e}"] * len(lote)
+        return resultados
+
     def atualizar_registro(self, nome_tabela: str, id_registro: int, dados: Dict[str, Any]) -> bool:
         """
         Atualiza um registro existente.
@@ -191,25 +410,27 @@ class BancoSQLite:
         """
         try:
             dados['ultima_modificacao'] = datetime.now().isoformat()  # Correção aqui
-            set_clause = ', '.join([f"{campo} = ?" for campo in dados.keys()])
-            query = f"UPDATE {nome_tabela} SET {set_clause} WHERE id = ?"
+            colunas = tuple(sorted(dados))
+            query = self.sql.atualizar(nome_tabela, colunas)
 
-            valores = [self._converter_valor(v) for v in dados.values()]
+            valores = [self._converter_valor(dados[campo]) for campo in colunas]
             valores.append(id_registro)
 
-            with self.transaction():
-                self.cursor.execute(query, valores)
-                if self.cursor.rowcount == 0:
-                    logger.warning(f"Nenhum registro atualizado em '{nome_tabela}' para ID {id_registro}")
+            with self.transaction() as cursor:
+                cursor.execute(query, valores)
+                self._marcar_alteracao(nome_tabela)
+                if cursor.rowcount == 0:
+                    log_escrita.warning("Nenhum registro atualizado em '%s' para ID %s", nome_tabela, id_registro)
                     return False
-                logger.info(f"Registro {id_registro} atualizado com sucesso em '{nome_tabela}'")
+                log_escrita.debug("Registro %s atualizado com sucesso em '%s'", id_registro, nome_tabela)
             return True
 
         except Exception as e:
-            logger.error(f"Erro ao atualizar registro {id_registro} em '{nome_tabela}': {str(e)}")
+            log_escrita.error("Erro ao atualizar registro %s em '%s': %s", id_registro, nome_tabela, e)
             return False
 
-    def consultar_registros(self, nome_tabela: str, filtros: Optional[Dict[str, Any]] = None) -> List[tuple]:
+    def consultar_registros(self, nome_tabela: str, filtros: Optional[Dict[str, Any]] = None,
+                            usar_cache: bool = False) -> List[tuple]:
         """
         Consulta registros com filtros opcionais.
 
@@ -217,28 +438,113 @@ class BancoSQLite:
             nome_tabela: Nome da tabela
             filtros: Dicionário com filtros (opcional)
                     Exemplo: {'nome': 'João', 'idade': 30}
+            usar_cache: Usa o cache de consultas (invalidado a cada escrita na tabela)
 
         Returns:
             List[tuple]: Lista de registros encontrados
         """
         try:
-            query = f"SELECT * FROM {nome_tabela}"
-            valores = []
-
-            if filtros:
-                where_clause = ' AND '.join([f"{campo} = ?" for campo in filtros.keys()])
-                query += f" WHERE {where_clause}"
-                valores = [self._converter_valor(v) for v in filtros.values()]
-
-            self.cursor.execute(query, valores)
-            resultados = self.cursor.fetchall()
-            logger.info(f"Consulta executada em '{nome_tabela}': {len(resultados)} registros encontrados")
+            query = self.sql.selecionar(nome_tabela, tuple(filtros) if filtros else ())
+            valores = [self._converter_valor(v) for v in filtros.values()] if filtros else []
+
+            chave = tuple(zip(filtros, valores)) if filtros else None
+            if usar_cache:
+                encontrado, resultados = self.cache.obter(nome_tabela, chave)
+                if encontrado:
+                    return resultados
+                versao = self.cache.versao(nome_tabela)
+
+            cursor = self.conn.cursor()
+            cursor.execute(query, valores)
+            resultados = cursor.fetchall()
+            if usar_cache:
+                self.cache.guardar(nome_tabela, chave, resultados, versao)
+            log_consulta.debug("Consulta executada em '%s': %s registros encontrados", nome_tabela, len(resultados))
             return resultados
 
         except Exception as e:
-            logger.error(f"Erro ao consultar registros em '{nome_tabela}': {str(e)}")
+            log_consulta.error("Erro ao consultar registros em '%s': %s", nome_tabela, e)
             return []
 
+    def consultar_pagina(self, nome_tabela: str, tamanho: int = 500, apos: Optional[tuple] = None,
+                         chave: Union[tuple, list] = ("id",),
+                         filtros: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        Lê uma página de registros com paginação por chave (keyset), sem OFFSET.
+
+        Cada página continua de onde a anterior parou (WHERE chave > última chave lida),
+        então o custo é o mesmo na primeira e na milésima página, desde que a chave
+        tenha índice: ("id",) nas tabelas de cadastro, ("cpf", "timestamp") em ponto,
+        ("cpf", "data") em ponto_dia.
+
+        Args:
+            nome_tabela: Nome da tabela
+            tamanho: Quantidade de registros por página
+            apos: Valores da chave do último registro da página anterior (None = primeira página)
+            chave: Colunas que identificam o registro de forma única, na ordem da paginação
+            filtros: Filtros de igualdade, como em consultar_registros
+
+        Returns:
+            tuple: (registros, chave do último registro) — a chave vem None na última página
+        """
+        chave = tuple(chave)
+        filtros = filtros or {}
+        valores = [self._converter_valor(v) for v in filtros.values()]
+        if apos is not None:
+            valores.extend(apos)
+        valores.append(tamanho)
+
+        # As colunas da chave vão no fim de cada linha para montar a próxima página
+        query = self.sql.pagina(nome_tabela, chave, tuple(filtros), apos is not None)
+
+        cursor = self.conn.cursor()
+        cursor.execute(query, valores)
+        linhas = cursor.fetchall()
+        cursor.close()
+
+        n = len(chave)
+        registros = [linha[:-n] for linha in linhas]
+        proxima = tuple(linhas[-1][-n:]) if len(linhas) == tamanho else None
+        return registros, proxima
+
+    def iterar_registros_tabela(self, nome_tabela: str, filtros: Optional[Dict[str, Any]] = None,
+                                tamanho_lote: int = 1000, ordem: Optional[str] = None):
+        """
+        Gera os registros da tabela em lotes de fetchmany, sem carregar tudo na memória.
+
+        O cursor de leitura fica aberto enquanto o gerador é consumido (em WAL isso não
+        bloqueia as escritas); feche o gerador (ou consuma até o fim) para liberá-lo.
+
+        Args:
+            nome_tabela: Nome da tabela
+            filtros: Filtros de igualdade, como em consultar_registros
+            tamanho_lote: Registros lidos do SQLite por vez
+            ordem: Cláusula ORDER BY opcional (ex.: "cpf, timestamp")
+
+        Yields:
+            tuple: Um registro por vez
+        """
+        filtros = filtros or {}
+        query = self.sql.selecionar(nome_tabela, tuple(filtros))
+        if ordem:
+            # Só colunas da tabela, opcionalmente seguidas de ASC/DESC
+            termos = [termo.split() for termo in ordem.split(",")]
+            if any(len(t) not in (1, 2) or (len(t) == 2 and t[1].upper() not in ("ASC", "DESC")) for t in termos):
+                raise ValueError(f"Ordenação inválida: {ordem!r}")
+            self.sql.validar(nome_tabela, [t[0] for t in termos])
+            query += f" ORDER BY {ordem}"
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, [self._converter_valor(v) for v in filtros.values()])
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                yield from lote
+        finally:
+            cursor.close()
+
     def busca_dados_tabelas(self) -> List[str]:
         """
         Lista todas as tabelas do banco.
@@ -247,13 +553,14 @@ class BancoSQLite:
             List[str]: Lista com nomes das tabelas
         """
         try:
-            self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tabelas = [tabela[0] for tabela in self.cursor.fetchall()]
-            logger.info(f"Listadas {len(tabelas)} tabelas")
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            tabelas = [tabela[0] for tabela in cursor.fetchall()]
+            log_consulta.debug("Listadas %s tabelas", len(tabelas))
             return tabelas
 
         except Exception as e:
-            logger.error(f"Erro ao listar tabelas: {str(e)}")
+            log_consulta.error("Erro ao listar tabelas: %s", e)
             return []
 
     def estrutura_tabela(self, nome_tabela: str) -> List[tuple]:
@@ -267,13 +574,14 @@ class BancoSQLite:
             List[tuple]: Lista com informações dos campos da tabela
         """
         try:
-            self.cursor.execute(f"PRAGMA table_info({nome_tabela})")
-            estrutura = self.cursor.fetchall()
-            logger.info(f"Estrutura da tabela '{nome_tabela}' obtida com sucesso")
+            cursor = self.conn.cursor()
+            cursor.execute(f"PRAGMA table_info({validar_identificador(nome_tabela)})")
+            estrutura = cursor.fetchall()
+            log_consulta.debug("Estrutura da tabela '%s' obtida com sucesso", nome_tabela)
             return estrutura
 
         except Exception as e:
-            logger.error(f"Erro ao obter estrutura da tabela '{nome_tabela}': {str(e)}")
+            log_consulta.error("Erro ao obter estrutura da tabela '%s': %s", nome_tabela, e)
             return []
 
     def excluir_registro(self, nome_tabela: str, registro_id: int) -> bool:
@@ -288,18 +596,19 @@ class BancoSQLite:
             bool: True se a exclusão foi realizada com sucesso, False caso contrário.
         """
         try:
-            with self.transaction():
-                query = f"DELETE FROM {nome_tabela} WHERE id = ?"
-                self.cursor.execute(query, (registro_id,))
-            logger.info(f"Registro com ID {registro_id} excluído com sucesso da tabela '{nome_tabela}'.")
+            with self.transaction() as cursor:
+                query = self.sql.excluir(nome_tabela)
+                cursor.execute(query, (registro_id,))
+                self._marcar_alteracao(nome_tabela)
+            log_escrita.debug("Registro com ID %s excluído com sucesso da tabela '%s'.", registro_id, nome_tabela)
             return True
         except Exception as e:
-            logger.error(f"Erro ao excluir registro com ID {registro_id} da tabela '{nome_tabela}': {str(e)}")
+            log_escrita.error("Erro ao excluir registro com ID %s da tabela '%s': %s", registro_id, nome_tabela, e)
             return False
 
     def cadastro_ponto(self):
         try:
-            with self.transaction():
+            with self.transaction() as cursor:
                 query = """
                 CREATE TABLE IF NOT EXISTS ponto (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -312,16 +621,16 @@ class BancoSQLite:
                     );
 
                     """
-                self.cursor.execute(query)
-            logger.info(f"Tabela ponto criada com sucesso!")
+                cursor.execute(query)
+            log_escrita.info("Tabela ponto criada com sucesso!")
             return True
         except Exception as e:
-            logger.error(f"Erro ao criar a tabela ponto. {e}")
+            log_escrita.error("Erro ao criar a tabela ponto. %s", e)
             return False
 
     def cadastro_ponto_alteracao(self):
         try:
-            with self.transaction():
+            with self.transaction() as cursor:
                 query = """
                             CREATE TABLE IF NOT EXISTS ponto_alteracoes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -334,22 +643,22 @@ class BancoSQLite:
             );
 
                     """
-                self.cursor.execute(query)
-            logger.info(f"Tabela ponto_alteracoes criada com sucesso!")
+                cursor.execute(query)
+            log_escrita.info("Tabela ponto_alteracoes criada com sucesso!")
             return True
         except Exception as e:
-            logger.error(f"Erro ao criar a tabela ponto. {e}")
+            log_escrita.error("Erro ao criar a tabela ponto. %s", e)
             return False
 
     def inserir_atualizar_ponto(self, cpf, timestamp, tipo, codigo_empresa):
         try:
-            with self.transaction():
+            with self.transaction() as cursor:
                 # Verifica se já existe um registro para o mesmo CPF e timestamp
                 query_verificar = """
                 SELECT id FROM ponto WHERE cpf = ? AND timestamp = ?
                 """
-                self.cursor.execute(query_verificar, (cpf, timestamp))
-                resultado = self.cursor.fetchone()
+                cursor.execute(query_verificar, (cpf, timestamp))
+                resultado = cursor.fetchone()
 
                 if resultado:
                     # Atualizar o registro existente
@@ -358,32 +667,793 @@ class BancoSQLite:
                     SET tipo = ?, codigo_empresa = ?
                     WHERE id = ?
                     """
-                    self.cursor.execute(query_update, (tipo, codigo_empresa, resultado[0]))
-                    logger.info(f"Registro atualizado para CPF {cpf} em {timestamp}.")
+                    cursor.execute(query_update, (tipo, codigo_empresa, resultado[0]))
+                    log_ponto.debug("Registro atualizado para CPF %s em %s.", cpf, timestamp)
+                    gravacao = "atualizadas"
                 else:
                     # Inserir um novo registro
-                    query_insert = """
-                    INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa)
-                    VALUES (?, ?, ?, ?)
+                    query_insert = f"""
+                    INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa, dia_local, segundo_local)
+                    VALUES (?1, ?2, ?3, ?4, {DIA_LOCAL_SQL.format(timestamp="?2")}, {SEGUNDO_LOCAL_SQL.format(timestamp="?2")})
                     """
-                    self.cursor.execute(query_insert, (cpf, timestamp, tipo, codigo_empresa))
-                    logger.info(f"Novo registro inserido para CPF {cpf} em {timestamp}.")
+                    cursor.execute(query_insert, (cpf, timestamp, tipo, codigo_empresa))
+                    log_ponto.debug("Novo registro inserido para CPF %s em %s.", cpf, timestamp)
+                    gravacao = "inseridas"
+
+                self._marcar_alteracao("ponto")
+                # Atualiza a apuração do dia (ponto_dia) na mesma transação
+                self._processar_ponto_dia_pendente()
 
+            self._marcacoes_gravadas.contar(tipo=gravacao)
             return True
         except Exception as e:
-            logger.error(f"Erro ao inserir/atualizar ponto. {e}")
+            log_ponto.error("Erro ao inserir/atualizar ponto. %s", e)
             return False
 
+    def _preparar_importacao_ponto(self):
+        """Cria a tabela de staging (a chave única de ponto vem da migração 1)."""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS ponto_importacao (
+                    cpf TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    dia TEXT NOT NULL,
+                    tipo TEXT,
+                    codigo_empresa INTEGER NOT NULL,
+                    PRIMARY KEY (cpf, timestamp)
+                )
+            """)
+
+    def _mesclar_lote_ponto(self, lote):
+        """
+        Carrega um lote na staging e mescla em ponto com um único INSERT ... ON CONFLICT.
+
+        O tipo (entrada/saida) das marcações novas segue a ordem cronológica do dia do
+        funcionário, alternando a partir da última marcação gravada que já tem tipo; as
+        marcações gravadas nunca são renumeradas, então correções feitas na tela
+        (inserir_atualizar_ponto, salvar_alteracao_ponto) são preservadas. Uma marcação
+        que já existe só é atualizada se mudou de empresa ou ainda não tinha tipo.
+
+        Returns:
+            tuple: (recebidos, inseridos, atualizados)
+        """
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM ponto_importacao")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO ponto_importacao (cpf, timestamp, dia, codigo_empresa) VALUES (?, ?, ?, ?)",
+                lote
+            )
+            # Cada marcação gravada com tipo abre um grupo; dentro do grupo as demais
+            # alternam a partir dela (sem gravada com tipo antes, o dia começa em entrada)
+            cursor.execute("""
+                WITH dias AS (
+                    SELECT DISTINCT cpf, dia FROM ponto_importacao
+                ),
+                todos AS (
+                    SELECT p.cpf, p.timestamp, p.tipo
+                    FROM dias d
+                    JOIN ponto p ON p.cpf = d.cpf AND p.timestamp >= d.dia AND p.timestamp < d.dia || 'U'
+                    UNION ALL
+                    SELECT s.cpf, s.timestamp, NULL
+                    FROM ponto_importacao s
+                    WHERE NOT EXISTS (SELECT 1 FROM ponto p WHERE p.cpf = s.cpf AND p.timestamp = s.timestamp)
+                ),
+                grupos AS (
+                    SELECT cpf, timestamp, tipo,
+                           SUM(tipo IS NOT NULL) OVER (PARTITION BY cpf, substr(timestamp, 1, 10)
+                                                       ORDER BY timestamp) AS grupo
+                    FROM todos
+                ),
+                numerados AS (
+                    SELECT cpf, timestamp,
+                           FIRST_VALUE(tipo) OVER grupo_dia AS ancora,
+                           ROW_NUMBER() OVER grupo_dia AS ordem
+                    FROM grupos
+                    WINDOW grupo_dia AS (PARTITION BY cpf, substr(timestamp, 1, 10), grupo ORDER BY timestamp)
+                )
+                UPDATE ponto_importacao
+                SET tipo = CASE WHEN (n.ordem % 2 = 1) = (COALESCE(n.ancora, 'entrada') = 'entrada')
+                                THEN 'entrada' ELSE 'saida' END
+                FROM numerados n
+                WHERE n.cpf = ponto_importacao.cpf AND n.timestamp = ponto_importacao.timestamp
+            """)
+
+            cursor.execute("""
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(p.id IS NULL), 0),
+                    COALESCE(SUM(p.id IS NOT NULL AND (p.tipo IS NULL
+                                                       OR p.codigo_empresa IS NOT s.codigo_empresa)), 0)
+                FROM ponto_importacao s
+                LEFT JOIN ponto p ON p.cpf = s.cpf AND p.timestamp = s.timestamp
+            """)
+            recebidos, inseridos, atualizados = cursor.fetchone()
+
+            cursor.execute(f"""
+                INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa, dia_local, segundo_local)
+                SELECT cpf, timestamp, tipo, codigo_empresa,
+                       {DIA_LOCAL_SQL.format(timestamp="timestamp")}, {SEGUNDO_LOCAL_SQL.format(timestamp="timestamp")}
+                FROM ponto_importacao WHERE true
+                ON CONFLICT (cpf, timestamp) DO UPDATE
+                SET tipo = COALESCE(ponto.tipo, excluded.tipo), codigo_empresa = excluded.codigo_empresa
+                WHERE ponto.tipo IS NULL OR ponto.codigo_empresa IS NOT excluded.codigo_empresa
+            """)
+            if inseridos or atualizados:
+                self._marcar_alteracao("ponto")
+            self._processar_ponto_dia_pendente()
+        return recebidos, inseridos, atualizados
+
+    def importar_afd(self, caminho, codigo_empresa, tamanho_lote=5000, tipo_registro="3", encoding="ANSI",
+                     perfil="importacao"):
+        """
+        Importa um arquivo do relógio (AFD) direto para a tabela ponto, em lotes.
+
+        Os registros de banco.leitor_afd.iterar_registros vão para a tabela temporária
+        ponto_importacao e cada lote é mesclado em ponto numa única transação.
+
+        Args:
+            caminho: Caminho do arquivo exportado pelo relógio
+            codigo_empresa: Código da empresa dona das marcações
+            tamanho_lote: Quantidade de marcações por transação
+            tipo_registro: Tipo de registro do AFD que representa marcação de ponto
+                           (último caractere do identificador); None importa todas as linhas
+            encoding: Codificação do arquivo
+            perfil: Perfil de PRAGMAs usado durante a importação (None mantém o atual)
+
+        Returns:
+            dict: lidos, inseridos, atualizados, ignorados, segundos e linhas_por_segundo
+        """
+        estatisticas = {"lidos": 0, "inseridos": 0, "atualizados": 0, "ignorados": 0}
+        inicio = time.perf_counter()
+
+        def acumular(lote):
+            recebidos, inseridos, atualizados = self._mesclar_lote_ponto(lote)
+            estatisticas["inseridos"] += inseridos
+            estatisticas["atualizados"] += atualizados
+            # Linhas repetidas no lote ou iguais ao que já está gravado
+            estatisticas["ignorados"] += len(lote) - inseridos - atualizados
+
+        try:
+            with self.perfil(perfil) if perfil else contextlib.nullcontext():
+                self._preparar_importacao_ponto()
+
+                lote = []
+                for reg in iterar_registros(caminho, encoding=encoding):
+                    estatisticas["lidos"] += 1
+                    if (tipo_registro is not None and reg.registro[-1:] != tipo_registro) or not reg.codigo:
+                        estatisticas["ignorados"] += 1
+                        continue
+
+                    lote.append((reg.codigo, reg.timestamp, reg.timestamp[:10], codigo_empresa))
+                    if len(lote) >= tamanho_lote:
+                        acumular(lote)
+                        lote = []
+                if lote:
+                    acumular(lote)
+
+        except Exception as e:
+            log_importacao.error("Erro ao importar o arquivo '%s': %s", caminho, e)
+            return None
+
+        decorrido = time.perf_counter() - inicio
+        estatisticas["segundos"] = round(decorrido, 3)
+        estatisticas["linhas_por_segundo"] = round(estatisticas["lidos"] / decorrido) if decorrido else 0
+        log_importacao.info(
+            "Importação de '%s' concluída: %d lidos, %d inseridos, %d atualizados, %d ignorados em %.2f s (%d linhas/s)",
+            caminho, estatisticas['lidos'], estatisticas['inseridos'], estatisticas['atualizados'],
+            estatisticas['ignorados'], decorrido, estatisticas['linhas_por_segundo'], extra=estatisticas
+        )
+        return estatisticas
+
+    def importar_arquivos(self, origens, codigo_empresa, processos=None, padrao="*", tamanho_lote=5000,
+                          tipo_registro="3", encoding="ANSI", progresso=None, perfil="importacao"):
+        """
+        Importa vários arquivos do relógio (pastas, globs ou caminhos), lendo em paralelo.
+
+        Os arquivos são interpretados em processos separados (banco.importacao_paralela)
+        e gravados aqui, cada um na sua transação. Arquivos já importados (mesmo SHA-256
+        no manifesto importacao_arquivo) são pulados; um arquivo com falha é registrado
+        no resultado e não interrompe os outros.
+
+        Args:
+            origens: Arquivo, pasta ou glob, ou uma lista deles
+            codigo_empresa: Código da empresa dona das marcações
+            processos: Processos de leitura (None = um por CPU; 1 lê no próprio processo)
+            padrao: Padrão dos arquivos dentro das pastas (ex.: "*.txt")
+            tamanho_lote: Quantidade de marcações por lote mesclado em ponto
+            tipo_registro: Ver importar_afd
+            encoding: Codificação dos arquivos
+            progresso: Função chamada após cada arquivo com (concluidos, total, caminho, situacao),
+                       situacao sendo "importado", "repetido" ou "falha"
+            perfil: Perfil de PRAGMAs usado durante a importação (None mantém o atual)
+
+        Returns:
+            dict: arquivos, importados, repetidos, falhas (lista de {caminho, erro}), lidos,
+                  inseridos, atualizados, ignorados, erros (linhas inválidas), segundos e
+                  linhas_por_segundo; None se a importação não pôde começar
+        """
+        from banco.importacao_paralela import ler_arquivos, listar_arquivos
+
+        estatisticas = {"arquivos": 0, "importados": 0, "repetidos": 0, "falhas": [], "lidos": 0,
+                        "inseridos": 0, "atualizados": 0, "ignorados": 0, "erros": 0}
+        inicio = time.perf_counter()
+
+        try:
+            arquivos = listar_arquivos(origens, padrao)
+            estatisticas["arquivos"] = len(arquivos)
+
+            # Arquivos inalterados desde a última importação nem são lidos
+            conhecidos = set(self.conn.execute(
+                "SELECT caminho, tamanho, modificado_em FROM importacao_arquivo"
+            ).fetchall())
+            a_ler = []
+            for caminho in arquivos:
+                try:
+                    info = os.stat(caminho)
+                except OSError:
+                    a_ler.append(caminho)  # a falha aparece na leitura
+                    continue
+                if (caminho, info.st_size, info.st_mtime_ns) not in conhecidos:
+                    a_ler.append(caminho)
+                    continue
+                estatisticas["repetidos"] += 1
+                if progresso:
+                    progresso(estatisticas["repetidos"], len(arquivos), caminho, "repetido")
+            concluidos = estatisticas["repetidos"]
+
+            with self.perfil(perfil) if perfil else contextlib.nullcontext(), \
+                    Agregador(log_importacao, "Arquivos do relógio") as contagem:
+                self._preparar_importacao_ponto()
+                for lido in ler_arquivos(a_ler, processos, tipo_registro, encoding):
+                    situacao = self._gravar_arquivo_lido(lido, codigo_empresa, tamanho_lote, estatisticas)
+                    contagem.contar(tipo=situacao)
+                    concluidos += 1
+                    if progresso:
+                        progresso(concluidos, len(arquivos), lido.caminho, situacao)
+
+        except Exception as e:
+            log_importacao.error("Erro na importação de arquivos de %s: %s", origens, e)
+            return None
+
+        decorrido = time.perf_counter() - inicio
+        estatisticas["segundos"] = round(decorrido, 3)
+        estatisticas["linhas_por_segundo"] = round(estatisticas["lidos"] / decorrido) if decorrido else 0
+        log_importacao.info(
+            "Importação de %d arquivos concluída: %d importados, %d repetidos, %d com falha; "
+            "%d lidos, %d inseridos, %d atualizados, %d ignorados, %d inválidos em %.2f s (%d linhas/s)",
+            estatisticas['arquivos'], estatisticas['importados'], estatisticas['repetidos'],
+            len(estatisticas['falhas']), estatisticas['lidos'], estatisticas['inseridos'],
+            estatisticas['atualizados'], estatisticas['ignorados'], estatisticas['erros'], decorrido,
+            estatisticas['linhas_por_segundo'], extra={**estatisticas, "falhas": len(estatisticas['falhas'])}
+        )
+        return estatisticas
+
+    def _gravar_arquivo_lido(self, lido, codigo_empresa, tamanho_lote, estatisticas):
+        """
+        Grava as marcações de um arquivo lido e o registra no manifesto, numa transação.
+
+        Returns:
+            str: "importado", "repetido" ou "falha"
+        """
+        if lido.falha:
+            log_importacao.warning("Arquivo '%s' não importado: %s", lido.caminho, lido.falha)
+            estatisticas["falhas"].append({"caminho": lido.caminho, "erro": lido.falha})
+            return "falha"
+
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("SELECT 1 FROM importacao_arquivo WHERE checksum = ?", (lido.checksum,))
+                if cursor.fetchone():
+                    estatisticas["repetidos"] += 1
+                    return "repetido"
+
+                contagem = self._gravar_marcacoes(lido, codigo_empresa, tamanho_lote)
+                cursor.execute("""
+                    INSERT INTO importacao_arquivo (checksum, caminho, tamanho, modificado_em, codigo_empresa,
+                                                    lidos, inseridos, atualizados, ignorados, erros, importado_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+                """, (lido.checksum, lido.caminho, lido.tamanho, lido.modificado_em, codigo_empresa, lido.lidos,
+                      contagem["inseridos"], contagem["atualizados"], contagem["ignorados"], lido.erros))
+        except Exception as e:
+            log_importacao.warning("Arquivo '%s' não importado: %s", lido.caminho, e)
+            estatisticas["falhas"].append({"caminho": lido.caminho, "erro": f"{type(e).__name__}: {e}"})
+            return "falha"
+
+        if lido.erros:
+            log_importacao.warning(
+                "Arquivo '%s': %d linhas inválidas ignoradas (ex.: %s)", lido.caminho, lido.erros,
+                "; ".join(f"linha {numero}: {mensagem}" for numero, mensagem in lido.amostra_erros[:3])
+            )
+        estatisticas["importados"] += 1
+        estatisticas["lidos"] += lido.lidos
+        estatisticas["erros"] += lido.erros
+        for chave, valor in contagem.items():
+            estatisticas[chave] += valor
+        return "importado"
+
+    def _gravar_marcacoes(self, lido, codigo_empresa, tamanho_lote):
+        """
+        Mescla em ponto as marcações de um ArquivoLido, em lotes de `tamanho_lote`.
+
+        Returns:
+            dict: inseridos, atualizados e ignorados (inclui as linhas que não são marcação)
+        """
+        contagem = {"inseridos": 0, "atualizados": 0, "ignorados": lido.ignorados}
+        marcacoes = lido.marcacoes(codigo_empresa)
+        with self.transaction():
+            while True:
+                lote = list(islice(marcacoes, tamanho_lote))
+                if not lote:
+                    break
+                _, inseridos, atualizados = self._mesclar_lote_ponto(lote)
+                contagem["inseridos"] += inseridos
+                contagem["atualizados"] += atualizados
+                contagem["ignorados"] += len(lote) - inseridos - atualizados
+        return contagem
+
+    def importar_acrescimo(self, caminho, codigo_empresa, tipo_registro="3", encoding="ANSI", tamanho_lote=5000):
+        """
+        Grava em ponto só as linhas acrescentadas ao arquivo do relógio desde a última leitura.
+
+        A posição de leitura (byte, dispositivo e inode do arquivo) fica em leitura_arquivo
+        e é atualizada na mesma transação das marcações, então uma falha no meio não
+        perde nem repete linhas. Arquivo trocado ou truncado é lido de novo do início
+        (as marcações que já estão em ponto não mudam).
+
+        Args:
+            caminho: Arquivo do relógio
+            codigo_empresa: Código da empresa dona das marcações
+            tipo_registro: Ver importar_afd
+            encoding: Codificação do arquivo
+            tamanho_lote: Quantidade de marcações por lote mesclado em ponto
+
+        Returns:
+            dict: lidos, inseridos, atualizados, ignorados, erros (linhas inválidas), bytes e
+                  posicao; None em caso de erro (a posição fica onde estava)
+        """
+        from banco.acompanhamento import ler_acrescimo
+        from banco.importacao_paralela import ArquivoLido, decodificar, interpretar_linhas
+
+        caminho = os.path.abspath(caminho)
+        estatisticas = {"lidos": 0, "inseridos": 0, "atualizados": 0, "ignorados": 0, "erros": 0, "bytes": 0}
+        try:
+            linha = self.conn.execute(
+                "SELECT dispositivo, inode, posicao, linhas FROM leitura_arquivo WHERE caminho = ?", (caminho,)
+            ).fetchone()
+            dispositivo, inode, posicao, linhas = linha or (None, None, 0, 0)
+
+            while True:
+                acrescimo = ler_acrescimo(caminho, posicao, dispositivo, inode)
+                if acrescimo.reiniciado:
+                    log_importacao.warning("Arquivo '%s' trocado ou truncado; lendo de novo desde o início", caminho)
+                    linhas = 0
+                if acrescimo.fim == acrescimo.inicio:
+                    break
+                self._preparar_importacao_ponto()
+
+                lido = interpretar_linhas(decodificar(acrescimo.dados, encoding), ArquivoLido(caminho),
+                                          tipo_registro, primeira_linha=linhas + 1)
+                linhas += acrescimo.dados.count(b"\n")
+                with self.transaction() as cursor:
+                    contagem = self._gravar_marcacoes(lido, codigo_empresa, tamanho_lote)
+                    cursor.execute("""
+                        INSERT INTO leitura_arquivo (caminho, dispositivo, inode, posicao, linhas, codigo_empresa,
+                                                     atualizado_em)
+                        VALUES (?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+                        ON CONFLICT (caminho) DO UPDATE
+                        SET dispositivo = excluded.dispositivo, inode = excluded.inode, posicao = excluded.posicao,
+                            linhas = excluded.linhas, codigo_empresa = excluded.codigo_empresa,
+                            atualizado_em = excluded.atualizado_em
+                    """, (caminho, acrescimo.dispositivo, acrescimo.inode, acrescimo.fim, linhas, codigo_empresa))
+
+                if lido.erros:
+                    log_importacao.warning(
+                        "Arquivo '%s': %d linhas inválidas ignoradas (ex.: %s)", caminho, lido.erros,
+                        "; ".join(f"linha {numero}: {mensagem}" for numero, mensagem in lido.amostra_erros[:3])
+                    )
+                estatisticas["lidos"] += lido.lidos
+                estatisticas["erros"] += lido.erros
+                estatisticas["bytes"] += acrescimo.fim - acrescimo.inicio
+                for chave, valor in contagem.items():
+                    estatisticas[chave] += valor
+                posicao, dispositivo, inode = acrescimo.fim, acrescimo.dispositivo, acrescimo.inode
+
+        except FileNotFoundError:
+            log_importacao.warning("Arquivo '%s' não encontrado (o relógio ainda não o criou?)", caminho)
+            return None
+        except Exception as e:
+            log_importacao.error("Erro ao ler o acréscimo do arquivo '%s': %s", caminho, e)
+            return None
+
+        estatisticas["posicao"] = posicao
+        return estatisticas
+
+    def acompanhar_arquivos(self, origens, codigo_empresa, intervalo=2.0, parar=None, padrao="*",
+                            tipo_registro="3", encoding="ANSI", inotify=True, ao_gravar=None):
+        """
+        Acompanha os arquivos do relógio e grava as marcações novas assim que aparecem.
+
+        Primeiro lê o que cada arquivo acumulou desde a última leitura; depois espera
+        alterações (inotify ou polling, ver banco.acompanhamento) e lê só os acréscimos
+        (importar_acrescimo). Pastas e globs são listados de novo a cada espera, então
+        o arquivo que o REP cria na virada do dia entra sozinho. Bloqueia até `parar`
+        ser sinalizado ou Ctrl+C.
+
+        Args:
+            origens: Arquivo, pasta ou glob, ou uma lista deles
+            codigo_empresa: Código da empresa dona das marcações
+            intervalo: Segundos entre verificações no modo polling
+            parar: threading.Event que encerra o acompanhamento
+            padrao: Padrão dos arquivos dentro das pastas
+            tipo_registro: Ver importar_afd
+            encoding: Codificação dos arquivos
+            inotify: False força o polling (ex.: pasta de rede)
+            ao_gravar: Função chamada com (caminho, estatisticas) quando um arquivo tem linhas novas
+
+        Returns:
+            dict: Totais do acompanhamento (lidos, inseridos, atualizados, ignorados, erros, bytes)
+        """
+        from banco.acompanhamento import criar_observador
+        from banco.importacao_paralela import listar_arquivos
+
+        parar = parar or threading.Event()
+        totais = {"lidos": 0, "inseridos": 0, "atualizados": 0, "ignorados": 0, "erros": 0, "bytes": 0}
+        observador = criar_observador(intervalo, inotify=inotify)
+        log_importacao.info("Acompanhando %s (empresa %s)", origens, codigo_empresa)
+        try:
+            with Agregador(log_importacao, "Marcações acompanhadas") as contagem:
+                caminhos = listar_arquivos(origens, padrao)
+                pendentes = set(caminhos)
+                while not parar.is_set():
+                    for caminho in sorted(pendentes):
+                        resultado = self.importar_acrescimo(caminho, codigo_empresa, tipo_registro, encoding)
+                        if not resultado or not resultado["bytes"]:
+                            continue
+                        for chave in totais:
+                            totais[chave] += resultado[chave]
+                        contagem.contar(resultado["inseridos"], tipo="inseridas")
+                        if ao_gravar:
+                            ao_gravar(caminho, resultado)
+
+                    alterados = observador.aguardar(caminhos, parar)
+                    anteriores, caminhos = set(caminhos), listar_arquivos(origens, padrao)
+                    pendentes = (alterados | set(caminhos) - anteriores) & set(caminhos)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observador.fechar()
+
+        log_importacao.info(
+            "Acompanhamento encerrado: %d lidos, %d inseridos, %d atualizados, %d ignorados, %d inválidos",
+            totais['lidos'], totais['inseridos'], totais['atualizados'], totais['ignorados'], totais['erros'],
+            extra=totais
+        )
+        return totais
+
+    @staticmethod
+    def _intervalo_mes(mes_ano: str) -> tuple:
+        """
+        Converte 'MM/YYYY' no intervalo [início, início do mês seguinte) em texto ISO,
+        comparável diretamente com ponto.timestamp (permite range scan no índice).
+        """
+        mes, ano = mes_ano.split('/')
+        mes, ano = int(mes), int(ano)
+        proximo_mes, proximo_ano = (1, ano + 1) if mes == 12 else (mes + 1, ano)
+        return f"{ano:04d}-{mes:02d}-01", f"{proximo_ano:04d}-{proximo_mes:02d}-01"
+
+    def plano_consulta(self, query: str, params: Union[tuple, list] = ()) -> List[str]:
+        """
+        Retorna o EXPLAIN QUERY PLAN de uma consulta, uma linha por etapa.
+
+        Útil para conferir se os índices criados pelas migrações estão sendo usados.
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [linha[3] for linha in cursor.fetchall()]
+        except Exception as e:
+            log_consulta.error("Erro ao obter plano da consulta: %s", e)
+            return []
+
+    def instrumentar(self, limite_lento: Optional[float] = 0.2, passos_progresso: Optional[int] = 1000):
+        """
+        Liga a medição de tempo, chamadas e linhas dos métodos públicos e dos comandos SQL
+        desta instância (desligada por padrão). Consultas mais lentas que limite_lento têm
+        o EXPLAIN QUERY PLAN registrado no log.
+
+        Args:
+            limite_lento: Segundos a partir dos quais uma consulta é considerada lenta (None desliga)
+            passos_progresso: Intervalo do progress handler que conta as instruções da VM (None desliga)
+
+        Returns:
+            Instrumentacao: Use relatorio(), prometheus() ou gravar_prometheus(caminho);
+                            remover() desliga a medição
+        """
+        from banco.instrumentacao import Instrumentacao
+
+        if self.instrumentacao is None:
+            self.instrumentacao = Instrumentacao(limite_lento, passos_progresso).instalar(self)
+        return self.instrumentacao
+
+    @contextlib.contextmanager
+    def cancelavel(self, cancelamento: threading.Event, passos: int = 1000):
+        """
+        Permite interromper as consultas da thread atual durante o bloco.
+
+        Instala na conexão da thread um progress handler que, a cada `passos` instruções
+        da VM do SQLite, aborta o comando em andamento se `cancelamento` foi sinalizado
+        (de qualquer thread). A interrupção chega como RelatorioCancelado.
+
+        Args:
+            cancelamento: Event que, sinalizado, cancela as consultas
+            passos: Intervalo, em instruções da VM, entre as verificações
+
+        Raises:
+            RelatorioCancelado: cancelamento sinalizado durante uma consulta do bloco
+        """
+        conn = self.conn
+        # O SQLite tem um progress handler por conexão: com a instrumentação ligada, o dela
+        # continua contando os passos pelo mesmo handler e é reinstalado no fim
+        instrumentacao = self.instrumentacao if self.instrumentacao and self.instrumentacao.passos_progresso else None
+        contar = instrumentacao._ao_progredir if instrumentacao else None
+        if instrumentacao:
+            passos = instrumentacao.passos_progresso
+
+        def verificar():
+            if contar:
+                contar()
+            return 1 if cancelamento.is_set() else 0
+
+        conn.set_progress_handler(verificar, passos)
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if cancelamento.is_set():
+                raise RelatorioCancelado(str(e)) from e
+            raise
+        finally:
+            conn.set_progress_handler(contar, passos if contar else 0)
+
     def fechar_conexao(self) -> None:
-        """Fecha a conexão com o banco de dados."""
+        """Fecha as conexões com o banco de dados (de todas as threads)."""
         try:
-            self.conn.close()
+            self._marcacoes_gravadas.emitir()
+            self.pool.fechar()
             logger.info("Conexão com o banco de dados fechada com sucesso")
         except Exception as e:
-            logger.error(f"Erro ao fechar conexão com o banco: {str(e)}")
+            logger.error("Erro ao fechar conexão com o banco: %s", e)
+
+    def _gerar_calendario(self, data_inicial_iso: str, data_final_iso: str) -> None:
+        """
+        (Re)gera calendario_jornada de todas as jornadas no intervalo, zerando os feriados.
+
+        Deve ser chamado dentro de uma transação.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feriados'")
+        tem_feriados = cursor.fetchone() is not None
+
+        cursor.execute(f"""
+            WITH RECURSIVE dias(data) AS (
+                SELECT date(?)
+                UNION ALL
+                SELECT date(data, '+1 day') FROM dias WHERE data < date(?)
+            )
+            INSERT OR REPLACE INTO calendario_jornada (jornada_id, data, segundos_previstos)
+            SELECT
+                j.jornada_id,
+                dias.data,
+                {"CASE WHEN EXISTS (SELECT 1 FROM feriados fe WHERE fe.data = dias.data) THEN 0 ELSE j.segundos END"
+                 if tem_feriados else "j.segundos"}
+            FROM dias
+            JOIN jornada_dia_semana j ON j.dia_semana = (CAST(strftime('%w', dias.data) AS INTEGER) + 6) % 7
+        """, (data_inicial_iso, data_final_iso))
+        self._marcar_alteracao("calendario_jornada")
+
+    def _garantir_calendario(self, data_inicial_iso: str, data_final_iso: str) -> None:
+        """Gera o calendário do intervalo se alguma jornada ainda não o tiver completo (dentro de transação)."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM jornada j
+            WHERE (SELECT COUNT(*) FROM calendario_jornada c
+                   WHERE c.jornada_id = j.id AND c.data BETWEEN ? AND ?)
+                  < julianday(?) - julianday(?) + 1
+        """, (data_inicial_iso, data_final_iso, data_final_iso, data_inicial_iso))
+        if cursor.fetchone()[0]:
+            self._gerar_calendario(data_inicial_iso, data_final_iso)
+
+    def _processar_ponto_dia_pendente(self) -> int:
+        """
+        Recalcula em ponto_dia os dias enfileirados pelos triggers da tabela ponto.
+
+        Deve ser chamado dentro de uma transação. Dias sem marcações são removidos.
+
+        Returns:
+            int: Quantidade de dias recalculados
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT MIN(data), MAX(data) FROM ponto_dia_pendente")
+        data_inicial, data_final = cursor.fetchone()
+        if data_inicial is None:
+            return 0
+        self._garantir_calendario(data_inicial, data_final)
+
+        # Dias que ficaram sem marcações saem de ponto_dia
+        cursor.execute("""
+            SELECT q.cpf, q.data FROM ponto_dia_pendente q
+            WHERE NOT EXISTS (SELECT 1 FROM ponto p
+                              WHERE p.cpf = q.cpf AND p.timestamp >= q.data AND p.timestamp < q.data || 'U')
+        """)
+        remover = cursor.fetchall()
+
+        # As marcações dos dias pendentes vão para a memória compacta (banco.ponto_compacto)
+        # e cada dia é apurado e gravado conforme a gravação pede a próxima linha.
+        # A jornada do dia é a do funcionário, senão a da empresa, senão a padrão.
+        # CROSS JOIN fixa a fila como tabela externa (o SQLite não a reordena), senão o
+        # planejador pode preferir varrer a tabela ponto inteira.
+        cursor.execute("""
+            SELECT p.cpf, p.dia_local, p.segundo_local, p.tipo, p.codigo_empresa, c.segundos_previstos
+            FROM ponto_dia_pendente q
+            CROSS JOIN ponto p ON p.cpf = q.cpf AND p.timestamp >= q.data AND p.timestamp < q.data || 'U'
+            LEFT JOIN jornada_funcionario jf ON jf.cpf = q.cpf
+            LEFT JOIN jornada_empresa je ON je.codigo_empresa = p.codigo_empresa
+            LEFT JOIN calendario_jornada c
+                   ON c.jornada_id = COALESCE(jf.jornada_id, je.jornada_id, ?) AND c.data = q.data
+            ORDER BY q.cpf, q.data, p.timestamp
+        """, (JORNADA_PADRAO_ID,))
+        ponto = PontoCompacto.carregar(cursor)
+        agora = datetime.now().isoformat()
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO ponto_dia (
+                cpf, data, codigo_empresa,
+                entrada_manha, saida_manha, entrada_tarde, saida_tarde,
+                segundos_trabalhados, segundos_jornada, segundos_extras, segundos_faltantes,
+                atualizado_em
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, ((*apuracao, agora) for apuracao in ponto.apurar()))
+        cursor.executemany("DELETE FROM ponto_dia WHERE cpf = ? AND data = ?", remover)
+        cursor.execute("DELETE FROM ponto_dia_pendente")
+        self._marcar_alteracao("ponto_dia", "ponto_dia_pendente")
+        return ponto.quantidade_dias + len(remover)
+
+    def atualizar_ponto_dia(self) -> bool:
+        """Aplica em ponto_dia as alterações pendentes da tabela ponto."""
+        try:
+            # Sem pendências não abre transação de escrita (e funciona no perfil relatorio)
+            if not self.conn.execute("SELECT EXISTS (SELECT 1 FROM ponto_dia_pendente)").fetchone()[0]:
+                return True
+            with self.transaction():
+                dias = self._processar_ponto_dia_pendente()
+            if dias:
+                log_ponto.info("Apuração diária atualizada: %s dias recalculados", dias)
+            return True
+        except Exception as e:
+            log_ponto.error("Erro ao atualizar a apuração diária (ponto_dia): %s", e)
+            return False
+
+    def recalcular_ponto_dia(self, data_inicial: Optional[str] = None, data_final: Optional[str] = None) -> bool:
+        """
+        Força o recálculo de ponto_dia no período (ex.: após corrigir marcações direto no banco).
+
+        Args:
+            data_inicial: Data inicial no formato 'DD/MM/AAAA' (opcional)
+            data_final: Data final no formato 'DD/MM/AAAA' (opcional)
+        """
+        try:
+            inicio = dia_local(datetime.strptime(data_inicial, "%d/%m/%Y").strftime("%Y-%m-%d") if data_inicial
+                               else "0001-01-01")
+            fim = dia_local(datetime.strptime(data_final, "%d/%m/%Y").strftime("%Y-%m-%d") if data_final
+                            else "9999-12-31")
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data)
+                    SELECT DISTINCT cpf, date(dia_local * 86400, 'unixepoch') FROM ponto
+                    WHERE dia_local BETWEEN ? AND ?
+                """, (inicio, fim))
+                self._marcar_alteracao("ponto_dia_pendente")
+            return self.atualizar_ponto_dia()
+        except Exception as e:
+            log_ponto.error("Erro ao recalcular a apuração diária: %s", e)
+            return False
+
+    def cadastrar_jornada(self, descricao: str, horas_por_dia_semana: Dict[int, float]) -> Optional[int]:
+        """
+        Cadastra uma jornada de trabalho.
+
+        Args:
+            descricao: Descrição da jornada (ex.: '40 horas - segunda a sexta')
+            horas_por_dia_semana: Horas previstas por dia da semana (0=Segunda, 6=Domingo);
+                                  dias ausentes ficam com zero
+
+        Returns:
+            int: ID da jornada criada, ou None em caso de erro
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("INSERT INTO jornada (descricao) VALUES (?)", (descricao,))
+                jornada_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT INTO jornada_dia_semana (jornada_id, dia_semana, segundos) VALUES (?, ?, ?)",
+                    [(jornada_id, dia, round(horas_por_dia_semana.get(dia, 0) * 3600)) for dia in range(7)]
+                )
+                self._marcar_alteracao("jornada", "jornada_dia_semana")
+            log_escrita.info("Jornada '%s' cadastrada com ID %s", descricao, jornada_id)
+            return jornada_id
+        except Exception as e:
+            log_escrita.error("Erro ao cadastrar jornada '%s': %s", descricao, e)
+            return None
+
+    def definir_jornada_funcionario(self, cpf: str, jornada_id: Optional[int]) -> bool:
+        """Define (ou remove, com jornada_id=None) a jornada própria de um funcionário."""
+        try:
+            with self.transaction() as cursor:
+                if jornada_id is None:
+                    cursor.execute("DELETE FROM jornada_funcionario WHERE cpf = ?", (cpf,))
+                else:
+                    cursor.execute("""
+                        INSERT INTO jornada_funcionario (cpf, jornada_id) VALUES (?, ?)
+                        ON CONFLICT (cpf) DO UPDATE SET jornada_id = excluded.jornada_id
+                    """, (cpf, jornada_id))
+                self._marcar_alteracao("jornada_funcionario")
+                # A apuração já gravada do funcionário passa a usar a nova jornada
+                cursor.execute("""
+                    INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data)
+                    SELECT cpf, data FROM ponto_dia WHERE cpf = ?
+                """, (cpf,))
+                self._processar_ponto_dia_pendente()
+            return True
+        except Exception as e:
+            log_escrita.error("Erro ao definir jornada do funcionário %s: %s", cpf, e)
+            return False
+
+    def definir_jornada_empresa(self, codigo_empresa: int, jornada_id: Optional[int]) -> bool:
+        """Define (ou remove, com jornada_id=None) a jornada padrão de uma empresa."""
+        try:
+            with self.transaction() as cursor:
+                if jornada_id is None:
+                    cursor.execute("DELETE FROM jornada_empresa WHERE codigo_empresa = ?", (codigo_empresa,))
+                else:
+                    cursor.execute("""
+                        INSERT INTO jornada_empresa (codigo_empresa, jornada_id) VALUES (?, ?)
+                        ON CONFLICT (codigo_empresa) DO UPDATE SET jornada_id = excluded.jornada_id
+                    """, (codigo_empresa, jornada_id))
+                self._marcar_alteracao("jornada_empresa")
+                cursor.execute("""
+                    INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data)
+                    SELECT cpf, data FROM ponto_dia WHERE codigo_empresa = ?
+                """, (codigo_empresa,))
+                self._processar_ponto_dia_pendente()
+            return True
+        except Exception as e:
+            log_escrita.error("Erro ao definir jornada da empresa %s: %s", codigo_empresa, e)
+            return False
+
+    def gerar_calendario_jornada(self, data_inicial: str, data_final: str) -> bool:
+        """
+        Regera o calendário de horas previstas do período (ex.: após cadastrar feriados)
+        e recalcula a apuração diária (ponto_dia) desses dias.
 
-    from datetime import datetime, timedelta
-    from collections import defaultdict
+        Args:
+            data_inicial: Data inicial no formato 'DD/MM/AAAA'
+            data_final: Data final no formato 'DD/MM/AAAA'
+        """
+        try:
+            inicio = datetime.strptime(data_inicial, "%d/%m/%Y").strftime("%Y-%m-%d")
+            fim = datetime.strptime(data_final, "%d/%m/%Y").strftime("%Y-%m-%d")
+            with self.transaction() as cursor:
+                self._gerar_calendario(inicio, fim)
+                cursor.execute("""
+                    INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data)
+                    SELECT cpf, data FROM ponto_dia WHERE data BETWEEN ? AND ?
+                """, (inicio, fim))
+                self._processar_ponto_dia_pendente()
+            log_ponto.info("Calendário de jornadas gerado de %s a %s", data_inicial, data_final)
+            return True
+        except Exception as e:
+            log_ponto.error("Erro ao gerar calendário de jornadas: %s", e)
+            return False
 
     def calcular_horas_extras_faltantes_por_empresa(
             self,
@@ -391,10 +1461,63 @@ class BancoSQLite:
             data_inicial,
             data_final,
             jornada_diaria=8,
-            usar_jornada_44=False
+            usar_jornada_44=False,
+            motor="materializado"
     ):
-        import datetime
-        from datetime import timedelta, datetime
+        """
+        Horas trabalhadas, extras e faltantes por funcionário/dia de uma empresa.
+
+        Lê as horas trabalhadas já materializadas em ponto_dia e calcula extras e
+        faltantes em SQL contra o calendário da jornada (do funcionário, senão da
+        empresa, senão a padrão), que já considera os feriados cadastrados.
+
+        Args:
+            empresa: Código da empresa (cadastro_funcionario.empresa)
+            data_inicial: Data inicial no formato 'DD/MM/AAAA'
+            data_final: Data final no formato 'DD/MM/AAAA' (inclusive)
+            jornada_diaria, usar_jornada_44: Obsoletos e sem efeito: a jornada vem de
+                   jornada_funcionario/jornada_empresa (cadastrar_jornada,
+                   definir_jornada_empresa); um valor diferente do padrão gera DeprecationWarning
+            motor: "materializado" (ponto_dia) ou "vetorizado" (recalcula o período
+                   a partir das marcações com NumPy; requer numpy instalado)
+
+        Returns:
+            list: Tuplas (nome, empresa, data 'YYYY-MM-DD', trabalhado, extras, faltantes) em 'HH:MM'
+        """
+        if jornada_diaria != 8 or usar_jornada_44:
+            warnings.warn(
+                "jornada_diaria e usar_jornada_44 não têm efeito: cadastre a jornada com cadastrar_jornada "
+                "e associe-a com definir_jornada_empresa/definir_jornada_funcionario",
+                DeprecationWarning, stacklevel=2
+            )
+        try:
+            blocos = self.horas_extras_faltantes_blocos(empresa, data_inicial, data_final, motor=motor)
+            registros = [linha for bloco in blocos for linha in bloco]
+            if not registros:
+                log_consulta.warning("Nenhum registro encontrado para a empresa %s entre %s e %s.",
+                                     empresa, data_inicial, data_final)
+            return registros
+
+        except Exception as e:
+            log_consulta.error("Erro ao calcular horas extras/faltantes por empresa. %s", e)
+            return []
+
+    def horas_extras_faltantes_blocos(self, empresa, data_inicial, data_final, motor="materializado",
+                                      tamanho_bloco=500):
+        """
+        Gerador de calcular_horas_extras_faltantes_por_empresa que entrega o resultado em
+        blocos (para relatórios longos fora da thread da interface, ver banco.relatorios).
+
+        Args:
+            empresa, data_inicial, data_final, motor: Ver calcular_horas_extras_faltantes_por_empresa
+            tamanho_bloco: Linhas por bloco
+
+        Yields:
+            list: Até tamanho_bloco tuplas (nome, empresa, data, trabalhado, extras, faltantes)
+
+        Raises:
+            Exception: Erros de data ou de banco não são tratados aqui
+        """
 
         def converter_data_brasileira_para_iso(data_str):
             # De 'DD/MM/AAAA' para 'AAAA-MM-DD'
@@ -404,133 +1527,114 @@ class BancoSQLite:
         data_inicial_iso = converter_data_brasileira_para_iso(data_inicial)
         data_final_iso = converter_data_brasileira_para_iso(data_final)
 
+        with self.transaction():
+            self._garantir_calendario(data_inicial_iso, data_final_iso)
+
+        if motor == "vetorizado":
+            # O motor vetorizado apura o período inteiro de uma vez; só a entrega é em blocos
+            resultado = self._calcular_horas_vetorizado(empresa, data_inicial_iso, data_final_iso)
+            for inicio in range(0, len(resultado), tamanho_bloco):
+                yield resultado[inicio:inicio + tamanho_bloco]
+            return
+
+        self.atualizar_ponto_dia()
+
+        query = """
+            SELECT
+                f.nome,
+                f.empresa,
+                d.data,
+                d.segundos_trabalhados,
+                MAX(d.segundos_trabalhados - c.segundos_previstos, 0),
+                MAX(c.segundos_previstos - d.segundos_trabalhados, 0)
+            FROM ponto_dia d
+            JOIN cadastro_funcionario f ON d.cpf = f.CPF
+            LEFT JOIN jornada_funcionario jf ON jf.cpf = d.cpf
+            LEFT JOIN jornada_empresa je ON je.codigo_empresa = d.codigo_empresa
+            JOIN calendario_jornada c
+              ON c.jornada_id = COALESCE(jf.jornada_id, je.jornada_id, ?) AND c.data = d.data
+            WHERE f.empresa = ?
+              AND d.data BETWEEN ? AND ?
+            ORDER BY f.nome, d.data, d.cpf
+        """
+        cursor = self.conn.cursor()
         try:
-            # ---------------------------------------
-            # 1. Buscar e montar lista de feriados
-            # ---------------------------------------
-            feriados = set()
-            try:
-                with self.transaction():
-                    query_feriados = """
-                        SELECT data
-                        FROM feriados
-                        WHERE data BETWEEN ? AND ?
-                    """
-                    self.cursor.execute(query_feriados, (data_inicial_iso, data_final_iso))
-                    feriados_bd = self.cursor.fetchall()
-                    feriados = {row[0] for row in feriados_bd}
-            except Exception as e:
-                logger.warning(f"Não foi possível buscar feriados. Erro: {e}")
-                feriados = set()
-
-            # ---------------------------------------
-            # 2. Definir jornadas diárias
-            # ---------------------------------------
-            jornada_por_dia_semana = {
-                0: 8,  # Segunda
-                1: 8,  # Terça
-                2: 8,  # Quarta
-                3: 8,  # Quinta
-                4: 8,  # Sexta
-                5: 4,  # Sábado
-                6: 0,  # Domingo
-            }
+            cursor.execute(query, (JORNADA_PADRAO_ID, empresa, data_inicial_iso, data_final_iso))
+            while True:
+                registros = cursor.fetchmany(tamanho_bloco)
+                if not registros:
+                    break
+                yield [
+                    (nome, emp, data_registro,
+                     formatar_horas(trabalhado), formatar_horas(extras), formatar_horas(faltantes))
+                    for nome, emp, data_registro, trabalhado, extras, faltantes in registros
+                ]
+        finally:
+            cursor.close()
+
+    def _calcular_horas_vetorizado(self, empresa, data_inicial_iso, data_final_iso):
+        """
+        Motor vetorizado de calcular_horas_extras_faltantes_por_empresa.
 
-            # ---------------------------------------
-            # 3. Buscar registros de ponto no período
-            # ---------------------------------------
-            with self.transaction():
-                query = """
-                SELECT 
-                    f.nome,
-                    f.empresa,
-                    substr(p.timestamp, 1, 10) as data_registro,
-                    substr(p.timestamp, 12, 8) as horario,
-                    p.tipo
-                FROM ponto p
-                JOIN cadastro_funcionario f ON p.cpf = f.CPF
-                WHERE f.empresa = ?
-                  AND p.timestamp BETWEEN ? AND ?
-                ORDER BY f.nome, p.timestamp
-                """
-                # Use as datas no formato ISO, condizentes com o que está gravado no BD
-                self.cursor.execute(query, (empresa, data_inicial_iso, data_final_iso))
-                registros = self.cursor.fetchall()
+        Carrega o período como vetores de inteiros e apura todos os funcionário/dia
+        de uma vez (banco.apuracao_vetorizada), com o mesmo resultado do motor materializado.
+        """
+        import numpy as np
+        from banco import apuracao_vetorizada as vet
+
+        query = """
+            SELECT
+                p.cpf,
+                p.dia_local,
+                p.segundo_local,
+                p.tipo,
+                p.codigo_empresa,
+                c.segundos_previstos
+            FROM ponto p
+            JOIN cadastro_funcionario f ON p.cpf = f.CPF
+            LEFT JOIN jornada_funcionario jf ON jf.cpf = p.cpf
+            LEFT JOIN jornada_empresa je ON je.codigo_empresa = p.codigo_empresa
+            JOIN calendario_jornada c
+              ON c.jornada_id = COALESCE(jf.jornada_id, je.jornada_id, ?) AND c.data = substr(p.timestamp, 1, 10)
+            WHERE f.empresa = ?
+              AND p.dia_local BETWEEN ? AND ?
+            ORDER BY p.cpf, p.timestamp
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(query, (JORNADA_PADRAO_ID, empresa, dia_local(data_inicial_iso), dia_local(data_final_iso)))
+        # Colunas em arrays compactos (banco.ponto_compacto), vistas pelo NumPy sem cópia
+        ponto = PontoCompacto.carregar(cursor)
 
-                if not registros:
-                    logger.warning(
-                        f"Nenhum registro encontrado para a empresa {empresa} entre {data_inicial_iso} e {data_final_iso}."
-                    )
-                    return []
-
-                # ---------------------------------------
-                # 4. Agrupar registros por funcionário e data
-                # ---------------------------------------
-                registros_por_funcionario = {}
-                for nome, emp, data_registro, horario, tipo in registros:
-                    chave = (nome, emp, data_registro)
-                    if chave not in registros_por_funcionario:
-                        registros_por_funcionario[chave] = []
-                    registros_por_funcionario[chave].append((horario, tipo))
-
-                # ---------------------------------------
-                # 5. Processar cada funcionário/dia
-                # ---------------------------------------
-                resultado_final = []
-
-                for (nome, emp, data_registro), pontos in registros_por_funcionario.items():
-                    trabalhado = timedelta()
-                    entrada = None
-
-                    # Calcular tempo total trabalhado no dia
-                    for horario, tipo in sorted(pontos):
-                        horario_dt = datetime.strptime(horario, "%H:%M:%S")
-                        if tipo == "entrada":
-                            entrada = horario_dt
-                        elif tipo == "saida" and entrada:
-                            trabalhado += (horario_dt - entrada)
-                            entrada = None
-
-                    # Dia da semana (0=Segunda, 6=Domingo)
-                    dia_semana = datetime.strptime(data_registro, "%Y-%m-%d").weekday()
-
-                    # Se for feriado, jornada do dia é 0, senão usa a do dicionário
-                    if data_registro in feriados:
-                        jornada_dia = 0
-                    else:
-                        jornada_dia = jornada_por_dia_semana[dia_semana]
+        if not len(ponto):
+            return []
 
-                    # Conversões para horas
-                    jornada_td = timedelta(hours=jornada_dia)
-                    horas_trabalhadas = trabalhado.total_seconds() / 3600.0
+        v = ponto.vetores()
+        tipos = np.where(v["marca"] & MARCA_ENTRADA, vet.TIPO_ENTRADA,
+                         np.where(v["marca"] & MARCA_SAIDA, vet.TIPO_SAIDA, vet.TIPO_OUTRO))
 
-                    if trabalhado > jornada_td:
-                        extras = trabalhado - jornada_td
-                        faltantes = timedelta()
-                    else:
-                        extras = timedelta()
-                        faltantes = jornada_td - trabalhado
-
-                    # Função de formatação "HH:MM"
-                    def formatar_horas(td):
-                        total_minutos = int(td.total_seconds() // 60)
-                        horas, minutos = divmod(total_minutos, 60)
-                        return f"{horas:02d}:{minutos:02d}"
-
-                    resultado_final.append((
-                        nome,
-                        emp,
-                        data_registro,
-                        formatar_horas(trabalhado),
-                        formatar_horas(extras),
-                        formatar_horas(faltantes)
-                    ))
-
-                return resultado_final
+        funcionario, dia, trabalhado, _, extras, faltantes = vet.apurar_periodo(
+            v["funcionario"],
+            v["dia"].astype(np.int64) + ORDINAL_EPOCA,
+            v["segundo"],
+            tipos,
+            jornadas=np.repeat(v["previsto"], v["marcacoes_dia"]),
+        )
 
-        except Exception as e:
-            logger.error(f"Erro ao calcular horas extras/faltantes por empresa. {e}")
-            return []
+        cursor.execute("SELECT CPF, nome, empresa FROM cadastro_funcionario WHERE empresa = ?", (empresa,))
+        cadastro = {cpf: (nome, emp) for cpf, nome, emp in cursor.fetchall()}
+
+        resultado = []
+        for codigo, ordinal, txt_trabalhado, txt_extras, txt_faltantes in zip(
+                funcionario.tolist(), dia.tolist(), vet.formatar_horas_vetor(trabalhado),
+                vet.formatar_horas_vetor(extras), vet.formatar_horas_vetor(faltantes)):
+            cpf = ponto.cpfs[codigo]
+            nome, emp = cadastro[cpf]
+            resultado.append((nome, emp, date.fromordinal(ordinal).isoformat(),
+                              txt_trabalhado, txt_extras, txt_faltantes, cpf))
+
+        # Mesma ordem do motor materializado: nome, data e CPF
+        resultado.sort(key=lambda linha: (linha[0], linha[2], linha[6]))
+        return [linha[:6] for linha in resultado]
 
     def visualiza_ponto(self, mes_ano):
         """
@@ -542,193 +1646,90 @@ class BancoSQLite:
           - Saída da tarde: clique mais próximo das 18:00 (tipo 'saida'); se não houver, fica "00:00:00".
         Formato esperado para mes_ano: 'MM/YYYY' (ex: '02/2025')
         """
-        try:
-            import datetime
-
-            # Extrair mês e ano e formatar o padrão da data
-            mes, ano = mes_ano.split('/')
-            mes_formatado = mes.zfill(2)
-            padrao = f'{ano}-{mes_formatado}-%'
-
-            # Buscar registros brutos
-            query = """
-                SELECT 
-                    p.id,
-                    f.cpf,
-                    f.nome,
-                    substr(p.timestamp, 1, 10) as data_registro,
-                    substr(p.timestamp, 12, 8) as horario,
-                    p.tipo
-                FROM ponto p
-                JOIN cadastro_funcionario f ON p.cpf = f.CPF
-                WHERE p.timestamp LIKE ?
-                ORDER BY f.nome, p.timestamp
-            """
-            self.cursor.execute(query, (padrao,))
-            registros_brutos = self.cursor.fetchall()
-
-            if not registros_brutos:
-                logger.warning(f"Nenhum registro de ponto encontrado para {mes_ano}.")
-                return []
+        return self.visualiza_ponto_filtro(mes_ano, "Nenhum selecionado")
 
-            # Agrupar registros por (CPF, nome, data)
-            registros_por_pessoa_dia = {}
-            for ponto_id, CPF, nome, data_registro, horario, tipo in registros_brutos:
-                chave = (CPF, nome, data_registro)
-                if chave not in registros_por_pessoa_dia:
-                    registros_por_pessoa_dia[chave] = []
-                registros_por_pessoa_dia[chave].append((horario, tipo, ponto_id))
-
-            # Função auxiliar para converter string para objeto time
-            def str_to_time(t_str):
-                return datetime.datetime.strptime(t_str, "%H:%M:%S").time()
-
-            # Função que seleciona o registro do tipo esperado cuja distância para o horário alvo seja mínima
-            def seleciona_registro(registros, target_time, expected_type):
-                candidatos = [r for r in registros if r[1] == expected_type]
-                if not candidatos:
-                    return "00:00:00"
-                return min(
-                    candidatos,
-                    key=lambda r: abs(datetime.datetime.combine(datetime.date.today(), str_to_time(r[0])) -
-                                      datetime.datetime.combine(datetime.date.today(), target_time))
-                )[0]
-
-            resultado = []
-            for (CPF, nome, data_registro), registros in registros_por_pessoa_dia.items():
-                # Separar registros em manhã e tarde com base no horário
-                registros_manha = [r for r in registros if r[0] < '13:00:00']
-                registros_tarde = [r for r in registros if r[0] >= '13:00:00']
-
-                # Seleciona os cliques mais próximos dos horários de referência
-                entrada_manha = seleciona_registro(registros_manha, datetime.time(8, 0, 0), 'entrada')
-                saida_manha = seleciona_registro(registros_manha, datetime.time(12, 0, 0), 'saida')
-                entrada_tarde = seleciona_registro(registros_tarde, datetime.time(13, 0, 0), 'entrada')
-                saida_tarde = seleciona_registro(registros_tarde, datetime.time(18, 0, 0), 'saida')
-
-                # Converter a data para o formato DD/MM/YYYY
-                if '-' in data_registro:
-                    ano_db, mes_db, dia_db = data_registro.split('-')
-                    data_formatada = f"{dia_db}/{mes_db}/{ano_db}"
-                else:
-                    data_formatada = data_registro  # Caso a data já esteja formatada
+    def visualiza_ponto_filtro(self, mes_ano, employee_id=None):
+        """
+        Visualiza os registros de ponto de funcionários para um mês/ano específico.
+        Se employee_id for "Nenhum selecionado", retorna os registros de todos os funcionários.
 
-                resultado.append((CPF, nome, data_formatada, entrada_manha, saida_manha, entrada_tarde, saida_tarde))
+        Os horários vêm da apuração materializada em ponto_dia (mesmas regras de visualiza_ponto).
 
-            # Ordenar o resultado por data e nome corretamente
-            resultado.sort(key=lambda x: (
-                datetime.datetime.strptime(x[2], '%d/%m/%Y'),  # Ordenação pela data correta
-                x[1]  # Ordenação pelo nome
-            ))
+        Formato esperado para mes_ano: 'MM/YYYY' (ex: '02/2025')
+        """
+        try:
+            resultado = [linha for bloco in self.visualiza_ponto_blocos(mes_ano, employee_id) for linha in bloco]
+            if not resultado:
+                log_consulta.warning("Nenhum registro de ponto encontrado para %s.", mes_ano)
+                return []
 
-            print(f"Encontrados {len(resultado)} registros de ponto para {mes_ano}.")
+            log_consulta.debug("Encontrados %d registros de ponto para %s.", len(resultado), mes_ano)
             return resultado
 
         except Exception as e:
-            logger.error(f"Erro ao visualizar ponto: {str(e)}")
+            log_consulta.error("Erro ao visualizar ponto: %s", e)
             return []
 
-    def visualiza_ponto_filtro(self, mes_ano, employee_id=None):
+    def visualiza_ponto_blocos(self, mes_ano, employee_id="Nenhum selecionado", tamanho_bloco=500):
         """
-        Visualiza os registros de ponto de funcionários para um mês/ano específico.
-        Se employee_id for None ou vazio, retorna os registros de todos os funcionários.
+        Gerador de visualiza_ponto_filtro que entrega o resultado em blocos (para relatórios
+        longos fora da thread da interface, ver banco.relatorios).
 
-        Formato esperado para mes_ano: 'MM/YYYY' (ex: '02/2025')
-        """
-        try:
-            import datetime
-
-            # Extrair mês e ano e formatar o padrão da data
-            mes, ano = mes_ano.split('/')
-            mes_formatado = mes.zfill(2)
-            padrao = f'{ano}-{mes_formatado}-%'
-
-            # Construir a query base
-            query = """
-                SELECT 
-                    p.id,
-                    f.cpf,
-                    f.nome,
-                    substr(p.timestamp, 1, 10) as data_registro,
-                    substr(p.timestamp, 12, 8) as horario,
-                    p.tipo
-                FROM ponto p
-                JOIN cadastro_funcionario f ON p.cpf = f.CPF
-                WHERE p.timestamp LIKE ?
-            """
-            params = [padrao]
-
-            # Adicionar filtro por funcionário se necessário
-            if employee_id != "Nenhum selecionado":
-                query += " AND f.n_folha = ?"
-                params.append(employee_id)
-
-            query += " ORDER BY f.nome, p.timestamp"
-
-            # Executar consulta
-            self.cursor.execute(query, params)
-            registros_brutos = self.cursor.fetchall()
-
-            if not registros_brutos:
-                logger.warning(f"Nenhum registro de ponto encontrado para {mes_ano}.")
-                return []
+        Args:
+            mes_ano, employee_id: Ver visualiza_ponto_filtro
+            tamanho_bloco: Linhas por bloco
 
-            # Agrupar registros por (CPF, nome, data)
-            registros_por_pessoa_dia = {}
-            for ponto_id, CPF, nome, data_registro, horario, tipo in registros_brutos:
-                chave = (CPF, nome, data_registro)
-                if chave not in registros_por_pessoa_dia:
-                    registros_por_pessoa_dia[chave] = []
-                registros_por_pessoa_dia[chave].append((horario, tipo, ponto_id))
-
-            # Função auxiliar para converter string para objeto time
-            def str_to_time(t_str):
-                return datetime.datetime.strptime(t_str, "%H:%M:%S").time()
-
-            # Função que seleciona o registro do tipo esperado cuja distância para o horário alvo seja mínima
-            def seleciona_registro(registros, target_time, expected_type):
-                candidatos = [r for r in registros if r[1] == expected_type]
-                if not candidatos:
-                    return "00:00:00"
-                return min(
-                    candidatos,
-                    key=lambda r: abs(datetime.datetime.combine(datetime.date.today(), str_to_time(r[0])) -
-                                      datetime.datetime.combine(datetime.date.today(), target_time))
-                )[0]
-
-            resultado = []
-            for (CPF, nome, data_registro), registros in registros_por_pessoa_dia.items():
-                # Separar registros em manhã e tarde com base no horário
-                registros_manha = [r for r in registros if r[0] < '13:00:00']
-                registros_tarde = [r for r in registros if r[0] >= '13:00:00']
-
-                # Seleciona os cliques mais próximos dos horários de referência
-                entrada_manha = seleciona_registro(registros_manha, datetime.time(8, 0, 0), 'entrada')
-                saida_manha = seleciona_registro(registros_manha, datetime.time(12, 0, 0), 'saida')
-                entrada_tarde = seleciona_registro(registros_tarde, datetime.time(13, 0, 0), 'entrada')
-                saida_tarde = seleciona_registro(registros_tarde, datetime.time(18, 0, 0), 'saida')
-
-                # Converter a data para o formato DD/MM/YYYY
-                if '-' in data_registro:
-                    ano_db, mes_db, dia_db = data_registro.split('-')
-                    data_formatada = f"{dia_db}/{mes_db}/{ano_db}"
-                else:
-                    data_formatada = data_registro  # Caso a data já esteja formatada
+        Yields:
+            list: Até tamanho_bloco tuplas (CPF, nome, data 'DD/MM/AAAA', entrada_manha,
+                  saida_manha, entrada_tarde, saida_tarde)
 
-                resultado.append((CPF, nome, data_formatada, entrada_manha, saida_manha, entrada_tarde, saida_tarde))
+        Raises:
+            Exception: Erros de data ou de banco não são tratados aqui
+        """
+        # Intervalo do mês em texto ISO (usa o índice de ponto_dia.data)
+        inicio_mes, inicio_proximo_mes = self._intervalo_mes(mes_ano)
+
+        self.atualizar_ponto_dia()
+
+        query = """
+            SELECT
+                f.cpf,
+                f.nome,
+                d.data,
+                d.entrada_manha,
+                d.saida_manha,
+                d.entrada_tarde,
+                d.saida_tarde
+            FROM ponto_dia d
+            JOIN cadastro_funcionario f ON d.cpf = f.CPF
+            WHERE d.data >= ? AND d.data < ?
+        """
+        params = [inicio_mes, inicio_proximo_mes]
 
-            # Ordenar o resultado por data e nome corretamente
-            resultado.sort(key=lambda x: (
-                datetime.datetime.strptime(x[2], '%d/%m/%Y'),  # Ordenação pela data correta
-                x[1]  # Ordenação pelo nome
-            ))
+        # Adicionar filtro por funcionário se necessário
+        if employee_id != "Nenhum selecionado":
+            query += " AND f.n_folha = ?"
+            params.append(employee_id)
 
-            print(f"Encontrados {len(resultado)} registros de ponto para {mes_ano}.")
-            return resultado
+        # Ordenação pela data e depois pelo nome
+        query += " ORDER BY d.data, f.nome, d.cpf"
 
-        except Exception as e:
-            logger.error(f"Erro ao visualizar ponto: {str(e)}")
-            return []
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                registros = cursor.fetchmany(tamanho_bloco)
+                if not registros:
+                    break
+                bloco = []
+                for CPF, nome, data_registro, entrada_manha, saida_manha, entrada_tarde, saida_tarde in registros:
+                    # Converter a data para o formato DD/MM/YYYY
+                    ano_db, mes_db, dia_db = data_registro.split('-')
+                    data_formatada = f"{dia_db}/{mes_db}/{ano_db}"
+                    bloco.append((CPF, nome, data_formatada, entrada_manha, saida_manha, entrada_tarde, saida_tarde))
+                yield bloco
+        finally:
+            cursor.close()
 
     def exporta_ponto_periodo(self, data_inicio, data_fim):
         """
@@ -747,103 +1748,240 @@ class BancoSQLite:
           - Ao final, acrescenta-se ":MM", onde MM são os minutos da entrada da manhã.
         """
         try:
-            import datetime
-
             # Remove espaços extras nas datas de entrada
             data_inicio = data_inicio.strip()
             data_fim = data_fim.strip()
 
             # Converte as datas de início e fim para o formato ISO (YYYY-MM-DD)
-            data_inicio_iso = datetime.datetime.strptime(data_inicio, "%d/%m/%Y").strftime("%Y-%m-%d")
-            data_fim_iso = datetime.datetime.strptime(data_fim, "%d/%m/%Y").strftime("%Y-%m-%d")
-
-            # Consulta unindo as tabelas ponto, cadastro_funcionario e cadastro_empresa
-            query = """
-                SELECT 
-                    f.n_folha,
-                    f.pis_pasep,
-                    f.CPF as cpf,
-                    substr(p.timestamp, 1, 10) as data_registro,
-                    substr(p.timestamp, 12, 8) as horario,
-                    p.tipo
-                FROM ponto p
-                JOIN cadastro_funcionario f ON p.cpf = f.CPF
-                JOIN cadastro_empresa e ON p.codigo_empresa = e.id
-                WHERE substr(p.timestamp,1,10) BETWEEN ? AND ?
-                ORDER BY f.nome, p.timestamp
-            """
-            self.cursor.execute(query, (data_inicio_iso, data_fim_iso))
-            registros_brutos = self.cursor.fetchall()
-
-            if not registros_brutos:
-                logger.warning(f"Nenhum registro de ponto encontrado para o período de {data_inicio} a {data_fim}.")
-                return []
+            data_inicio_iso = datetime.strptime(data_inicio, "%d/%m/%Y").strftime("%Y-%m-%d")
+            data_fim_iso = datetime.strptime(data_fim, "%d/%m/%Y").strftime("%Y-%m-%d")
 
-            # Agrupa os registros por (empresa_id, pis_pasep, cpf, data_registro)
-            registros_por_registro = {}
-            for n_folha, pis, cpf, data_registro, horario, tipo in registros_brutos:
-                chave = (n_folha, pis, cpf, data_registro)
-                if chave not in registros_por_registro:
-                    registros_por_registro[chave] = []
-                registros_por_registro[chave].append((horario, tipo))
-
-            # Função auxiliar para converter string em objeto time
-            def str_to_time(t_str):
-                return datetime.datetime.strptime(t_str, "%H:%M:%S").time()
-
-            # Seleciona o registro do tipo 'entrada' com horário menor que 13:00, mais próximo das 08:00
-            def seleciona_entrada(registros):
-                candidatos = [r for r in registros if r[1] == 'entrada' and r[0] < '13:00:00']
-                if not candidatos:
-                    return "00:00:00"
-                return min(
-                    candidatos,
-                    key=lambda r: abs(
-                        datetime.datetime.combine(datetime.date.today(), str_to_time(r[0])) -
-                        datetime.datetime.combine(datetime.date.today(), datetime.time(8, 0, 0))
-                    )
-                )[0]
+            self.atualizar_ponto_dia()
 
-            resultado = []
-            for (empresa_id, pis, cpf, data_registro), registros in registros_por_registro.items():
-                entrada_manha = seleciona_entrada(registros)
+            # A linha é montada e ordenada pelo SQLite (ver banco.exportacao.LayoutMinutos)
+            layout = criar_layout("minutos")
+            cursor = self.conn.cursor()
+            cursor.execute(layout.consulta(por_empresa=False), layout.parametros(data_inicio_iso, data_fim_iso, None))
+            resultado = list(layout.formatar(cursor))
 
-                # Converte a data do registro (formato "YYYY-MM-DD")
-                dt = datetime.datetime.strptime(data_registro, "%Y-%m-%d")
-                dia = dt.strftime("%d")
-                mes_ = dt.strftime("%m")
-                ano_ = dt.strftime("%Y")
+            if not resultado:
+                log_consulta.warning("Nenhum registro de ponto encontrado para o período de %s a %s.", data_inicio, data_fim)
+                return []
 
-                # Extrai os minutos da entrada da manhã
-                try:
-                    t = datetime.datetime.strptime(entrada_manha, "%H:%M:%S")
-                    minuto = t.strftime("%M")
-                except Exception:
-                    minuto = "00"
-
-                # Se o PIS estiver vazio, utiliza o CPF
-                if not pis or pis.strip() == "":
-                    pis = cpf
-
-                # Formata o código da empresa (4 dígitos) e o PIS (11 dígitos)
-                empresa_str = f"{empresa_id:04d}"
-                pis_str = pis.zfill(11)
-
-                # Monta a string de exportação:
-                # Posições 1-4: empresa, 5-15: pis, 17-18: dia, 19-20: mês, 21-24: ano e ao final ":<minutos>"
-                export_str = f"{empresa_str}{pis_str}{dia}{mes_}{ano_}:{minuto}"
-                resultado.append(export_str)
-
-            resultado.sort()  # Ordena se necessário
-            print(f"Exportação gerada para o período de {data_inicio} a {data_fim}: {len(resultado)} registros.")
+            log_consulta.info("Exportação gerada para o período de %s a %s: %d registros.",
+                              data_inicio, data_fim, len(resultado))
             return resultado
 
         except Exception as e:
-            logger.error(f"Erro ao exportar ponto para o período de {data_inicio} a {data_fim}: {str(e)}")
+            log_consulta.error("Erro ao exportar ponto para o período de %s a %s: %s", data_inicio, data_fim, e)
             return []
 
+    def exportar_ponto_arquivo(self, caminho, data_inicio, data_fim, layout="minutos", codigo_empresa=None,
+                               tamanho_bloco=5000, encoding="cp1252", perfil="relatorio"):
+        """
+        Exporta o ponto do período direto para um arquivo de largura fixa, em blocos.
+
+        As linhas chegam do SQLite já na ordem final e são gravadas conforme chegam
+        (fetchmany + writelines), então a memória usada não depende do tamanho do
+        período. O arquivo é gravado com outro nome e renomeado no fim, para que a
+        folha nunca leia uma exportação pela metade.
+
+        Args:
+            caminho: Arquivo de destino
+            data_inicio: Data inicial no formato "DD/MM/YYYY"
+            data_fim: Data final no formato "DD/MM/YYYY"
+            layout: "minutos" (o de exporta_ponto_periodo), "afd" ou "afdt" (ver banco.exportacao)
+            codigo_empresa: Exporta só esta empresa (obrigatório no AFDT)
+            tamanho_bloco: Linhas buscadas e gravadas por vez
+            encoding: Codificação do arquivo
+            perfil: Perfil de PRAGMAs usado durante a leitura (None mantém o atual)
+
+        Returns:
+            dict: linhas, bytes, segundos, linhas_por_segundo e mb_por_segundo (None em caso de erro)
+        """
+        inicio = time.perf_counter()
+        temporario = f"{caminho}.parcial"
+        try:
+            formato = criar_layout(layout)
+            if formato.exige_empresa and codigo_empresa is None:
+                raise ValueError(f"O layout '{layout}' exige codigo_empresa")
+
+            data_inicio_iso = datetime.strptime(data_inicio.strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+            data_fim_iso = datetime.strptime(data_fim.strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+            self.atualizar_ponto_dia()
+
+            empresa = None
+            if codigo_empresa is not None and self.sql.colunas("cadastro_empresa"):
+                cursor = self.conn.execute(self.sql.selecionar("cadastro_empresa", ("id",)), (codigo_empresa,))
+                linha = cursor.fetchone()
+                empresa = dict(zip((c[0].lower() for c in cursor.description), linha)) if linha else None
+            contexto = contexto_exportacao(data_inicio_iso, data_fim_iso, empresa)
+
+            linhas = 0
+            fim = formato.fim_linha
+            with self.perfil(perfil) if perfil else contextlib.nullcontext(), \
+                    open(temporario, "w", encoding=encoding, newline="", buffering=1024 * 1024) as arquivo:
+                cabecalho = formato.cabecalho(contexto)
+                if cabecalho is not None:
+                    arquivo.write(cabecalho + fim)
+
+                cursor = self.conn.cursor()
+                cursor.execute(formato.consulta(por_empresa=codigo_empresa is not None),
+                               formato.parametros(data_inicio_iso, data_fim_iso, codigo_empresa))
+                while True:
+                    bloco = cursor.fetchmany(tamanho_bloco)
+                    if not bloco:
+                        break
+                    arquivo.writelines(linha + fim for linha in formato.formatar(bloco))
+                    linhas += len(bloco)
+
+                rodape = formato.rodape(contexto)
+                if rodape is not None:
+                    arquivo.write(rodape + fim)
+            os.replace(temporario, caminho)
+
+        except Exception as e:
+            log_consulta.error("Erro ao exportar ponto (%s) para '%s': %s", layout, caminho, e)
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+            return None
+
+        decorrido = time.perf_counter() - inicio
+        tamanho = os.path.getsize(caminho)
+        estatisticas = {
+            "linhas": linhas,
+            "bytes": tamanho,
+            "segundos": round(decorrido, 3),
+            "linhas_por_segundo": round(linhas / decorrido) if decorrido else 0,
+            "mb_por_segundo": round(tamanho / 1024 / 1024 / decorrido, 1) if decorrido else 0,
+        }
+        log_consulta.info("Exportação %s de %s a %s em '%s': %d linhas em %.2f s (%d linhas/s)",
+                          layout, data_inicio, data_fim, caminho, linhas, decorrido,
+                          estatisticas["linhas_por_segundo"], extra=estatisticas)
+        return estatisticas
+
+    def exportar_colunar(self, destino, conjunto="marcacoes", formato="parquet", incremental=True,
+                         tamanho_bloco=50_000, perfil="relatorio"):
+        """
+        Exporta as marcações ou a apuração diária para Parquet, CSV ou Excel, com uma
+        partição (arquivo) por empresa e mês.
+
+        Cada partição é lida em blocos (fetchmany) e gravada com outro nome, renomeada
+        no fim; a memória usada depende de tamanho_bloco e não do período. Na exportação
+        incremental só são regravadas as partições com marcações novas, alteradas ou
+        excluídas desde a última exportação para o mesmo destino/conjunto/formato
+        (tabela exportacao_estado); a primeira exportação é sempre completa. Partições
+        que ficaram vazias têm o arquivo removido.
+
+        Args:
+            destino: Pasta de destino (ver banco.exportacao_colunar para a estrutura)
+            conjunto: "marcacoes" (ponto + cadastro) ou "resumo_diario" (ponto_dia + cadastro)
+            formato: "parquet", "csv" ou "xlsx"
+            incremental: Regrava só as partições alteradas desde a última exportação
+            tamanho_bloco: Linhas buscadas e gravadas por vez
+            perfil: Perfil de PRAGMAs usado durante a leitura (None mantém o atual)
+
+        Returns:
+            dict: particoes, linhas, bytes, segundos, linhas_por_segundo e incremental
+                  (None em caso de erro)
+        """
+        inicio = time.perf_counter()
+        try:
+            dados = criar_conjunto(conjunto)
+            gravador = classe_gravador(formato)
+            destino = os.path.abspath(destino)
+            self.atualizar_ponto_dia()
+
+            cursor = self.conn.cursor()
+            # As marcas são lidas antes dos dados: o que for gravado durante a exportação
+            # fica acima delas e entra de novo na próxima
+            marcas = cursor.execute(dados.marcas()).fetchone()
+            estado = None
+            if incremental:
+                estado = cursor.execute("""
+                    SELECT ultimo_id, marca_alteracao, marca_particao FROM exportacao_estado
+                    WHERE destino = ? AND conjunto = ? AND formato = ?
+                """, (destino, conjunto, formato)).fetchone()
+            if estado:
+                ultimo_id, marca_alteracao, marca_particao = estado
+                cursor.execute(dados.particoes_alteradas(),
+                               (ultimo_id or 0, marca_alteracao or "", marca_particao or ""))
+            else:
+                cursor.execute(dados.particoes())
+            particoes = sorted(cursor.fetchall(), key=lambda p: (p[0] is None, p[0] or 0, p[1] or ""))
+
+            consulta = dados.consulta(self.sql.colunas("cadastro_funcionario"))
+            linhas = tamanho = 0
+            with self.perfil(perfil) if perfil else contextlib.nullcontext():
+                for codigo_empresa, mes in particoes:
+                    caminho = caminho_particao(destino, conjunto, codigo_empresa, mes, gravador.extensao)
+                    gravadas, bytes_particao = self._gravar_particao(
+                        gravador, dados.colunas, consulta, dados.parametros(codigo_empresa, mes), caminho,
+                        tamanho_bloco)
+                    linhas += gravadas
+                    tamanho += bytes_particao
+
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO exportacao_estado (
+                        destino, conjunto, formato, ultimo_id, marca_alteracao, marca_particao, exportado_em
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (destino, conjunto, formato, *marcas, datetime.now().isoformat()))
+                self._marcar_alteracao("exportacao_estado")
+
+        except Exception as e:
+            log_consulta.error("Erro ao exportar %s (%s) para '%s': %s", conjunto, formato, destino, e)
+            return None
+
+        decorrido = time.perf_counter() - inicio
+        estatisticas = {
+            "particoes": len(particoes),
+            "linhas": linhas,
+            "bytes": tamanho,
+            "segundos": round(decorrido, 3),
+            "linhas_por_segundo": round(linhas / decorrido) if decorrido else 0,
+            "incremental": bool(estado),
+        }
+        log_consulta.info("Exportação %s %s%s em '%s': %d partições, %d linhas em %.2f s",
+                          conjunto, formato, " (incremental)" if estado else "", destino,
+                          len(particoes), linhas, decorrido, extra=estatisticas)
+        return estatisticas
+
+    def _gravar_particao(self, gravador, colunas, consulta, parametros, caminho, tamanho_bloco):
+        """
+        Grava uma partição de exportar_colunar em blocos.
+
+        Returns:
+            tuple: (linhas, bytes); (0, 0) se a partição está vazia (o arquivo antigo é removido)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(consulta, parametros)
+        bloco = cursor.fetchmany(tamanho_bloco)
+        if not bloco:
+            with contextlib.suppress(OSError):
+                os.remove(caminho)
+            return 0, 0
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.parcial"
+        linhas = 0
+        try:
+            arquivo = gravador(temporario, colunas)
+            try:
+                while bloco:
+                    arquivo.gravar(bloco)
+                    linhas += len(bloco)
+                    bloco = cursor.fetchmany(tamanho_bloco)
+            finally:
+                arquivo.fechar()
+            os.replace(temporario, caminho)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+            raise
+        return linhas, os.path.getsize(caminho)
+
     def salvar_alteracao_ponto(self, cpf, data, campo, valor_horario):
-        print("AAAAAAAAAAAAAAAAAAA", valor_horario)  # Depuração
         """
         Salva o ponto com o horário informado para o campo específico.
 
@@ -853,12 +1991,12 @@ class BancoSQLite:
             campo: Campo a ser atualizado (entrada, saida_almoco, retorno_almoco, saida)
             valor_horario: Horário informado pelo usuário (formato HH:MM:SS)
         """
-        print(f"Salvando: Campo={campo}, Valor={valor_horario}")
+        log_ponto.debug("Salvando: Campo=%s, Valor=%s", campo, valor_horario)
 
         try:
             # Certifique-se de que o horário está no formato correto
             if not isinstance(valor_horario, str) or ":" not in valor_horario:
-                logger.error(f"Formato de horário inválido: {valor_horario}")
+                log_ponto.error("Formato de horário inválido: %s", valor_horario)
                 return False
 
             # Converter data para o formato correto (YYYY-MM-DD)
@@ -895,19 +2033,21 @@ class BancoSQLite:
             # Usar a função que insere ou atualiza ponto com o horário original
             self.inserir_atualizar_ponto(cpf, timestamp, tipo, 3)
 
-            logger.info(
-                f"Registro salvo para CPF {cpf}, data {data_sql}, campo {campo}, hora {horario_original}, tipo {tipo}.")
+            log_ponto.info("Registro salvo para CPF %s, data %s, campo %s, hora %s, tipo %s.",
+                           cpf, data_sql, campo, horario_original, tipo)
             return True
 
         except Exception as e:
-            logger.error(f"Erro ao salvar alteração de ponto: {str(e)}")
+            log_ponto.error("Erro ao salvar alteração de ponto: %s", e)
             self.conn.rollback()
             return False
 
     def criar_tabelas_log_ponto(self):
+        # A tabela já é criada pela migração 4; mantido para compatibilidade
 
         # Criar tabela de log de alterações
-        self.cursor.execute('''
+        with self.transaction() as cursor:
+            cursor.execute('''
         CREATE TABLE IF NOT EXISTS log_alteracoes_ponto (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             data_alteracao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -920,7 +2060,6 @@ class BancoSQLite:
             usuario TEXT
         )
         ''')
-        self.conn.commit()
 
     def registrar_alteracao_ponto(self, cpf, funcionario, data, campo, valor_antigo, valor_novo, usuario="Sistema"):
         """
@@ -934,6 +2073,9 @@ class BancoSQLite:
             valor_antigo (str): Valor antes da alteração
             valor_novo (str): Valor após a alteração
             usuario (str, opcional): Usuário que fez a alteração
+
+        Chamado dentro de um self.transaction(), o registro entra na mesma transação
+        (e no mesmo commit) da alteração do ponto.
         """
         try:
             query = '''
@@ -941,14 +2083,41 @@ class BancoSQLite:
             (cpf, funcionario, data, campo_alterado, valor_antigo, valor_novo, usuario)
             VALUES (?, ?, ?, ?, ?, ?, ?)
             '''
-            self.cursor.execute(query, (cpf, funcionario, data, campo, valor_antigo, valor_novo, usuario))
-            self.conn.commit()
-            logger.info(f"Alteração registrada: {funcionario}, {data}, {campo}: {valor_antigo} -> {valor_novo}")
+            with self.transaction() as cursor:
+                cursor.execute(query, (cpf, funcionario, data, campo, valor_antigo, valor_novo, usuario))
+                self._marcar_alteracao("log_alteracoes_ponto")
+            log_ponto.info("Alteração registrada: %s, %s, %s: %s -> %s", funcionario, data, campo, valor_antigo, valor_novo)
             return True
         except Exception as e:
-            logger.error(f"Erro ao registrar alteração: {str(e)}")
+            log_ponto.error("Erro ao registrar alteração: %s", e)
             return False
 
+    def registrar_alteracoes_ponto(self, alteracoes, usuario="Sistema"):
+        """
+        Registra várias alterações de ponto numa única transação.
+
+        Args:
+            alteracoes: Tuplas (cpf, funcionario, data, campo, valor_antigo, valor_novo)
+            usuario (str, opcional): Usuário que fez as alterações
+
+        Returns:
+            int: Quantidade de alterações registradas (0 em caso de erro)
+        """
+        try:
+            linhas = [(*alteracao, usuario) for alteracao in alteracoes]
+            with self.transaction() as cursor:
+                cursor.executemany('''
+                INSERT INTO log_alteracoes_ponto
+                (cpf, funcionario, data, campo_alterado, valor_antigo, valor_novo, usuario)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', linhas)
+                self._marcar_alteracao("log_alteracoes_ponto")
+            log_ponto.info("%s alterações de ponto registradas", len(linhas))
+            return len(linhas)
+        except Exception as e:
+            log_ponto.error("Erro ao registrar alterações: %s", e)
+            return 0
+
     def visualizar_historico_alteracoes(self, cpf=None, data_inicio=None, data_fim=None):
         """
         Retorna o histórico de alterações de ponto.
@@ -979,63 +2148,61 @@ class BancoSQLite:
 
             query += " ORDER BY data_alteracao DESC"
 
-            self.cursor.execute(query, params)
-            resultados = self.cursor.fetchall()
+            cursor = self.conn.cursor()
+            cursor.execute(query, params)
+            resultados = cursor.fetchall()
 
             return resultados
 
         except Exception as e:
-            logger.error(f"Erro ao buscar histórico de alterações: {str(e)}")
+            log_consulta.error("Erro ao buscar histórico de alterações: %s", e)
             return []
 
     def visualizar_tabela(self, nome_tabela):
         """
         Obtém os dados de uma tabela específica, utilizando cache para otimizar a performance.
 
+        O cache é invalidado por qualquer escrita feita na tabela por esta classe
+        (ver banco.cache.CacheConsultas).
+
         Args:
             nome_tabela (str): Nome da tabela a ser consultada.
 
         Returns:
             list: Lista de tuplas contendo os dados da tabela.
         """
-        tempo_atual = time.time()
-
-        # Se a tabela já está no cache e ainda é válida, retorna os dados sem acessar o banco
-        if nome_tabela in self.cache and (tempo_atual - self.last_update[nome_tabela]) < self.cache_timeout:
-            print(f"🔄 Usando cache para {nome_tabela}")
-            return self.cache[nome_tabela]
+        # Se a tabela já está no cache e não foi alterada, retorna os dados sem acessar o banco
+        encontrado, dados = self.cache.obter(nome_tabela)
+        if encontrado:
+            log_consulta.debug("Usando cache para %s", nome_tabela)
+            return dados
+        versao = self.cache.versao(nome_tabela)
 
-        print(f"⚡ Consultando banco de dados para {nome_tabela}")
+        log_consulta.debug("Consultando banco de dados para %s", nome_tabela)
 
         try:
-            with self.transaction():  # Usa o gerenciador de transações
-                cursor = self.conn.cursor()
-                cursor.execute(f"SELECT * FROM {nome_tabela}")
-                dados = cursor.fetchall()
+            # Leitura: não entra na fila de escrita, roda em paralelo com as demais (WAL)
+            cursor = self.conn.cursor()
+            cursor.execute(self.sql.selecionar(nome_tabela))
+            dados = cursor.fetchall()
 
-            # Atualiza o cache
-            self.cache[nome_tabela] = dados
-            self.last_update[nome_tabela] = tempo_atual
+            # Atualiza o cache (não guarda se a tabela foi alterada durante a leitura)
+            self.cache.guardar(nome_tabela, None, dados, versao)
 
             return dados
 
-        except sqlite3.Error as e:
-            print(f"❌ Erro ao consultar a tabela {nome_tabela}: {e}")
+        except (sqlite3.Error, ValueError) as e:
+            log_consulta.error("Erro ao consultar a tabela %s: %s", nome_tabela, e)
             return None
 
     def deleta_todos_dados(self, tabela):
         try:
-            query = f"DELETE FROM {tabela};"
-            with self.transaction():
-                self.cursor.execute(query)
+            query = self.sql.excluir_todos(tabela)
+            with self.transaction() as cursor:
+                cursor.execute(query)
+                self._marcar_alteracao(tabela)
             return True
 
         except Exception as e:
-            logger.error(f"Erro ao atualizar registro : {str(e)}")
+            log_escrita.error("Erro ao atualizar registro : %s", e)
             return False
-
-db = BancoSQLite()
-dados = db.calcular_horas_extras_faltantes_por_empresa(3, "01/02/2025", "31/03/2025", True)
-
-for i in dados:
-    print(i)
@@ -0,0 +1,449 @@
+"""
+Backup, restauração e compactação do banco de ponto com o sistema em uso.
+
+Copiar o arquivo .db enquanto o sistema grava pode gerar uma cópia corrompida (o
+conteúdo recente fica no -wal, e a cópia pega páginas de momentos diferentes).
+BackupBanco usa a API de backup do SQLite (sqlite3.Connection.backup): as páginas
+são copiadas em passos de `paginas`, sem a GIL e sem trava de escrita, então a
+interface continua lendo e gravando entre um passo e outro; `pausa` espaça os passos
+quando o disco é lento (ex.: pasta de rede). A conexão de origem mantém uma
+transação de leitura aberta durante a cópia; em WAL isso não bloqueia as gravações
+do sistema e fixa o instante copiado (sem ela, cada gravação concorrente faz o
+backup recomeçar do zero e, com gravações frequentes, ele não termina nunca). Em
+compensação o -wal cresce até a cópia terminar, por isso o padrão é copiar sem pausa.
+
+Cada snapshot vira um arquivo na pasta de backups (ponto_uniconte-20250203T181500.db)
+e uma entrada em manifesto.json, com a contagem de linhas de cada tabela no instante
+copiado. O snapshot é pulado quando o banco não mudou desde o último e os mais
+antigos que `manter` são apagados. verificar_restauracao restaura um snapshot num
+arquivo temporário, roda o integrity_check e confere as contagens do manifesto.
+
+compactar devolve ao disco as páginas livres (ex.: depois de deleta_todos_dados) com
+PRAGMA incremental_vacuum em transações curtas, e roda PRAGMA optimize. Bancos novos
+já são criados com auto_vacuum=INCREMENTAL (banco.migracoes); os antigos precisam de
+um VACUUM completo, uma única vez (compactar(converter=True)).
+
+Exemplo:
+    backup = BackupBanco(db)
+    backup.iniciar(intervalo_snapshot=3600, intervalo_manutencao=6 * 3600)
+    ...
+    backup.parar()
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from banco.migracoes import aplicar_migracoes
+from banco.registro_log import obter_logger
+
+logger = obter_logger("backup")
+
+MANIFESTO = "manifesto.json"
+_SUFIXO_PARCIAL = ".parcial"
+
+# PRAGMA auto_vacuum: 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class BackupInterrompido(Exception):
+    """Backup abortado por parar() no meio da cópia."""
+
+
+def _assinatura(conn: sqlite3.Connection, caminho: Path) -> List[int]:
+    """
+    Tamanho e mtime do banco depois de um checkpoint: mudam a cada gravação confirmada.
+    Se o checkpoint não copiou o -wal inteiro (leituras em andamento), o -wal entra também.
+    """
+    _, quadros, copiados = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    arquivos = [caminho] if copiados == quadros else [caminho, Path(f"{caminho}-wal")]
+    assinatura = []
+    for arquivo in arquivos:
+        try:
+            estado = arquivo.stat()
+            assinatura += [estado.st_size, estado.st_mtime_ns]
+        except FileNotFoundError:
+            assinatura += [0, 0]
+    return assinatura
+
+
+def _contar_tabelas(conn: sqlite3.Connection) -> Dict[str, int]:
+    tabelas = [nome for nome, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {nome: conn.execute(f'SELECT COUNT(*) FROM "{nome}"').fetchone()[0] for nome in tabelas}
+
+
+def _remover_banco(caminho: Path) -> None:
+    for arquivo in (caminho, Path(f"{caminho}-wal"), Path(f"{caminho}-shm"), Path(f"{caminho}-journal")):
+        with contextlib.suppress(FileNotFoundError):
+            arquivo.unlink()
+
+
+class BackupBanco:
+    """
+    Snapshots rotativos, verificação de restauração e manutenção de um BancoSQLite.
+
+    Os métodos podem ser chamados direto (ex.: um botão "Fazer backup" numa thread da
+    interface) ou pelo serviço em segundo plano de iniciar()/parar().
+    """
+
+    def __init__(self, db, pasta: Optional[Union[str, Path]] = None, manter: int = 7,
+                 paginas: int = 256, pausa: float = 0.0):
+        """
+        Args:
+            db: BancoSQLite de origem
+            pasta: Pasta dos snapshots (padrão: backups/ ao lado do banco)
+            manter: Snapshots mantidos; os mais antigos são apagados
+            paginas: Páginas copiadas por passo do backup (256 páginas de 4 KiB = 1 MiB)
+            pausa: Segundos de espera entre os passos (0 = copiar sem pausa; o -wal
+                   cresce enquanto a cópia durar)
+        """
+        if manter < 1:
+            raise ValueError("manter deve ser pelo menos 1")
+        self.db = db
+        self.pasta = Path(pasta) if pasta else Path(db.db_path).parent / "backups"
+        self.manter = manter
+        self.paginas = paginas
+        self.pausa = pausa
+        self._trava = threading.Lock()  # um snapshot/compactação por vez
+        self._parar = threading.Event()
+        self._servico: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------ manifesto
+
+    def _ler_manifesto(self) -> List[dict]:
+        try:
+            with open(self.pasta / MANIFESTO, encoding="utf-8") as arquivo:
+                return json.load(arquivo)["snapshots"]
+        except FileNotFoundError:
+            return []
+
+    def _gravar_manifesto(self, snapshots: List[dict]) -> None:
+        temporario = self.pasta / (MANIFESTO + _SUFIXO_PARCIAL)
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({"banco": str(self.db.db_path), "snapshots": snapshots}, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.pasta / MANIFESTO)
+
+    def snapshots(self) -> List[dict]:
+        """Entradas do manifesto dos snapshots existentes, do mais antigo ao mais recente."""
+        return [entrada for entrada in self._ler_manifesto() if (self.pasta / entrada["arquivo"]).exists()]
+
+    def _entrada(self, snapshot: Optional[Union[str, Path]]) -> dict:
+        snapshots = self.snapshots()
+        if not snapshots:
+            raise FileNotFoundError(f"Nenhum snapshot em {self.pasta}")
+        if snapshot is None:
+            return snapshots[-1]
+        nome = Path(snapshot).name
+        for entrada in snapshots:
+            if entrada["arquivo"] == nome:
+                return entrada
+        raise FileNotFoundError(f"Snapshot não encontrado no manifesto: {nome}")
+
+    # ------------------------------------------------------------------ snapshot
+
+    def _copiar(self, origem: sqlite3.Connection, destino: sqlite3.Connection, pausa: float,
+                interromper: bool = True) -> int:
+        """Backup de origem para destino em passos; devolve o total de páginas."""
+        total = [0]
+
+        def progresso(status, restantes, paginas):
+            total[0] = paginas
+            if interromper and self._parar.is_set():
+                raise BackupInterrompido("backup interrompido")
+            if pausa and restantes:
+                time.sleep(pausa)
+
+        origem.backup(destino, pages=self.paginas, progress=progresso)
+        return total[0]
+
+    def snapshot(self, forcar: bool = False) -> Optional[dict]:
+        """
+        Copia o banco para um snapshot novo, sem parar o sistema.
+
+        Args:
+            forcar: Copia mesmo que o banco não tenha mudado desde o último snapshot
+
+        Returns:
+            dict: Entrada do manifesto (arquivo, criado_em, paginas, bytes, segundos,
+                  versao_esquema, tabelas), ou None se o banco não mudou
+
+        Raises:
+            BackupInterrompido: parar() chamado durante a cópia
+        """
+        with self._trava:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            snapshots = self.snapshots()
+            assinatura = _assinatura(self.db.conn, Path(self.db.db_path))
+            if not forcar and snapshots and snapshots[-1]["assinatura"] == assinatura:
+                logger.debug("Banco sem alterações desde %s; snapshot pulado", snapshots[-1]["arquivo"])
+                return None
+
+            agora = datetime.now()
+            nome = f"{Path(self.db.db_path).stem}-{agora:%Y%m%dT%H%M%S}.db"
+            existentes = {entrada["arquivo"] for entrada in snapshots}
+            sequencia = 1
+            while nome in existentes or (self.pasta / nome).exists():
+                sequencia += 1
+                nome = f"{Path(self.db.db_path).stem}-{agora:%Y%m%dT%H%M%S}-{sequencia}.db"
+            parcial = self.pasta / (nome + _SUFIXO_PARCIAL)
+            _remover_banco(parcial)
+
+            inicio = time.perf_counter()
+            origem = sqlite3.connect(self.db.db_path, timeout=self.db.pool.timeout, isolation_level=None)
+            destino = sqlite3.connect(parcial, isolation_level=None)
+            try:
+                # Transação de leitura durante toda a cópia: fixa o instante copiado
+                origem.execute("BEGIN")
+                versao = origem.execute("PRAGMA user_version").fetchone()[0]
+                tabelas = _contar_tabelas(origem)
+                paginas = self._copiar(origem, destino, self.pausa)
+                origem.execute("COMMIT")
+                # O snapshot é um arquivo só, sem -wal ao lado
+                destino.execute("PRAGMA journal_mode = DELETE")
+            except BaseException:
+                destino.close()
+                _remover_banco(parcial)
+                raise
+            finally:
+                origem.close()
+            destino.close()
+            os.replace(parcial, self.pasta / nome)
+            segundos = time.perf_counter() - inicio
+
+            entrada = {
+                "arquivo": nome,
+                "criado_em": agora.isoformat(timespec="seconds"),
+                "paginas": paginas,
+                "bytes": (self.pasta / nome).stat().st_size,
+                "segundos": round(segundos, 3),
+                "versao_esquema": versao,
+                "tabelas": tabelas,
+                "assinatura": assinatura,
+            }
+            snapshots.append(entrada)
+            snapshots = self._rotacionar(snapshots)
+            self._gravar_manifesto(snapshots)
+            logger.info("Snapshot %s: %d páginas (%.1f MiB) em %.1f s",
+                        nome, paginas, entrada["bytes"] / 2 ** 20, segundos)
+            return entrada
+
+    def _rotacionar(self, snapshots: List[dict]) -> List[dict]:
+        """Apaga os snapshots além de `manter` (os mais antigos) e devolve os que ficaram."""
+        excedentes, mantidos = snapshots[:-self.manter], snapshots[-self.manter:]
+        for entrada in excedentes:
+            _remover_banco(self.pasta / entrada["arquivo"])
+            logger.info("Snapshot antigo removido: %s", entrada["arquivo"])
+        return mantidos
+
+    # ------------------------------------------------------------------ restauração
+
+    def verificar_restauracao(self, snapshot: Optional[Union[str, Path]] = None) -> dict:
+        """
+        Restaura um snapshot num arquivo temporário e confere o resultado.
+
+        Args:
+            snapshot: Arquivo do snapshot (padrão: o mais recente)
+
+        Returns:
+            dict: arquivo, ok, erros (lista), segundos_restauracao, segundos_verificacao
+        """
+        entrada = self._entrada(snapshot)
+        restaurado = self.pasta / f".verificacao-{entrada['arquivo']}"
+        _remover_banco(restaurado)
+        erros = []
+        try:
+            inicio = time.perf_counter()
+            origem = sqlite3.connect(f"file:{self.pasta / entrada['arquivo']}?mode=ro", uri=True)
+            destino = sqlite3.connect(restaurado)
+            try:
+                self._copiar(origem, destino, pausa=0)
+            finally:
+                origem.close()
+            restauracao = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            try:
+                integridade = [linha for linha, in destino.execute("PRAGMA integrity_check")]
+                if integridade != ["ok"]:
+                    erros += integridade
+                versao = destino.execute("PRAGMA user_version").fetchone()[0]
+                if versao != entrada["versao_esquema"]:
+                    erros.append(f"versão do esquema {versao}, esperada {entrada['versao_esquema']}")
+                contagens = _contar_tabelas(destino)
+            finally:
+                destino.close()
+            for tabela, esperado in entrada["tabelas"].items():
+                if contagens.get(tabela) != esperado:
+                    erros.append(f"{tabela}: {contagens.get(tabela)} linhas, esperadas {esperado}")
+            verificacao = time.perf_counter() - inicio
+        finally:
+            _remover_banco(restaurado)
+
+        resultado = {
+            "arquivo": entrada["arquivo"],
+            "ok": not erros,
+            "erros": erros,
+            "segundos_restauracao": round(restauracao, 3),
+            "segundos_verificacao": round(verificacao, 3),
+        }
+        if erros:
+            logger.error("Snapshot %s não passou na verificação: %s", entrada["arquivo"], "; ".join(erros[:5]))
+        else:
+            logger.info("Snapshot %s verificado: restauração %.1f s, verificação %.1f s",
+                        entrada["arquivo"], restauracao, verificacao)
+        return resultado
+
+    def restaurar(self, snapshot: Optional[Union[str, Path]] = None) -> dict:
+        """
+        Substitui o conteúdo do banco pelo de um snapshot, com o sistema aberto.
+
+        A cópia entra na fila de escrita (as gravações do sistema esperam) e, no fim,
+        as migrações pendentes são aplicadas e os caches do BancoSQLite são limpos.
+
+        Args:
+            snapshot: Arquivo do snapshot (padrão: o mais recente)
+
+        Returns:
+            dict: Entrada do manifesto do snapshot restaurado
+        """
+        entrada = self._entrada(snapshot)
+        with self._trava, self.db.pool.fila_escrita:
+            inicio = time.perf_counter()
+            origem = sqlite3.connect(f"file:{self.pasta / entrada['arquivo']}?mode=ro", uri=True)
+            try:
+                # Uma restauração pela metade deixaria o banco inconsistente: parar() não a interrompe
+                self._copiar(origem, self.db.conn, pausa=0, interromper=False)
+            finally:
+                origem.close()
+            aplicar_migracoes(self.db.conn)
+        self.db.sql.invalidar_esquema()
+        self.db.invalidar_cache()
+        logger.warning("Banco restaurado do snapshot %s em %.1f s",
+                       entrada["arquivo"], time.perf_counter() - inicio)
+        return entrada
+
+    # ------------------------------------------------------------------ manutenção
+
+    def compactar(self, paginas: int = 256, pausa: float = 0.005, converter: bool = False) -> dict:
+        """
+        Devolve as páginas livres ao disco e atualiza as estatísticas do planejador.
+
+        Cada transação libera até `paginas` páginas, para que as gravações do sistema
+        não esperem muito pela fila, e é seguida de um checkpoint nesta thread.
+
+        Args:
+            paginas: Páginas liberadas por transação
+            pausa: Segundos de espera entre as transações
+            converter: Se o banco ainda não tem auto_vacuum=INCREMENTAL, converte com
+                       um VACUUM completo (bloqueia as gravações até terminar)
+
+        Returns:
+            dict: paginas_liberadas, bytes_antes, bytes_depois, segundos, convertido
+        """
+        with self._trava:
+            conn = self.db.conn
+            caminho = Path(self.db.db_path)
+            inicio = time.perf_counter()
+            bytes_antes = caminho.stat().st_size
+            convertido = False
+            liberadas = 0
+
+            modo = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if modo != AUTO_VACUUM_INCREMENTAL and converter:
+                with self.db.pool.fila_escrita:
+                    conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+                    conn.execute("VACUUM")
+                modo, convertido = AUTO_VACUUM_INCREMENTAL, True
+                logger.warning("Banco convertido para auto_vacuum=INCREMENTAL em %.1f s", time.perf_counter() - inicio)
+            elif modo != AUTO_VACUUM_INCREMENTAL:
+                logger.info("auto_vacuum desligado no banco; páginas livres mantidas (use converter=True)")
+
+            if modo == AUTO_VACUUM_INCREMENTAL:
+                while not self._parar.is_set():
+                    livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if not livres:
+                        break
+                    with self.db.pool.fila_escrita:
+                        # execute() avança o PRAGMA um passo só (uma página); executescript vai até o fim
+                        conn.executescript(f"BEGIN IMMEDIATE; PRAGMA incremental_vacuum({paginas}); COMMIT;")
+                    # O checkpoint fica com esta thread, não com a próxima gravação do sistema
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+                    liberadas += min(livres, paginas)
+                    if pausa:
+                        time.sleep(pausa)
+
+            # optimize roda ANALYZE com a trava de escrita; analysis_limit o limita a uma amostra
+            conn.execute("PRAGMA analysis_limit = 400")
+            try:
+                conn.execute("PRAGMA optimize")
+            finally:
+                conn.execute("PRAGMA analysis_limit = 0")
+            _, quadros, copiados = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            if copiados < quadros:
+                logger.debug("Checkpoint parcial (leituras em andamento): o arquivo diminui no próximo checkpoint")
+            resultado = {
+                "paginas_liberadas": liberadas,
+                "bytes_antes": bytes_antes,
+                "bytes_depois": caminho.stat().st_size,
+                "segundos": round(time.perf_counter() - inicio, 3),
+                "convertido": convertido,
+            }
+            logger.info("Compactação: %d páginas liberadas, %.1f -> %.1f MiB em %.1f s", liberadas,
+                        bytes_antes / 2 ** 20, resultado["bytes_depois"] / 2 ** 20, resultado["segundos"])
+            return resultado
+
+    # ------------------------------------------------------------------ serviço
+
+    def iniciar(self, intervalo_snapshot: float = 3600.0, intervalo_manutencao: float = 6 * 3600.0,
+                verificar: bool = True) -> None:
+        """
+        Inicia o serviço em segundo plano: um snapshot a cada `intervalo_snapshot`
+        segundos (verificado logo depois, se `verificar`) e compactar() a cada
+        `intervalo_manutencao`. Erros são registrados no log e o serviço continua.
+        """
+        if self._servico is not None and self._servico.is_alive():
+            return
+        self._parar.clear()
+        self._servico = threading.Thread(target=self._executar_servico, name="backup-banco", daemon=True,
+                                         args=(intervalo_snapshot, intervalo_manutencao, verificar))
+        self._servico.start()
+        logger.info("Serviço de backup iniciado: snapshot a cada %.0f s, manutenção a cada %.0f s em %s",
+                    intervalo_snapshot, intervalo_manutencao, self.pasta)
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Interrompe o serviço (e um backup ou compactação em andamento) e espera a thread terminar."""
+        self._parar.set()
+        if self._servico is not None:
+            self._servico.join(timeout)
+            if self._servico.is_alive():
+                return
+            self._servico = None
+        self._parar.clear()
+
+    def _executar_servico(self, intervalo_snapshot: float, intervalo_manutencao: float, verificar: bool) -> None:
+        proximo_snapshot = time.monotonic()
+        proxima_manutencao = time.monotonic() + intervalo_manutencao
+        try:
+            while not self._parar.is_set():
+                agora = time.monotonic()
+                try:
+                    if agora >= proximo_snapshot:
+                        proximo_snapshot = agora + intervalo_snapshot
+                        if self.snapshot() is not None and verificar:
+                            self.verificar_restauracao()
+                    if agora >= proxima_manutencao:
+                        proxima_manutencao = agora + intervalo_manutencao
+                        self.compactar()
+                except BackupInterrompido:
+                    break
+                except (sqlite3.Error, OSError) as e:
+                    logger.error("Erro no serviço de backup: %s", e)
+                self._parar.wait(max(0.0, min(proximo_snapshot, proxima_manutencao) - time.monotonic()))
+        finally:
+            self.db.pool.fechar_conexao_thread()
@@ -0,0 +1,113 @@
+"""
+Cache de consultas com limite de tamanho (LRU) e invalidação por escrita.
+
+Cada tabela tem um contador de versão que o BancoSQLite incrementa depois do commit
+de qualquer escrita na tabela. Uma entrada guardada com uma versão antiga é
+descartada na próxima leitura, então o cache nunca devolve dados anteriores a uma
+escrita feita pelo próprio sistema.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class CacheConsultas:
+    """LRU de resultados de consultas, chaveado por (tabela, filtros)."""
+
+    def __init__(self, max_entradas: int = 64, max_linhas: int = 200_000, validade: Optional[float] = None):
+        """
+        Args:
+            max_entradas: Quantidade máxima de consultas guardadas
+            max_linhas: Soma máxima de linhas guardadas; resultados maiores que isso não entram no cache
+            validade: Segundos até uma entrada expirar (None = só expira por escrita ou LRU);
+                      útil quando outro processo também grava no banco
+        """
+        self.max_entradas = max_entradas
+        self.max_linhas = max_linhas
+        self.validade = validade
+        self._entradas: "OrderedDict[Tuple[str, Hashable], Tuple[int, float, Any]]" = OrderedDict()
+        self._versoes: Dict[str, int] = {}
+        self._linhas = 0
+        self._trava = threading.Lock()
+        self._estatisticas = {"acertos": 0, "falhas": 0, "descartes": 0, "invalidacoes": 0, "recusados": 0}
+
+    def versao(self, tabela: str) -> int:
+        """Versão atual da tabela (incrementada a cada escrita)."""
+        return self._versoes.get(tabela, 0)
+
+    def obter(self, tabela: str, chave: Hashable = None) -> Tuple[bool, Any]:
+        """
+        Returns:
+            tuple: (encontrado, linhas)
+        """
+        with self._trava:
+            entrada = self._entradas.get((tabela, chave))
+            if entrada is not None:
+                versao, guardado_em, linhas = entrada
+                expirou = self.validade is not None and time.monotonic() - guardado_em > self.validade
+                if versao == self._versoes.get(tabela, 0) and not expirou:
+                    self._entradas.move_to_end((tabela, chave))
+                    self._estatisticas["acertos"] += 1
+                    return True, linhas
+                self._remover((tabela, chave))
+            self._estatisticas["falhas"] += 1
+            return False, None
+
+    def guardar(self, tabela: str, chave: Hashable, linhas: list, versao: Optional[int] = None) -> bool:
+        """
+        Guarda o resultado de uma consulta.
+
+        Args:
+            versao: Versão da tabela lida antes da consulta; se a tabela mudou durante a
+                    consulta o resultado não é guardado
+
+        Returns:
+            bool: True se o resultado entrou no cache
+        """
+        with self._trava:
+            atual = self._versoes.get(tabela, 0)
+            if (versao is not None and versao != atual) or len(linhas) > self.max_linhas:
+                self._estatisticas["recusados"] += 1
+                return False
+
+            if (tabela, chave) in self._entradas:
+                self._remover((tabela, chave))
+            self._entradas[(tabela, chave)] = (atual, time.monotonic(), linhas)
+            self._linhas += len(linhas)
+
+            while len(self._entradas) > self.max_entradas or self._linhas > self.max_linhas:
+                self._remover(next(iter(self._entradas)))
+                self._estatisticas["descartes"] += 1
+            return True
+
+    def invalidar(self, *tabelas: str) -> None:
+        """Incrementa a versão das tabelas (as entradas antigas caem na próxima leitura)."""
+        with self._trava:
+            for tabela in tabelas:
+                self._versoes[tabela] = self._versoes.get(tabela, 0) + 1
+                self._estatisticas["invalidacoes"] += 1
+            # Libera já a memória das entradas das tabelas alteradas
+            for chave in [chave for chave in self._entradas if chave[0] in tabelas]:
+                self._remover(chave)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas (as versões e estatísticas são mantidas)."""
+        with self._trava:
+            self._entradas.clear()
+            self._linhas = 0
+
+    def estatisticas(self) -> dict:
+        """Acertos, falhas, descartes (LRU), invalidações, recusados e ocupação atual."""
+        with self._trava:
+            consultas = self._estatisticas["acertos"] + self._estatisticas["falhas"]
+            return {
+                **self._estatisticas,
+                "taxa_acerto": self._estatisticas["acertos"] / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "linhas": self._linhas,
+            }
+
+    def _remover(self, chave) -> None:
+        _, _, linhas = self._entradas.pop(chave)
+        self._linhas -= len(linhas)
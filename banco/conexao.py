@@ -0,0 +1,251 @@
+"""
+Pool de conexões SQLite para acesso ao banco a partir de várias threads.
+
+Cada thread recebe a sua própria conexão (sqlite3 não permite compartilhar uma
+conexão entre threads com segurança) e o banco roda em modo WAL, então leituras
+acontecem em paralelo. As escritas passam por uma fila única (FilaEscrita), uma
+transação de cada vez, na ordem de chegada.
+"""
+import contextlib
+import logging
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+logger = logging.getLogger('SQLiteDB.conexao')
+
+# Perfis de PRAGMA por conexão. O journal_mode=WAL vale para o arquivo inteiro e é
+# aplicado sempre; os demais valem só para a conexão (thread) que aplicou o perfil.
+#   synchronous: NORMAL em WAL não corrompe o banco numa queda de energia, só pode
+#                perder as últimas transações. Nenhum perfil usa OFF: sem fsync, uma queda
+#                no meio de um checkpoint pode corromper o banco inteiro, não só a importação
+#   cache_size:  negativo = KiB de cache de páginas
+#   mmap_size:   bytes do arquivo lidos via memória mapeada
+#   query_only:  ON recusa qualquer escrita na conexão ("attempt to write a readonly
+#                database"); todo perfil define o valor, porque a troca de perfil
+#                (perfil_thread) mantém os PRAGMAs que o novo perfil não mencionar
+PERFIS = {
+    # Telas do sistema: escritas pequenas e frequentes
+    "interativo": {
+        "synchronous": "NORMAL",
+        "cache_size": -16_000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "query_only": "OFF",
+    },
+    # Importação de arquivos do relógio: cache e mmap maiores para as cargas grandes;
+    # um lote perdido numa queda é refeito reimportando o arquivo
+    "importacao": {
+        "synchronous": "NORMAL",
+        "cache_size": -128_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "query_only": "OFF",
+    },
+    # Relatórios e exportações: leituras grandes de ponto_dia/ponto, sem escrita. A
+    # apuração pendente e o estado da exportação são gravados fora do bloco do perfil
+    "relatorio": {
+        "synchronous": "NORMAL",
+        "cache_size": -64_000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "query_only": "ON",
+    },
+}
+PERFIL_PADRAO = "interativo"
+
+
+def aplicar_perfil(conn: sqlite3.Connection, perfil: str) -> None:
+    """Aplica na conexão os PRAGMAs do perfil (ver PERFIS)."""
+    try:
+        pragmas = PERFIS[perfil]
+    except KeyError:
+        raise ValueError(f"Perfil de conexão desconhecido: {perfil!r} (disponíveis: {', '.join(PERFIS)})")
+    conn.execute("PRAGMA journal_mode = WAL")
+    for pragma, valor in pragmas.items():
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+
+
+class FilaEscrita:
+    """
+    Trava de escrita justa (FIFO) e reentrante por thread.
+
+    Quem chega primeiro escreve primeiro; a mesma thread pode entrar de novo
+    (transações aninhadas) sem travar a si mesma.
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._proxima_senha = 0
+        self._senha_atendida = 0
+        self._dona: Optional[int] = None
+        self._profundidade = 0
+
+    @property
+    def profundidade(self) -> int:
+        """Nível de aninhamento da thread atual (0 quando ela não está escrevendo)."""
+        return self._profundidade if self._dona == threading.get_ident() else 0
+
+    def entrar(self) -> None:
+        eu = threading.get_ident()
+        with self._condicao:
+            if self._dona == eu:
+                self._profundidade += 1
+                return
+            senha = self._proxima_senha
+            self._proxima_senha += 1
+            while senha != self._senha_atendida or self._dona is not None:
+                self._condicao.wait()
+            self._dona = eu
+            self._profundidade = 1
+
+    def sair(self) -> None:
+        with self._condicao:
+            if self._dona != threading.get_ident():
+                raise RuntimeError("A fila de escrita foi liberada por uma thread que não a detém")
+            self._profundidade -= 1
+            if self._profundidade == 0:
+                self._dona = None
+                self._senha_atendida += 1
+                self._condicao.notify_all()
+
+    def __enter__(self):
+        self.entrar()
+        return self
+
+    def __exit__(self, *exc):
+        self.sair()
+        return False
+
+
+class _ConexaoThread:
+    """
+    Conexão de uma thread, guardada no threading.local do pool. Quando a thread
+    termina o threading.local descarta este objeto e a conexão é fechada (finalize).
+    """
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _fechar_conexao(conn: sqlite3.Connection) -> None:
+    with contextlib.suppress(sqlite3.Error):
+        conn.close()
+
+
+class PoolConexoes:
+    """Entrega uma conexão por thread e serializa as transações de escrita."""
+
+    def __init__(self, caminho: Union[str, Path], timeout: float = 30.0, perfil: str = PERFIL_PADRAO,
+                 ao_conectar: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 cached_statements: int = 512):
+        """
+        Args:
+            caminho: Arquivo do banco SQLite
+            timeout: Tempo máximo (s) de espera por um lock de outro processo
+            perfil: Perfil de PRAGMAs aplicado a cada conexão nova (ver PERFIS)
+            ao_conectar: Função chamada com cada conexão nova (funções SQL etc.)
+            cached_statements: Statements preparados mantidos por conexão (o padrão do
+                               sqlite3 é 128; o SQL dinâmico das tabelas de cadastro e
+                               os relatórios passam disso)
+        """
+        if perfil not in PERFIS:
+            raise ValueError(f"Perfil de conexão desconhecido: {perfil!r} (disponíveis: {', '.join(PERFIS)})")
+        self.caminho = str(caminho)
+        self.timeout = timeout
+        self.perfil = perfil
+        self.ao_conectar = ao_conectar
+        self.cached_statements = cached_statements
+        self.fila_escrita = FilaEscrita()
+        self._local = threading.local()
+        # Só referências fracas: a conexão de cada thread vive enquanto a thread existir
+        self._conexoes: "weakref.WeakSet[_ConexaoThread]" = weakref.WeakSet()
+        self._trava = threading.Lock()
+
+    def _nova_conexao(self) -> sqlite3.Connection:
+        # check_same_thread=False só para que fechar() possa encerrar conexões de
+        # outras threads; durante o uso cada conexão fica restrita à sua thread.
+        conn = sqlite3.connect(self.caminho, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        aplicar_perfil(conn, self.perfil)
+        if self.ao_conectar:
+            self.ao_conectar(conn)
+        return conn
+
+    def conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (criada no primeiro uso)."""
+        registro = getattr(self._local, "registro", None)
+        if registro is None:
+            conn = self._nova_conexao()
+            registro = self._local.registro = _ConexaoThread(conn)
+            weakref.finalize(registro, _fechar_conexao, conn)
+            with self._trava:
+                self._conexoes.add(registro)
+        return registro.conn
+
+    @contextlib.contextmanager
+    def perfil_thread(self, perfil: str):
+        """Usa outro perfil na conexão da thread atual durante o bloco e depois volta ao do pool."""
+        conn = self.conexao()
+        aplicar_perfil(conn, perfil)
+        try:
+            yield conn
+        finally:
+            aplicar_perfil(conn, self.perfil)
+
+    @contextlib.contextmanager
+    def escrita(self):
+        """
+        Transação de escrita na fila única. Em transações aninhadas da mesma thread
+        só a mais externa faz commit/rollback.
+
+        Yields:
+            sqlite3.Connection: Conexão da thread atual
+        """
+        conn = self.conexao()
+        self.fila_escrita.entrar()
+        externa = self.fila_escrita.profundidade == 1
+        try:
+            if externa and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if externa:
+                conn.commit()
+        except BaseException:
+            if externa:
+                conn.rollback()
+            raise
+        finally:
+            self.fila_escrita.sair()
+
+    @property
+    def conexoes_abertas(self) -> int:
+        with self._trava:
+            return len(self._conexoes)
+
+    def listar_conexoes(self) -> list:
+        """Conexões abertas de todas as threads (ex.: para instalar callbacks)."""
+        with self._trava:
+            return [registro.conn for registro in self._conexoes]
+
+    def fechar_conexao_thread(self) -> None:
+        """Fecha a conexão da thread atual."""
+        registro = getattr(self._local, "registro", None)
+        if registro is not None:
+            self._local.registro = None
+            with self._trava:
+                self._conexoes.discard(registro)
+            registro.conn.close()
+
+    def fechar(self) -> None:
+        """Fecha as conexões de todas as threads."""
+        with self._trava:
+            conexoes = [registro.conn for registro in self._conexoes]
+            self._conexoes.clear()
+        for conn in conexoes:
+            _fechar_conexao(conn)
+        self._local = threading.local()
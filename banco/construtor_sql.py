@@ -0,0 +1,195 @@
+"""
+Montagem do SQL dinâmico das operações genéricas do BancoSQLite.
+
+Cada comando é montado uma única vez por (operação, tabela, colunas) e guardado;
+nas chamadas seguintes o mesmo texto é reaproveitado, o que também garante acerto
+no cache de statements preparados do sqlite3 (que é chaveado pelo texto do SQL).
+Tabelas e colunas são validadas contra o PRAGMA table_info (lido uma vez por
+tabela) antes de entrar no SQL, já que vêm de chaves de dicionário.
+"""
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+_IDENTIFICADOR = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Colunas de controle acrescentadas por criar_tabela
+COLUNAS_CONTROLE = ("data_cadastro", "ultima_modificacao")
+
+
+def validar_identificador(nome: str) -> str:
+    """Garante que o nome é um identificador SQL simples (letras, números e _)."""
+    if not isinstance(nome, str) or not _IDENTIFICADOR.match(nome):
+        raise ValueError(f"Identificador SQL inválido: {nome!r}")
+    return nome
+
+
+class ConstrutorSQL:
+    """SQL memorizado por (operação, tabela, colunas) e cache do esquema das tabelas."""
+
+    def __init__(self, conexao: Callable[[], sqlite3.Connection]):
+        """
+        Args:
+            conexao: Função que devolve a conexão da thread atual (lê o PRAGMA table_info)
+        """
+        self._conexao = conexao
+        self._esquema: Dict[str, Dict[str, str]] = {}  # tabela (minúsculas) -> {coluna minúscula: nome}
+        self._sql: Dict[tuple, str] = {}
+        self._trava = threading.Lock()
+
+    # ------------------------------------------------------------------ esquema
+
+    def colunas(self, tabela: str) -> Tuple[str, ...]:
+        """Colunas da tabela, na ordem do CREATE TABLE (vazio se a tabela não existe)."""
+        return tuple(self._colunas_tabela(tabela).values())
+
+    def _colunas_tabela(self, tabela: str, recarregar: bool = False) -> Dict[str, str]:
+        validar_identificador(tabela)
+        chave = tabela.lower()
+        colunas = None if recarregar else self._esquema.get(chave)
+        if colunas is None:
+            linhas = self._conexao().execute(f"PRAGMA table_info({tabela})").fetchall()
+            colunas = {linha[1].lower(): linha[1] for linha in linhas}
+            if colunas:
+                self._esquema[chave] = colunas
+        return colunas
+
+    def validar(self, tabela: str, campos: Iterable[str] = ()) -> None:
+        """
+        Confere se a tabela e as colunas existem.
+
+        Raises:
+            ValueError: Tabela ou coluna desconhecida
+        """
+        campos = tuple(campos)
+        for recarregar in (False, True):
+            # Se falhar com o esquema em cache, relê uma vez (tabela criada por fora)
+            colunas = self._colunas_tabela(tabela, recarregar)
+            desconhecidas = [c for c in campos if validar_identificador(c).lower() not in colunas]
+            if colunas and not desconhecidas:
+                return
+        if not colunas:
+            raise ValueError(f"Tabela desconhecida: {tabela!r}")
+        raise ValueError(f"Colunas desconhecidas em '{tabela}': {', '.join(desconhecidas)}")
+
+    def invalidar_esquema(self, tabela: Optional[str] = None) -> None:
+        """Esquece o esquema e o SQL memorizado da tabela (ou de todas), ex.: após DDL."""
+        with self._trava:
+            if tabela is None:
+                self._esquema.clear()
+                self._sql.clear()
+                return
+            self._esquema.pop(tabela.lower(), None)
+            for chave in [chave for chave in self._sql if chave[1].lower() == tabela.lower()]:
+                del self._sql[chave]
+
+    # ------------------------------------------------------------------ comandos
+
+    def _guardar(self, chave: tuple, sql: str) -> str:
+        with self._trava:
+            self._sql[chave] = sql
+        return sql
+
+    # Cada comando consulta primeiro o dicionário (caminho rápido); só monta e valida
+    # o SQL na primeira vez que a combinação (operação, tabela, colunas) aparece.
+
+    def criar_tabela(self, tabela: str, campos: Tuple[Tuple[str, str], ...]) -> str:
+        """CREATE TABLE IF NOT EXISTS com id, os campos informados e as colunas de controle."""
+        chave = ("criar_tabela", tabela, campos)
+        sql = self._sql.get(chave)
+        if sql is None:
+            validar_identificador(tabela)
+            for nome, _ in campos:
+                validar_identificador(nome)
+            campos_sql = ', '.join(f"{nome} {tipo}" for nome, tipo in campos)
+            sql = self._guardar(chave, f"CREATE TABLE IF NOT EXISTS {tabela} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                                       f"{campos_sql}, data_cadastro TEXT, ultima_modificacao TEXT)")
+        return sql
+
+    def selecionar(self, tabela: str, filtros: Tuple[str, ...] = ()) -> str:
+        """SELECT * com filtros de igualdade (na ordem de filtros)."""
+        chave = ("selecionar", tabela, filtros)
+        sql = self._sql.get(chave)
+        if sql is None:
+            self.validar(tabela, filtros)
+            sql = f"SELECT * FROM {tabela}"
+            if filtros:
+                sql += " WHERE " + " AND ".join(f"{campo} = ?" for campo in filtros)
+            sql = self._guardar(chave, sql)
+        return sql
+
+    def inserir(self, tabela: str, colunas: Tuple[str, ...]) -> str:
+        chave = ("inserir", tabela, colunas)
+        sql = self._sql.get(chave)
+        if sql is None:
+            self.validar(tabela, colunas)
+            sql = self._guardar(
+                chave, f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})"
+            )
+        return sql
+
+    def atualizar(self, tabela: str, colunas: Tuple[str, ...], campo_chave: str = "id") -> str:
+        """UPDATE das colunas (na ordem informada) WHERE campo_chave = ? (último parâmetro)."""
+        chave = ("atualizar", tabela, colunas, campo_chave)
+        sql = self._sql.get(chave)
+        if sql is None:
+            self.validar(tabela, (*colunas, campo_chave))
+            sql = self._guardar(
+                chave, f"UPDATE {tabela} SET {', '.join(f'{c} = ?' for c in colunas)} WHERE {campo_chave} = ?"
+            )
+        return sql
+
+    def excluir(self, tabela: str, campo_chave: str = "id") -> str:
+        chave = ("excluir", tabela, campo_chave)
+        sql = self._sql.get(chave)
+        if sql is None:
+            self.validar(tabela, (campo_chave,))
+            sql = self._guardar(chave, f"DELETE FROM {tabela} WHERE {campo_chave} = ?")
+        return sql
+
+    def excluir_todos(self, tabela: str) -> str:
+        chave = ("excluir_todos", tabela)
+        sql = self._sql.get(chave)
+        if sql is None:
+            self.validar(tabela)
+            sql = self._guardar(chave, f"DELETE FROM {tabela}")
+        return sql
+
+    def upsert(self, tabela: str, colunas: Tuple[str, ...], campo_chave: str) -> str:
+        """
+        INSERT (colunas + data_cadastro, ultima_modificacao) ... ON CONFLICT(campo_chave)
+        DO UPDATE, mantendo data_cadastro do registro existente. As colunas de controle
+        não podem estar em `colunas` (ValueError).
+        """
+        chave = ("upsert", tabela, colunas, campo_chave)
+        sql = self._sql.get(chave)
+        if sql is None:
+            controle = [c for c in colunas if c.lower() in COLUNAS_CONTROLE]
+            if controle:
+                raise ValueError(f"Colunas de controle são preenchidas pelo upsert: {', '.join(controle)}")
+            atualizar = [f"{c} = excluded.{c}" for c in colunas if c != campo_chave]
+            atualizar.append("ultima_modificacao = excluded.ultima_modificacao")
+            sql = self._guardar(chave, self.inserir(tabela, (*colunas, *COLUNAS_CONTROLE))
+                                + f" ON CONFLICT ({campo_chave}) DO UPDATE SET {', '.join(atualizar)}")
+        return sql
+
+    def pagina(self, tabela: str, chave: Tuple[str, ...], filtros: Tuple[str, ...], continuar: bool) -> str:
+        """SELECT *, chave ... [WHERE filtros AND (chave) > (?)] ORDER BY chave LIMIT ? (keyset)."""
+        memo = ("pagina", tabela, chave, filtros, continuar)
+        sql = self._sql.get(memo)
+        if sql is None:
+            self.validar(tabela, (*chave, *filtros))
+            colunas_chave = ", ".join(chave)
+            condicoes = [f"{campo} = ?" for campo in filtros]
+            if continuar:
+                condicoes.append(f"({colunas_chave}) > ({', '.join('?' for _ in chave)})")
+            sql = f"SELECT *, {colunas_chave} FROM {tabela}"
+            if condicoes:
+                sql += " WHERE " + " AND ".join(condicoes)
+            sql = self._guardar(memo, sql + f" ORDER BY {colunas_chave} LIMIT ?")
+        return sql
+
+    @property
+    def comandos_memorizados(self) -> int:
+        return len(self._sql)
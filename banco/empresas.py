@@ -0,0 +1,338 @@
+"""
+Um arquivo SQLite por empresa.
+
+RoteadorEmpresas mapeia o codigo_empresa para o seu banco (pasta/empresa_0003.db),
+aberto no primeiro uso como um BancoSQLite comum: importar, apurar, exportar,
+deleta_todos_dados ou VACUUM numa empresa não disputam a trava nem o arquivo das
+outras. Consultas que atravessam empresas podem rodar em paralelo, uma conexão por
+banco, com os resultados juntados (consultar, executar), ou numa conexão só com os
+bancos anexados por ATTACH e uma visão temporária por tabela (anexados), em que o
+SQL de sempre enxerga as empresas como uma tabela só.
+
+dividir_banco separa o banco único atual (banco/ponto_uniconte.db) nos bancos por empresa.
+"""
+import contextlib
+import heapq
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from banco.bancoSQlite import BancoSQLite
+from banco.conexao import PERFIL_PADRAO
+from banco.construtor_sql import validar_identificador
+from banco.migracoes import criar_indices_cadastro
+from banco.registro_log import obter_logger
+
+logger = obter_logger("conexao")
+log_migracao = obter_logger("migracao")
+
+PASTA_PADRAO = Path(__file__).parent / "empresas"
+_ARQUIVO = re.compile(r"^empresa_(\d+)\.db$")
+
+# Tabelas que não vão para os bancos das empresas: a fila da apuração (o ponto_dia
+# já vai pronto) e o estado da exportação incremental (o banco novo exporta tudo na
+# primeira vez)
+TABELAS_NAO_COPIADAS = {"ponto_dia_pendente", "exportacao_estado"}
+
+# Filtro de cada tabela na divisão (:empresa é o código). As demais são filtradas pela
+# coluna codigo_empresa ou empresa, senão pelo CPF (temp.cpfs_empresa), senão copiadas
+# inteiras (jornadas, calendário, feriados).
+FILTROS_DIVISAO = {
+    "cadastro_empresa": "id = :empresa",
+    "ponto_alteracoes": "ponto_id IN (SELECT id FROM main.ponto)",
+}
+
+
+class RoteadorEmpresas:
+    """
+    Bancos por empresa numa pasta.
+
+    Exemplo:
+        empresas = RoteadorEmpresas("banco/empresas")
+        empresas.banco(3).importar_afd(caminho, 3)
+        espelho = empresas.executar("visualiza_ponto", "02/2025")
+        with empresas.anexados() as conn:
+            conn.execute("SELECT codigo_empresa, COUNT(*) FROM ponto GROUP BY 1").fetchall()
+        empresas.fechar()
+    """
+
+    def __init__(self, pasta: Optional[Union[str, Path]] = None, perfil: str = PERFIL_PADRAO,
+                 processos: Optional[int] = None):
+        """
+        Args:
+            pasta: Pasta dos bancos (padrão: banco/empresas)
+            perfil: Perfil de PRAGMAs dos bancos abertos (ver BancoSQLite)
+            processos: Conexões em paralelo nas consultas entre empresas (padrão: uma por CPU)
+        """
+        self.pasta = Path(pasta) if pasta else PASTA_PADRAO
+        self.perfil = perfil
+        self.processos = processos
+        self._bancos: Dict[int, BancoSQLite] = {}
+        self._trava = threading.Lock()
+
+    def caminho(self, codigo_empresa: int) -> Path:
+        """Arquivo do banco da empresa (existindo ou não)."""
+        return self.pasta / f"empresa_{int(codigo_empresa):04d}.db"
+
+    def empresas(self) -> List[int]:
+        """Códigos das empresas que já têm banco na pasta."""
+        if not self.pasta.is_dir():
+            return []
+        codigos = (_ARQUIVO.match(nome) for nome in os.listdir(self.pasta))
+        return sorted(int(encontrado.group(1)) for encontrado in codigos if encontrado)
+
+    def banco(self, codigo_empresa: int, criar: bool = True) -> BancoSQLite:
+        """
+        BancoSQLite da empresa, aberto (e migrado) no primeiro uso.
+
+        Args:
+            codigo_empresa: Código da empresa
+            criar: Cria o banco se a empresa ainda não tiver um
+
+        Raises:
+            ValueError: A empresa não tem banco e criar é False
+        """
+        codigo_empresa = int(codigo_empresa)
+        with self._trava:
+            db = self._bancos.get(codigo_empresa)
+            if db is None:
+                caminho = self.caminho(codigo_empresa)
+                if not criar and not caminho.exists():
+                    raise ValueError(f"A empresa {codigo_empresa} não tem banco em {self.pasta}")
+                db = self._bancos[codigo_empresa] = BancoSQLite(caminho, perfil=self.perfil)
+                logger.debug("Banco da empresa %s aberto: %s", codigo_empresa, caminho)
+            return db
+
+    def _em_paralelo(self, funcao: Callable[[BancoSQLite], list], empresas: Optional[Iterable[int]]) -> List[list]:
+        """Roda funcao(db) no banco de cada empresa, em threads (cada uma com a sua conexão)."""
+        codigos = self.empresas() if empresas is None else [int(codigo) for codigo in empresas]
+        bancos = [self.banco(codigo, criar=False) for codigo in codigos]
+        if not bancos:
+            return []
+
+        def tarefa(db):
+            try:
+                return funcao(db)
+            finally:
+                db.pool.fechar_conexao_thread()
+
+        processos = min(len(bancos), self.processos or os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=processos, thread_name_prefix="empresa") as executor:
+            return list(executor.map(tarefa, bancos))
+
+    @staticmethod
+    def _juntar(resultados: List[list], chave: Optional[Callable]) -> list:
+        if chave is None:
+            return [linha for resultado in resultados for linha in resultado]
+        # Cada banco já devolve as linhas ordenadas; a junção só intercala
+        return list(heapq.merge(*resultados, key=chave))
+
+    def consultar(self, query: str, params: Union[tuple, list, dict] = (), empresas: Optional[Iterable[int]] = None,
+                  chave: Optional[Callable] = None) -> list:
+        """
+        Executa a mesma consulta no banco de cada empresa, em paralelo, e junta as linhas.
+
+        Args:
+            query: SELECT executado em cada banco
+            params: Parâmetros da consulta
+            empresas: Códigos das empresas (padrão: todas as da pasta)
+            chave: Ordem em que cada banco devolve as linhas (a do ORDER BY, ex.: com
+                   "ORDER BY data, cpf", lambda linha: (linha[1], linha[0])); as linhas são
+                   intercaladas nessa ordem. Sem chave, vêm empresa após empresa.
+
+        Returns:
+            list: Linhas de todas as empresas
+        """
+        return self._juntar(self._em_paralelo(lambda db: db.conn.execute(query, params).fetchall(), empresas), chave)
+
+    def executar(self, metodo: str, *args, empresas: Optional[Iterable[int]] = None,
+                 chave: Optional[Callable] = None, **kwargs) -> list:
+        """
+        Chama um método de BancoSQLite que devolve lista no banco de cada empresa e junta os resultados.
+
+        Ex.: executar("visualiza_ponto", "02/2025") (as linhas vêm empresa após empresa, ver consultar)
+        """
+        return self._juntar(self._em_paralelo(lambda db: getattr(db, metodo)(*args, **kwargs), empresas), chave)
+
+    @contextlib.contextmanager
+    def anexados(self, empresas: Optional[Iterable[int]] = None):
+        """
+        Conexão somente leitura com os bancos das empresas anexados (ATTACH) e, para cada
+        tabela presente em todos eles com as mesmas colunas, uma visão temporária de mesmo
+        nome que une as empresas (UNION ALL). O SQL escrito para um banco roda sobre todas.
+
+        O SQLite limita os bancos anexados (normalmente 10); acima disso use consultar().
+
+        Yields:
+            sqlite3.Connection: Conexão a ser usada só dentro do bloco
+
+        Raises:
+            ValueError: Mais empresas que o limite de ATTACH
+        """
+        codigos = self.empresas() if empresas is None else [int(codigo) for codigo in empresas]
+        conn = sqlite3.connect(":memory:", uri=True)
+        try:
+            conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, len(codigos))
+            limite = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+            if len(codigos) > limite:
+                raise ValueError(f"{len(codigos)} empresas passam do limite de {limite} bancos anexados; "
+                                 f"use RoteadorEmpresas.consultar")
+
+            colunas_por_tabela = None
+            for codigo in codigos:
+                caminho = self.caminho(codigo)
+                if not caminho.exists():
+                    raise ValueError(f"A empresa {codigo} não tem banco em {self.pasta}")
+                esquema = f"empresa_{codigo:04d}"
+                conn.execute(f"ATTACH DATABASE ? AS {esquema}", (f"{caminho.resolve().as_uri()}?mode=ro",))
+                tabelas = {
+                    nome: tuple(linha[1] for linha in conn.execute(f'PRAGMA {esquema}.table_info("{nome}")'))
+                    for (nome,) in conn.execute(f"SELECT name FROM {esquema}.sqlite_master "
+                                                f"WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+                }
+                if colunas_por_tabela is None:
+                    colunas_por_tabela = tabelas
+                else:
+                    colunas_por_tabela = {nome: colunas for nome, colunas in colunas_por_tabela.items()
+                                          if tabelas.get(nome) == colunas}
+
+            for nome, colunas in (colunas_por_tabela or {}).items():
+                lista = ", ".join(f'"{coluna}"' for coluna in colunas)
+                uniao = " UNION ALL ".join(f'SELECT {lista} FROM empresa_{codigo:04d}."{nome}"' for codigo in codigos)
+                conn.execute(f'CREATE TEMP VIEW "{nome}" AS {uniao}')
+            yield conn
+        finally:
+            conn.close()
+
+    def fechar(self) -> None:
+        """Fecha os bancos abertos."""
+        with self._trava:
+            bancos, self._bancos = list(self._bancos.values()), {}
+        for db in bancos:
+            db.fechar_conexao()
+
+
+def _filtro_divisao(tabela: str, colunas: Iterable[str]) -> Optional[str]:
+    """Condição WHERE que separa as linhas de uma empresa (None: tabela copiada inteira)."""
+    if tabela in FILTROS_DIVISAO:
+        return FILTROS_DIVISAO[tabela]
+    colunas = {coluna.lower(): coluna for coluna in colunas}
+    for nome in ("codigo_empresa", "empresa"):
+        if nome in colunas:
+            return f'"{colunas[nome]}" = :empresa'
+    if "cpf" in colunas:
+        return f'"{colunas["cpf"]}" IN (SELECT cpf FROM temp.cpfs_empresa)'
+    return None
+
+
+def dividir_banco(origem: Union[str, Path], pasta: Optional[Union[str, Path]] = None,
+                  empresas: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, int]]:
+    """
+    Separa um banco com todas as empresas num banco por empresa (ver RoteadorEmpresas).
+
+    Cada banco novo recebe o esquema atual (migrações), as tabelas de cadastro criadas
+    pela aplicação e as linhas da empresa: por codigo_empresa/empresa, pelos CPFs da
+    empresa (ex.: log_alteracoes_ponto, jornada_funcionario) ou, nas tabelas sem dono
+    (jornadas, calendário, feriados), todas. Os ids são mantidos. O banco de origem não
+    é alterado além das migrações e da apuração pendente aplicadas ao abri-lo.
+
+    Args:
+        origem: Banco único atual
+        pasta: Pasta dos bancos por empresa (padrão: banco/empresas)
+        empresas: Empresas separadas (padrão: todas as que aparecem em ponto e nos cadastros)
+
+    Returns:
+        dict: {codigo_empresa: {tabela: linhas copiadas}}
+
+    Raises:
+        FileExistsError: Alguma empresa já tem banco na pasta
+    """
+    roteador = RoteadorEmpresas(pasta, perfil="importacao")
+    banco_origem = BancoSQLite(origem, perfil="relatorio")  # migra e aplica a apuração pendente
+    try:
+        conn_origem = banco_origem.conn
+        tabelas_origem = {
+            nome: sql for nome, sql in conn_origem.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+            if nome not in TABELAS_NAO_COPIADAS
+        }
+
+        if empresas is None:
+            consultas = ["SELECT codigo_empresa FROM ponto"]
+            if "cadastro_funcionario" in tabelas_origem:
+                consultas.append("SELECT empresa FROM cadastro_funcionario")
+            if "cadastro_empresa" in tabelas_origem:
+                consultas.append("SELECT id FROM cadastro_empresa")
+            empresas = [codigo for (codigo,) in conn_origem.execute(
+                f"SELECT * FROM ({' UNION '.join(consultas)}) ORDER BY 1")
+                if codigo is not None]
+        empresas = [int(codigo) for codigo in empresas]
+
+        existentes = [str(roteador.caminho(codigo)) for codigo in empresas if roteador.caminho(codigo).exists()]
+        if existentes:
+            raise FileExistsError(f"Bancos de empresa já existem: {', '.join(existentes)}")
+
+        sem_empresa = conn_origem.execute("SELECT COUNT(*) FROM ponto WHERE codigo_empresa IS NULL").fetchone()[0]
+        if sem_empresa:
+            log_migracao.warning("%d marcações sem codigo_empresa ficam só no banco de origem", sem_empresa)
+
+        resumo = {}
+        for codigo in empresas:
+            resumo[codigo] = _copiar_empresa(roteador.banco(codigo), Path(origem), tabelas_origem, codigo)
+            log_migracao.info("Empresa %s separada em %s: %d marcações", codigo, roteador.caminho(codigo),
+                              resumo[codigo].get("ponto", 0))
+        return resumo
+    finally:
+        roteador.fechar()
+        banco_origem.fechar_conexao()
+
+
+def _copiar_empresa(db: BancoSQLite, origem: Path, tabelas_origem: Dict[str, str], codigo: int) -> Dict[str, int]:
+    """Copia para o banco `db` (novo, já migrado) as linhas da empresa `codigo` do banco `origem`."""
+    conn = db.conn
+    conn.execute("ATTACH DATABASE ? AS origem", (str(origem),))
+    try:
+        copiadas = {}
+        with db.transaction() as cursor:
+            # Tabelas da aplicação (cadastros) que as migrações não criam, com os seus índices
+            cursor.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")
+            existentes = {nome for (nome,) in cursor.fetchall()}
+            for nome, sql in tabelas_origem.items():
+                if nome not in existentes:
+                    validar_identificador(nome)
+                    cursor.execute(sql)
+                    indices = cursor.execute("SELECT sql FROM origem.sqlite_master WHERE type = 'index' "
+                                             "AND tbl_name = ? AND sql IS NOT NULL", (nome,)).fetchall()
+                    for (sql_indice,) in indices:
+                        cursor.execute(sql_indice)
+            criar_indices_cadastro(cursor)
+
+            cursor.execute("CREATE TEMP TABLE cpfs_empresa (cpf TEXT PRIMARY KEY)")
+            cursor.execute("INSERT OR IGNORE INTO temp.cpfs_empresa SELECT cpf FROM origem.ponto "
+                           "WHERE codigo_empresa = ?", (codigo,))
+            if "cadastro_funcionario" in tabelas_origem:
+                cursor.execute("INSERT OR IGNORE INTO temp.cpfs_empresa SELECT CPF FROM origem.cadastro_funcionario "
+                               "WHERE empresa = ? AND CPF IS NOT NULL", (codigo,))
+
+            # ponto antes de ponto_alteracoes (filtrada pelos ids de ponto já copiados)
+            for nome in sorted(tabelas_origem, key=lambda tabela: tabela != "ponto"):
+                colunas_origem = [linha[1] for linha in cursor.execute(f'PRAGMA origem.table_info("{nome}")')]
+                colunas_destino = {linha[1] for linha in cursor.execute(f'PRAGMA main.table_info("{nome}")')}
+                colunas = ", ".join(f'"{coluna}"' for coluna in colunas_origem if coluna in colunas_destino)
+                filtro = _filtro_divisao(nome, colunas_origem)
+                cursor.execute(f'DELETE FROM main."{nome}"')  # linhas das migrações (ex.: a jornada padrão)
+                cursor.execute(f'INSERT INTO main."{nome}" ({colunas}) SELECT {colunas} FROM origem."{nome}"'
+                               + (f" WHERE {filtro}" if filtro else ""), {"empresa": codigo})
+                copiadas[nome] = cursor.rowcount
+
+            # Os triggers de ponto enfileiraram os dias copiados, mas ponto_dia já veio pronto
+            cursor.execute("DELETE FROM ponto_dia_pendente")
+            cursor.execute("DROP TABLE temp.cpfs_empresa")
+    finally:
+        conn.execute("DETACH DATABASE origem")
+    conn.execute("ANALYZE")
+    return copiadas
@@ -0,0 +1,189 @@
+"""
+Layouts de exportação de ponto em largura fixa.
+
+Cada layout fornece a consulta (já ordenada no SQL, para que as linhas possam ser
+gravadas no arquivo conforme chegam, sem ordenar nada em memória), a formatação de
+cada linha e, se o formato exigir, cabeçalho e trailer. A gravação em si fica em
+BancoSQLite.exportar_ponto_arquivo.
+
+Layouts disponíveis (LAYOUTS):
+  minutos: empresa(4) + PIS(11) + DDMMAAAA + ":MM" da entrada da manhã, um por dia
+           trabalhado (o formato de exporta_ponto_periodo, lido pela folha)
+  afd:     registro tipo 3 do AFD no layout lido por banco.leitor_afd:
+           NSR(9) + "3" + data/hora ISO(24) + CPF(11) + CRC-16(4)
+  afdt:    AFDT (dados tratados): cabeçalho tipo 1, um registro tipo 2 por marcação
+           (NSR, data, hora, PIS, nº de série do REP, E/S, par, "O", motivo) e trailer
+"""
+import binascii
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from banco.apuracao import dia_local
+
+# PIS com 11 dígitos (zfill do Python) ou o CPF quando o PIS está vazio
+_PIS_OU_CPF = """
+    CASE WHEN length({pis}) >= 11 THEN {pis} ELSE substr('00000000000' || {pis}, -11) END
+""".format(pis="CASE WHEN trim(COALESCE(f.pis_pasep, '')) = '' THEN f.CPF ELSE f.pis_pasep END")
+
+
+class LayoutExportacao:
+    """Interface dos layouts; ver LAYOUTS."""
+
+    nome = ""
+    fim_linha = "\r\n"
+    exige_empresa = False
+
+    def consulta(self, por_empresa: bool) -> str:
+        """SELECT ordenado; parâmetros: (inicio, fim[, codigo_empresa])."""
+        raise NotImplementedError
+
+    def parametros(self, data_inicial_iso: str, data_final_iso: str, codigo_empresa: Optional[int]) -> tuple:
+        return (data_inicial_iso, data_final_iso) + ((codigo_empresa,) if codigo_empresa is not None else ())
+
+    def cabecalho(self, contexto: dict) -> Optional[str]:
+        return None
+
+    def formatar(self, linhas: Iterable[tuple]) -> Iterator[str]:
+        """Linhas do arquivo (sem o fim de linha) para um bloco de linhas da consulta."""
+        raise NotImplementedError
+
+    def rodape(self, contexto: dict) -> Optional[str]:
+        return None
+
+
+class LayoutMinutos(LayoutExportacao):
+    """Empresa + PIS + DDMMAAAA + ":MM", montado e ordenado pelo próprio SQLite."""
+
+    nome = "minutos"
+    fim_linha = "\n"
+
+    def consulta(self, por_empresa: bool) -> str:
+        # O prefixo empresa + PIS é calculado uma vez por funcionário (CTE materializada),
+        # não a cada dia; a ordem é a da linha montada (a do sort() da versão em Python)
+        return f"""
+            WITH funcionario AS MATERIALIZED (
+                SELECT f.CPF AS cpf, printf('%04d', f.n_folha) || {_PIS_OU_CPF} AS prefixo
+                FROM cadastro_funcionario f
+            )
+            SELECT f.prefixo || substr(d.data, 9, 2) || substr(d.data, 6, 2) || substr(d.data, 1, 4)
+                   || ':' || CASE WHEN d.entrada_manha IS NULL OR d.entrada_manha = '' THEN '00'
+                                  ELSE substr(d.entrada_manha, 4, 2) END AS linha
+            FROM ponto_dia d
+            JOIN funcionario f ON d.cpf = f.cpf
+            JOIN cadastro_empresa e ON d.codigo_empresa = e.id
+            WHERE d.data BETWEEN ? AND ?{" AND d.codigo_empresa = ?" if por_empresa else ""}
+            ORDER BY linha
+        """
+
+    def formatar(self, linhas):
+        return (linha for linha, in linhas)
+
+
+class LayoutAFD(LayoutExportacao):
+    """Marcações (tabela ponto) no layout do arquivo do relógio, em ordem cronológica."""
+
+    nome = "afd"
+
+    def __init__(self):
+        self._nsr = 0
+
+    def consulta(self, por_empresa: bool) -> str:
+        # Mesma ordem de (timestamp, cpf): o fuso só desempata marcações no mesmo horário local
+        return f"""
+            SELECT p.timestamp, p.cpf
+            FROM ponto p
+            WHERE p.dia_local BETWEEN ? AND ?{" AND p.codigo_empresa = ?" if por_empresa else ""}
+            ORDER BY p.dia_local, p.segundo_local, p.timestamp, p.cpf
+        """
+
+    def parametros(self, data_inicial_iso, data_final_iso, codigo_empresa):
+        return super().parametros(dia_local(data_inicial_iso), dia_local(data_final_iso), codigo_empresa)
+
+    def cabecalho(self, contexto):
+        self._nsr = 0
+        return None
+
+    def formatar(self, linhas):
+        for timestamp, cpf in linhas:
+            self._nsr += 1
+            registro = f"{self._nsr:09d}3{timestamp}{cpf[-11:]:0>11}"
+            yield f"{registro}{binascii.crc_hqx(registro.encode('ascii'), 0):04X}"
+
+
+class LayoutAFDT(LayoutExportacao):
+    """
+    AFDT: marcações tratadas por funcionário e dia, com pares entrada/saída numerados.
+    Exige a empresa (o cabeçalho identifica um único empregador).
+    """
+
+    nome = "afdt"
+    exige_empresa = True
+
+    def __init__(self):
+        self._nsr = 0
+        self._dia_funcionario = None
+        self._marcacao = 0
+
+    def consulta(self, por_empresa: bool) -> str:
+        # PIS por subconsulta: cadastros repetidos do mesmo CPF não duplicam marcações
+        return f"""
+            SELECT substr(p.timestamp, 1, 10) AS dia, p.cpf, substr(p.timestamp, 12, 5), p.tipo,
+                   COALESCE((SELECT {_PIS_OU_CPF} FROM cadastro_funcionario f WHERE f.CPF = p.cpf LIMIT 1),
+                            p.cpf)
+            FROM ponto p
+            WHERE p.dia_local BETWEEN ? AND ?{" AND p.codigo_empresa = ?" if por_empresa else ""}
+            ORDER BY p.dia_local, p.cpf, p.timestamp
+        """
+
+    def parametros(self, data_inicial_iso, data_final_iso, codigo_empresa):
+        return super().parametros(dia_local(data_inicial_iso), dia_local(data_final_iso), codigo_empresa)
+
+    def cabecalho(self, contexto):
+        self._nsr = 0
+        self._dia_funcionario = None
+        empresa = contexto.get("empresa") or {}
+        documento = "".join(c for c in str(empresa.get("cnpj") or empresa.get("cpf") or "") if c.isdigit())
+        tipo_documento = "1" if len(documento) > 11 else "2"
+        razao_social = str(empresa.get("razao_social") or empresa.get("nome") or "")
+        gerado_em = contexto["gerado_em"]
+        return (f"{0:09d}1{tipo_documento}{documento:0>14}{'':12}{razao_social[:150]:<150}"
+                f"{_ddmmaaaa(contexto['data_inicial'])}{_ddmmaaaa(contexto['data_final'])}"
+                f"{gerado_em:%d%m%Y}{gerado_em:%H%M}")
+
+    def formatar(self, linhas):
+        for dia, cpf, hora, tipo, pis in linhas:
+            if (dia, cpf) != self._dia_funcionario:
+                self._dia_funcionario, self._marcacao = (dia, cpf), 0
+            par, posicao = divmod(self._marcacao, 2)
+            self._marcacao += 1
+            entrada_saida = {"entrada": "E", "saida": "S"}.get(tipo, "E" if posicao == 0 else "S")
+            self._nsr += 1
+            yield (f"{self._nsr:09d}2{_ddmmaaaa(dia)}{hora[:2]}{hora[3:5]}{pis[-12:]:0>12}{'':17}"
+                   f"{entrada_saida}{par + 1:02d}O{'':100}")
+
+    def rodape(self, contexto):
+        return f"{999999999:09d}9"
+
+
+def _ddmmaaaa(data_iso: str) -> str:
+    return f"{data_iso[8:10]}{data_iso[5:7]}{data_iso[:4]}"
+
+
+LAYOUTS = {
+    "minutos": LayoutMinutos,
+    "afd": LayoutAFD,
+    "afdt": LayoutAFDT,
+}
+
+
+def criar_layout(nome: str) -> LayoutExportacao:
+    """Nova instância do layout (os layouts AFD/AFDT guardam o NSR da exportação em curso)."""
+    classe = LAYOUTS.get(nome)
+    if classe is None:
+        raise ValueError(f"Layout de exportação desconhecido: {nome!r} (disponíveis: {', '.join(LAYOUTS)})")
+    return classe()
+
+
+def contexto_exportacao(data_inicial_iso: str, data_final_iso: str, empresa: Optional[dict]) -> dict:
+    return {"data_inicial": data_inicial_iso, "data_final": data_final_iso, "empresa": empresa,
+            "gerado_em": datetime.now()}
@@ -0,0 +1,281 @@
+"""
+Exportação colunar (Parquet, CSV e Excel) das marcações e da apuração diária.
+
+Cada conjunto (CONJUNTOS) fornece as colunas com o tipo de cada uma, a consulta de
+uma partição (empresa + mês) e as consultas que listam as partições: todas, ou só
+as que mudaram desde as marcas da última exportação (ver a migração 5). Os
+gravadores (FORMATOS) recebem as linhas em blocos do fetchmany, então a memória
+usada depende do tamanho do bloco e não do período. A gravação em si fica em
+BancoSQLite.exportar_colunar.
+
+Estrutura no destino (partições no estilo Hive, lidas direto por pyarrow.dataset,
+DuckDB, Power BI etc.):
+
+    <destino>/<conjunto>/empresa=<código>/mes=<AAAA-MM>/dados.<formato>
+
+pyarrow e openpyxl só são importados quando o formato é usado.
+"""
+import csv
+import os
+from datetime import date
+from typing import Iterable, Optional, Sequence, Tuple
+
+from banco.apuracao import dia_local
+
+# Partição de valores nulos, como no Hive/pyarrow
+PARTICAO_NULA = "__HIVE_DEFAULT_PARTITION__"
+
+# Colunas de cadastro_funcionario levadas para os dois conjuntos (NULL se a coluna não existe)
+_CADASTRO = (("nome", "nome", "TEXT"), ("n_folha", "n_folha", "INTEGER"), ("pis_pasep", "pis_pasep", "TEXT"))
+
+
+def _cadastro(alias: str, colunas_existentes: Iterable[str]) -> Tuple[str, str]:
+    """Colunas do SELECT e o JOIN com cadastro_funcionario (sem JOIN se não há cadastro com CPF)."""
+    existentes = {coluna.lower() for coluna in colunas_existentes}
+    if "cpf" not in existentes:
+        return ", ".join(f"NULL AS {nome}" for nome, _, _ in _CADASTRO), ""
+    colunas = ", ".join(
+        f"CAST(f.{coluna} AS {tipo}) AS {nome}" if coluna in existentes else f"NULL AS {nome}"
+        for nome, coluna, tipo in _CADASTRO
+    )
+    # Um único cadastro por CPF (cadastros repetidos não duplicam linhas)
+    return colunas, (f"LEFT JOIN cadastro_funcionario f ON f.rowid = "
+                     f"(SELECT rowid FROM cadastro_funcionario WHERE CPF = {alias}.cpf LIMIT 1)")
+
+
+class ConjuntoExportacao:
+    """Interface dos conjuntos; ver CONJUNTOS."""
+
+    nome = ""
+    colunas: Tuple[Tuple[str, str], ...] = ()  # (nome, tipo): "int64", "string" ou "date32"
+
+    def consulta(self, colunas_cadastro: Sequence[str]) -> str:
+        """SELECT de uma partição; parâmetros: ver parametros."""
+        raise NotImplementedError
+
+    def parametros(self, codigo_empresa: Optional[int], mes: str) -> tuple:
+        """Parâmetros da consulta para a partição (mês 'AAAA-MM')."""
+        return codigo_empresa, mes, mes + "\x7f"
+
+    def particoes(self) -> str:
+        """(codigo_empresa, mes) de todas as partições."""
+        raise NotImplementedError
+
+    def particoes_alteradas(self) -> str:
+        """Partições alteradas; parâmetros: (ultimo_id, marca_alteracao, marca_particao)."""
+        raise NotImplementedError
+
+    def marcas(self) -> str:
+        """Marcas atuais: (ultimo_id, marca_alteracao, marca_particao)."""
+        raise NotImplementedError
+
+
+class ConjuntoMarcacoes(ConjuntoExportacao):
+    """Tabela ponto com os dados do funcionário, uma linha por marcação."""
+
+    nome = "marcacoes"
+    colunas = (
+        ("id", "int64"), ("codigo_empresa", "int64"), ("cpf", "string"), ("nome", "string"),
+        ("n_folha", "int64"), ("pis_pasep", "string"), ("data", "date32"), ("hora", "string"),
+        ("timestamp", "string"), ("tipo", "string"), ("alterado_em", "string"),
+    )
+
+    def consulta(self, colunas_cadastro):
+        colunas, join = _cadastro("p", colunas_cadastro)
+        return f"""
+            SELECT p.id, p.codigo_empresa, p.cpf, {colunas},
+                   substr(p.timestamp, 1, 10), substr(p.timestamp, 12, 8), p.timestamp, p.tipo, p.alterado_em
+            FROM ponto p
+            {join}
+            WHERE p.codigo_empresa IS ? AND p.dia_local >= ? AND p.dia_local < ?
+            ORDER BY p.dia_local, p.segundo_local, p.timestamp, p.cpf
+        """
+
+    def parametros(self, codigo_empresa, mes):
+        ano, numero = int(mes[:4]), int(mes[5:7])
+        proximo = f"{ano + 1:04d}-01" if numero == 12 else f"{ano:04d}-{numero + 1:02d}"
+        return codigo_empresa, dia_local(f"{mes}-01"), dia_local(f"{proximo}-01")
+
+    def particoes(self):
+        # Dias distintos pelo índice (dia_local, ...); o mês só é montado para cada dia
+        return """
+            SELECT DISTINCT codigo_empresa, strftime('%Y-%m', dia_local * 86400, 'unixepoch')
+            FROM (SELECT DISTINCT codigo_empresa, dia_local FROM ponto WHERE dia_local IS NOT NULL)
+        """
+
+    def particoes_alteradas(self):
+        return """
+            SELECT codigo_empresa, substr(timestamp, 1, 7) FROM ponto WHERE id > ?1
+            UNION
+            SELECT codigo_empresa, substr(timestamp, 1, 7) FROM ponto
+            WHERE alterado_em IS NOT NULL AND alterado_em > ?2
+            UNION
+            SELECT codigo_empresa, mes FROM ponto_particao_alterada WHERE alterado_em > ?3
+        """
+
+    def marcas(self):
+        return """
+            SELECT (SELECT MAX(id) FROM ponto),
+                   (SELECT MAX(alterado_em) FROM ponto WHERE alterado_em IS NOT NULL),
+                   (SELECT MAX(alterado_em) FROM ponto_particao_alterada)
+        """
+
+
+class ConjuntoResumoDiario(ConjuntoExportacao):
+    """Apuração diária (ponto_dia) com os dados do funcionário, uma linha por dia trabalhado."""
+
+    nome = "resumo_diario"
+    colunas = (
+        ("codigo_empresa", "int64"), ("cpf", "string"), ("nome", "string"), ("n_folha", "int64"),
+        ("pis_pasep", "string"), ("data", "date32"), ("entrada_manha", "string"), ("saida_manha", "string"),
+        ("entrada_tarde", "string"), ("saida_tarde", "string"), ("segundos_trabalhados", "int64"),
+        ("segundos_jornada", "int64"), ("segundos_extras", "int64"), ("segundos_faltantes", "int64"),
+        ("atualizado_em", "string"),
+    )
+
+    def consulta(self, colunas_cadastro):
+        colunas, join = _cadastro("d", colunas_cadastro)
+        return f"""
+            SELECT d.codigo_empresa, d.cpf, {colunas}, d.data,
+                   d.entrada_manha, d.saida_manha, d.entrada_tarde, d.saida_tarde,
+                   d.segundos_trabalhados, d.segundos_jornada, d.segundos_extras, d.segundos_faltantes,
+                   d.atualizado_em
+            FROM ponto_dia d
+            {join}
+            WHERE d.codigo_empresa IS ? AND d.data >= ? AND d.data < ?
+            ORDER BY d.data, d.cpf
+        """
+
+    def particoes(self):
+        return "SELECT DISTINCT codigo_empresa, substr(data, 1, 7) FROM ponto_dia"
+
+    def particoes_alteradas(self):
+        # Dias removidos de ponto_dia (todas as marcações excluídas) aparecem só em ponto_particao_alterada
+        return """
+            SELECT codigo_empresa, substr(data, 1, 7) FROM ponto_dia WHERE atualizado_em > ?2
+            UNION
+            SELECT codigo_empresa, mes FROM ponto_particao_alterada WHERE alterado_em > ?3
+        """
+
+    def marcas(self):
+        return """
+            SELECT NULL, (SELECT MAX(atualizado_em) FROM ponto_dia),
+                   (SELECT MAX(alterado_em) FROM ponto_particao_alterada)
+        """
+
+
+class GravadorParquet:
+    """Um row group por bloco (RecordBatch com o esquema fixo do conjunto), compressão zstd."""
+
+    extensao = "parquet"
+
+    def __init__(self, caminho: str, colunas: Sequence[Tuple[str, str]]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._tipos = [tipo for _, tipo in colunas]
+        self._esquema = pa.schema([(nome, getattr(pa, tipo)()) for nome, tipo in colunas])
+        self._escritor = pq.ParquetWriter(caminho, self._esquema, compression="zstd")
+
+    def gravar(self, bloco: Sequence[tuple]) -> None:
+        pa = self._pa
+        arrays = []
+        for valores, tipo, campo in zip(zip(*bloco), self._tipos, self._esquema):
+            if tipo == "date32":  # "AAAA-MM-DD" convertido pelo próprio Arrow
+                arrays.append(pa.array(valores, pa.string()).cast(campo.type))
+            else:
+                arrays.append(pa.array(valores, campo.type))
+        self._escritor.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._esquema))
+
+    def fechar(self) -> None:
+        self._escritor.close()
+
+
+class GravadorCSV:
+    """CSV em UTF-8 com cabeçalho; as datas ficam no formato ISO."""
+
+    extensao = "csv"
+
+    def __init__(self, caminho: str, colunas: Sequence[Tuple[str, str]]):
+        self._arquivo = open(caminho, "w", encoding="utf-8", newline="", buffering=1024 * 1024)
+        self._csv = csv.writer(self._arquivo)
+        self._csv.writerow(nome for nome, _ in colunas)
+
+    def gravar(self, bloco: Sequence[tuple]) -> None:
+        self._csv.writerows(bloco)
+
+    def fechar(self) -> None:
+        self._arquivo.close()
+
+
+class GravadorXLSX:
+    """
+    Pasta de trabalho do openpyxl em modo write_only (as linhas vão para um arquivo
+    temporário em vez de ficarem em memória). Passando do limite de linhas do Excel,
+    continua numa nova planilha.
+    """
+
+    extensao = "xlsx"
+    LINHAS_POR_PLANILHA = 1_048_575  # sem o cabeçalho
+
+    def __init__(self, caminho: str, colunas: Sequence[Tuple[str, str]]):
+        from openpyxl import Workbook
+
+        self._caminho = caminho
+        self._cabecalho = [nome for nome, _ in colunas]
+        self._datas = [indice for indice, (_, tipo) in enumerate(colunas) if tipo == "date32"]
+        self._pasta = Workbook(write_only=True)
+        self._planilha = None
+        self._linhas = 0
+
+    def _nova_planilha(self) -> None:
+        self._planilha = self._pasta.create_sheet(f"dados{len(self._pasta.worksheets) + 1}")
+        self._planilha.append(self._cabecalho)
+        self._linhas = 0
+
+    def gravar(self, bloco: Sequence[tuple]) -> None:
+        for linha in bloco:
+            if self._planilha is None or self._linhas == self.LINHAS_POR_PLANILHA:
+                self._nova_planilha()
+            if self._datas:
+                linha = list(linha)
+                for indice in self._datas:
+                    if linha[indice]:
+                        linha[indice] = date.fromisoformat(linha[indice])
+            self._planilha.append(linha)
+            self._linhas += 1
+
+    def fechar(self) -> None:
+        self._pasta.save(self._caminho)
+
+
+CONJUNTOS = {
+    "marcacoes": ConjuntoMarcacoes,
+    "resumo_diario": ConjuntoResumoDiario,
+}
+
+FORMATOS = {
+    "parquet": GravadorParquet,
+    "csv": GravadorCSV,
+    "xlsx": GravadorXLSX,
+}
+
+
+def criar_conjunto(nome: str) -> ConjuntoExportacao:
+    classe = CONJUNTOS.get(nome)
+    if classe is None:
+        raise ValueError(f"Conjunto de exportação desconhecido: {nome!r} (disponíveis: {', '.join(CONJUNTOS)})")
+    return classe()
+
+
+def classe_gravador(formato: str):
+    classe = FORMATOS.get(formato)
+    if classe is None:
+        raise ValueError(f"Formato de exportação desconhecido: {formato!r} (disponíveis: {', '.join(FORMATOS)})")
+    return classe
+
+
+def caminho_particao(destino: str, conjunto: str, codigo_empresa: Optional[int], mes: str, extensao: str) -> str:
+    empresa = PARTICAO_NULA if codigo_empresa is None else codigo_empresa
+    return os.path.join(destino, conjunto, f"empresa={empresa}", f"mes={mes}", f"dados.{extensao}")
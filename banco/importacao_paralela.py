@@ -0,0 +1,203 @@
+"""
+Importação de vários arquivos do relógio (AFD) em paralelo, ex.: um arquivo por REP
+por dia no fechamento do mês.
+
+Cada arquivo é lido, conferido (SHA-256) e interpretado num processo do
+ProcessPoolExecutor (ler_arquivo), que devolve só as marcações em listas paralelas
+de CPF e timestamp, com os CPFs repetidos compartilhando o mesmo objeto (o pickle
+manda cada um uma vez). O processo principal é o único que grava no banco
+(BancoSQLite.importar_arquivos), um arquivo por transação e na ordem dos caminhos,
+então o resultado é o mesmo da importação arquivo a arquivo.
+
+Um erro num arquivo (ilegível, codificação errada, processo abortado) fica registrado
+no resultado daquele arquivo e não interrompe os demais; linhas inválidas (ValueError
+de banco.leitor_afd.parse_line_rapido) são contadas e as primeiras ficam como amostra.
+"""
+import glob
+import hashlib
+import io
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from banco.leitor_afd import parse_line_rapido
+
+# Linhas inválidas guardadas por arquivo (as demais só entram na contagem)
+AMOSTRA_ERROS = 10
+
+
+class ArquivoLido:
+    """Resultado da leitura de um arquivo (ver ler_arquivo)."""
+
+    __slots__ = ("caminho", "checksum", "tamanho", "modificado_em", "lidos", "ignorados", "erros",
+                 "amostra_erros", "cpfs", "timestamps", "falha")
+
+    def __init__(self, caminho: str, falha: Optional[str] = None):
+        self.caminho = caminho
+        self.checksum = None
+        self.tamanho = 0
+        self.modificado_em = 0  # st_mtime_ns
+        self.lidos = 0  # linhas válidas
+        self.ignorados = 0  # linhas válidas que não são marcação (outro tipo de registro, sem CPF)
+        self.erros = 0  # linhas inválidas
+        self.amostra_erros: List[Tuple[int, str]] = []  # (número da linha, mensagem)
+        self.cpfs: List[str] = []
+        self.timestamps: List[str] = []
+        self.falha = falha  # arquivo não importado: motivo
+
+    def marcacoes(self, codigo_empresa: Optional[int]) -> Iterator[tuple]:
+        """Tuplas (cpf, timestamp, dia, codigo_empresa) no formato de _mesclar_lote_ponto."""
+        for cpf, timestamp in zip(self.cpfs, self.timestamps):
+            yield cpf, timestamp, timestamp[:10], codigo_empresa
+
+    def __repr__(self):
+        return (f"ArquivoLido(caminho={self.caminho!r}, marcacoes={len(self.timestamps)}, "
+                f"erros={self.erros}, falha={self.falha!r})")
+
+
+def ler_arquivo(caminho: str, tipo_registro: Optional[str] = "3", encoding: str = "ANSI") -> ArquivoLido:
+    """
+    Lê e interpreta um arquivo do relógio (executado nos processos do pool).
+
+    Nunca levanta exceção: problemas no arquivo todo vão para ArquivoLido.falha.
+
+    Args:
+        caminho: Arquivo exportado pelo relógio
+        tipo_registro: Tipo de registro que representa marcação (ver BancoSQLite.importar_afd)
+        encoding: Codificação do arquivo
+
+    Returns:
+        ArquivoLido: Checksum, contagens e as marcações do arquivo
+    """
+    resultado = ArquivoLido(caminho)
+    try:
+        with open(caminho, "rb") as arquivo:
+            info = os.fstat(arquivo.fileno())
+            dados = arquivo.read()
+        resultado.tamanho, resultado.modificado_em = info.st_size, info.st_mtime_ns
+        resultado.checksum = hashlib.sha256(dados).hexdigest()
+        interpretar_linhas(decodificar(dados, encoding), resultado, tipo_registro)
+    except (OSError, UnicodeError, LookupError) as e:
+        return ArquivoLido(caminho, falha=f"{type(e).__name__}: {e}")
+    return resultado
+
+
+def decodificar(dados: bytes, encoding: str) -> Iterator[str]:
+    """Linhas de `dados`, com as mesmas quebras de linha universais de open(..., encoding=...)."""
+    return io.TextIOWrapper(io.BytesIO(dados), encoding=encoding)
+
+
+def interpretar_linhas(linhas: Iterable[str], resultado: ArquivoLido, tipo_registro: Optional[str] = "3",
+                       primeira_linha: int = 1) -> ArquivoLido:
+    """
+    Interpreta as linhas do relógio e acumula as marcações e as contagens em `resultado`.
+
+    Args:
+        linhas: Linhas do arquivo (com ou sem a quebra de linha final)
+        resultado: ArquivoLido que recebe as marcações
+        tipo_registro: Ver ler_arquivo
+        primeira_linha: Número da primeira linha no arquivo (para a amostra de erros)
+
+    Returns:
+        ArquivoLido: O próprio `resultado`
+    """
+    cpfs = {cpf: cpf for cpf in resultado.cpfs}
+    adicionar_cpf, adicionar_timestamp = resultado.cpfs.append, resultado.timestamps.append
+    for numero, linha in enumerate(linhas, primeira_linha):
+        linha = linha.rstrip("\n")
+        if not linha or linha.isspace():
+            continue
+        try:
+            reg = parse_line_rapido(linha)
+        except ValueError as e:
+            resultado.erros += 1
+            if len(resultado.amostra_erros) < AMOSTRA_ERROS:
+                resultado.amostra_erros.append((numero, str(e)))
+            continue
+
+        resultado.lidos += 1
+        if (tipo_registro is not None and reg.registro[-1:] != tipo_registro) or not reg.codigo:
+            resultado.ignorados += 1
+            continue
+        adicionar_cpf(cpfs.setdefault(reg.codigo, reg.codigo))
+        adicionar_timestamp(reg.timestamp)
+    return resultado
+
+
+def listar_arquivos(origens: Union[str, Iterable[str]], padrao: str = "*") -> List[str]:
+    """
+    Arquivos a importar, sem repetição e em ordem.
+
+    Args:
+        origens: Arquivos, pastas (arquivos da pasta que casam com `padrao`) ou globs
+                 (ex.: "fechamento/**/*.txt")
+        padrao: Padrão dos arquivos dentro das pastas
+
+    Returns:
+        list: Caminhos absolutos, ordenados
+    """
+    if isinstance(origens, (str, os.PathLike)):
+        origens = [origens]
+
+    caminhos = set()
+    for origem in map(os.fspath, origens):
+        if os.path.isdir(origem):
+            candidatos = glob.glob(os.path.join(glob.escape(origem), padrao))
+        elif glob.has_magic(origem):
+            candidatos = glob.glob(origem, recursive=True)
+        else:
+            candidatos = [origem]  # arquivo inexistente vira falha na leitura, não some da lista
+        caminhos.update(os.path.abspath(c) for c in candidatos if not os.path.isdir(c))
+    return sorted(caminhos)
+
+
+def _submeter(executor: ProcessPoolExecutor, caminho: str, *args) -> Future:
+    try:
+        return executor.submit(ler_arquivo, caminho, *args)
+    except Exception as e:  # pool quebrado (um processo morreu): o arquivo falha, os outros seguem
+        futuro = Future()
+        futuro.set_exception(e)
+        return futuro
+
+
+def ler_arquivos(caminhos: List[str], processos: Optional[int] = None, tipo_registro: Optional[str] = "3",
+                 encoding: str = "ANSI") -> Iterator[ArquivoLido]:
+    """
+    Lê os arquivos em paralelo e gera os resultados na ordem de `caminhos`.
+
+    No máximo 2 arquivos por processo ficam lidos à espera do gravador, então a
+    memória não cresce com a quantidade de arquivos.
+
+    Args:
+        caminhos: Arquivos a ler
+        processos: Processos do pool (None = os.cpu_count(); 1 lê no próprio processo)
+        tipo_registro: Ver ler_arquivo
+        encoding: Ver ler_arquivo
+
+    Yields:
+        ArquivoLido: Um por caminho
+    """
+    processos = min(processos or os.cpu_count() or 1, len(caminhos))
+    if processos <= 1:
+        for caminho in caminhos:
+            yield ler_arquivo(caminho, tipo_registro, encoding)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=processos)
+    try:
+        restantes = iter(caminhos)
+        pendentes = deque((caminho, _submeter(executor, caminho, tipo_registro, encoding))
+                          for caminho in islice(restantes, processos * 2))
+        while pendentes:
+            caminho, futuro = pendentes.popleft()
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                resultado = ArquivoLido(caminho, falha=f"{type(e).__name__}: {e}")
+            for proximo in islice(restantes, 1):
+                pendentes.append((proximo, _submeter(executor, proximo, tipo_registro, encoding)))
+            yield resultado
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,383 @@
+"""
+Instrumentação opcional do BancoSQLite: tempo, chamadas e linhas por método e por SQL.
+
+Ligada com db.instrumentar(): os métodos públicos da instância (e transaction())
+passam a ser medidos, e cada conexão do pool ganha um trace callback (texto e
+duração de cada comando SQL) e um progress handler (passos da VM do SQLite por
+comando, uma medida de custo que não depende da carga da máquina). Comandos mais
+lentos que limite_lento têm o EXPLAIN QUERY PLAN registrado no log "metricas".
+
+A duração de um comando vai do início da execução até o próximo comando da mesma
+thread ou o fim do método medido, então inclui o fetch das linhas.
+
+Os dados saem em texto (relatorio()) ou no formato de texto do Prometheus
+(prometheus() / gravar_prometheus(), para o textfile collector do node_exporter).
+"""
+import bisect
+import contextlib
+import functools
+import inspect
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from banco.registro_log import obter_logger
+
+logger = obter_logger("metricas")
+
+# Limites (s) dos buckets dos histogramas de duração
+LIMITES_HISTOGRAMA = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r"\s+")
+_DIGITOS = bytes.maketrans(b"123456789", b"000000000")
+
+
+def normalizar_sql(sql: str) -> str:
+    """Troca literais por ? e junta espaços, para agrupar o mesmo comando com valores diferentes."""
+    return _ESPACOS.sub(" ", _LITERAIS.sub("?", sql)).strip()
+
+
+class Histograma:
+    """Contagem por faixa de duração (buckets cumulativos no estilo Prometheus)."""
+
+    def __init__(self, limites: Tuple[float, ...] = LIMITES_HISTOGRAMA):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # o último é +Inf
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(self.contagens)
+
+    def registrar(self, segundos: float) -> None:
+        self.contagens[bisect.bisect_left(self.limites, segundos)] += 1  # além do último limite: +Inf
+        self.soma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        """Estimativa do percentil p (0-100): limite superior do bucket que o contém."""
+        alvo, acumulado = self.total * p / 100, 0
+        for limite, contagem in zip((*self.limites, self.maximo), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class Metrica:
+    """Chamadas, erros, linhas e histograma de duração de um método ou comando SQL."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.linhas = 0
+        self.passos = 0
+        self.duracao = Histograma()
+
+
+class _EstadoThread(threading.local):
+    """Comando SQL em andamento e profundidade de chamadas medidas da thread."""
+
+    def __init__(self):
+        self.comando = None  # (sql, início)
+        self.passos = 0
+        self.profundidade = 0
+        self.lentos = []
+        self.explicando = False
+
+
+class Instrumentacao:
+    """Coleta as métricas de uma instância de BancoSQLite (ver BancoSQLite.instrumentar)."""
+
+    def __init__(self, limite_lento: Optional[float] = 0.2, passos_progresso: Optional[int] = 1000):
+        """
+        Args:
+            limite_lento: Segundos a partir dos quais um SELECT tem o plano registrado no log
+                          (None desliga)
+            passos_progresso: Intervalo, em instruções da VM, do progress handler que conta
+                              os passos de cada comando (None desliga)
+        """
+        self.limite_lento = limite_lento
+        self.passos_progresso = passos_progresso
+        self.metodos: Dict[str, Metrica] = {}
+        self.comandos: Dict[str, Metrica] = {}
+        self.planos: Dict[str, list] = {}  # SQL normalizado -> EXPLAIN QUERY PLAN (consultas lentas)
+        self._formas: Dict[bytes, str] = {}  # SQL com os dígitos zerados -> SQL normalizado
+        self.inicio = time.time()
+        self._trava = threading.Lock()
+        self._local = _EstadoThread()
+        self._db = None
+        self._ao_conectar_original = None
+
+    # ------------------------------------------------------------------ instalação
+
+    def instalar(self, db) -> "Instrumentacao":
+        """Passa a medir os métodos públicos de db e os comandos SQL das conexões do pool."""
+        self._db = db
+        for nome, funcao in inspect.getmembers(type(db), inspect.isfunction):
+            if nome.startswith("_") or nome == "instrumentar":
+                continue
+            original = getattr(db, nome)
+            if nome == "transaction":
+                setattr(db, nome, self._medir_transacao(original))
+            else:
+                setattr(db, nome, self._medir_metodo(nome, original, inspect.isgeneratorfunction(funcao)))
+
+        self._ao_conectar_original = db.pool.ao_conectar
+        db.pool.ao_conectar = self._ao_conectar
+        for conn in db.pool.listar_conexoes():
+            self._ligar(conn)
+        return self
+
+    def remover(self) -> None:
+        """Restaura os métodos originais e desliga os callbacks das conexões."""
+        db, self._db = self._db, None
+        if db is None:
+            return
+        for nome in [nome for nome in vars(db) if nome in dir(type(db)) and not nome.startswith("_")]:
+            if callable(vars(db)[nome]):
+                delattr(db, nome)
+        db.pool.ao_conectar = self._ao_conectar_original
+        for conn in db.pool.listar_conexoes():
+            with contextlib.suppress(sqlite3.Error):
+                conn.set_trace_callback(None)
+                conn.set_progress_handler(None, 0)
+
+    def _ao_conectar(self, conn: sqlite3.Connection) -> None:
+        if self._ao_conectar_original:
+            self._ao_conectar_original(conn)
+        self._ligar(conn)
+
+    def _ligar(self, conn: sqlite3.Connection) -> None:
+        conn.set_trace_callback(self._ao_executar)
+        if self.passos_progresso:
+            conn.set_progress_handler(self._ao_progredir, self.passos_progresso)
+
+    # ------------------------------------------------------------------ SQL
+
+    def _ao_executar(self, sql: str) -> None:
+        """Trace callback: início de um comando (encerra o anterior da mesma thread)."""
+        local = self._local
+        if local.explicando:
+            return  # EXPLAIN da própria instrumentação
+        comando = local.comando
+        if sql.startswith("--") or (comando is not None and comando[0] == sql):
+            # Triggers disparados pelo comando chegam como "-- TRIGGER ..." ou como o mesmo
+            # SQL expandido (mesmos valores) do comando que os disparou
+            return
+        self._encerrar_comando()
+        local.comando = (sql, time.perf_counter())
+        local.passos = 0
+
+    def _ao_progredir(self) -> int:
+        self._local.passos += self.passos_progresso
+        return 0  # 0 = continua a execução
+
+    def _encerrar_comando(self) -> None:
+        local = self._local
+        comando = local.comando
+        if comando is None:
+            return
+        local.comando = None
+        sql, inicio = comando
+        segundos = time.perf_counter() - inicio
+        chave = self._normalizar(sql)
+        with self._trava:
+            metrica = self.comandos.get(chave)
+            if metrica is None:
+                metrica = self.comandos[chave] = Metrica()
+            metrica.chamadas += 1
+            metrica.passos += local.passos
+            metrica.duracao.registrar(segundos)
+
+        if (self.limite_lento is not None and segundos >= self.limite_lento and chave not in self.planos
+                and chave.upper().startswith(("SELECT", "WITH"))):
+            local.lentos.append((sql, chave, segundos))
+
+    def _normalizar(self, sql: str) -> str:
+        # normalizar_sql (regex) custa dezenas de µs num SELECT longo; zerar os dígitos com
+        # bytes.translate custa ~1 µs e já junta as execuções que só mudam números (CPF, datas)
+        forma = sql.encode().translate(_DIGITOS)
+        chave = self._formas.get(forma)
+        if chave is None:
+            if len(self._formas) > 10_000:
+                self._formas.clear()
+            chave = self._formas[forma] = normalizar_sql(sql)
+        return chave
+
+    def _explicar_lentos(self) -> None:
+        """Registra o plano das consultas lentas da thread (fora do trace callback)."""
+        lentos, self._local.lentos = self._local.lentos, []
+        for sql, chave, segundos in lentos:
+            if chave in self.planos:
+                continue
+            self._local.explicando = True
+            try:
+                plano = [linha[-1] for linha in self._db.conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            except sqlite3.Error as e:
+                plano = [f"(plano indisponível: {e})"]
+            finally:
+                self._local.explicando = False
+            self.planos[chave] = plano
+            logger.warning("Consulta lenta (%.1f ms): %s\n  Plano: %s", segundos * 1000, chave, "\n         ".join(plano),
+                           extra={"sql": chave, "segundos": round(segundos, 4), "plano": plano})
+
+    # ------------------------------------------------------------------ métodos
+
+    def _entrar(self) -> None:
+        self._local.profundidade += 1
+
+    def _sair(self, nome: str, inicio: float, linhas: Optional[int], erro: bool) -> None:
+        segundos = time.perf_counter() - inicio
+        local = self._local
+        local.profundidade -= 1
+        if local.profundidade == 0:
+            self._encerrar_comando()
+            if local.lentos:
+                self._explicar_lentos()
+        with self._trava:
+            metrica = self.metodos.get(nome)
+            if metrica is None:
+                metrica = self.metodos[nome] = Metrica()
+            metrica.chamadas += 1
+            metrica.erros += erro
+            metrica.linhas += linhas or 0
+            metrica.duracao.registrar(segundos)
+
+    def _medir_metodo(self, nome: str, original, gerador: bool):
+        if gerador:
+            @functools.wraps(original)
+            def medido(*args, **kwargs):
+                self._entrar()
+                inicio, linhas, erro = time.perf_counter(), 0, False
+                try:
+                    for item in original(*args, **kwargs):
+                        # Geradores em blocos (visualiza_ponto_blocos, ...) entregam listas de linhas
+                        linhas += len(item) if isinstance(item, list) else 1
+                        yield item
+                except BaseException:
+                    erro = True
+                    raise
+                finally:
+                    self._sair(nome, inicio, linhas, erro)
+            return medido
+
+        @functools.wraps(original)
+        def medido(*args, **kwargs):
+            self._entrar()
+            inicio, resultado, erro = time.perf_counter(), None, True
+            try:
+                resultado = original(*args, **kwargs)
+                # Os métodos do BancoSQLite devolvem False em caso de falha
+                erro = resultado is False
+                return resultado
+            finally:
+                self._sair(nome, inicio, _contar_linhas(resultado), erro)
+        return medido
+
+    def _medir_transacao(self, original):
+        @contextlib.contextmanager
+        @functools.wraps(original)
+        def medido(*args, **kwargs):
+            self._entrar()
+            inicio, erro = time.perf_counter(), True
+            try:
+                with original(*args, **kwargs) as cursor:
+                    yield cursor
+                erro = False
+            finally:
+                self._sair("transaction", inicio, None, erro)
+        return medido
+
+    # ------------------------------------------------------------------ saída
+
+    def relatorio(self, limite_comandos: int = 15) -> str:
+        """Tabelas de texto com os métodos e os comandos SQL, do maior tempo total para o menor."""
+        with self._trava:
+            metodos = sorted(self.metodos.items(), key=lambda item: -item[1].duracao.soma)
+            comandos = sorted(self.comandos.items(), key=lambda item: -item[1].duracao.soma)[:limite_comandos]
+
+        def linha(nome, m, largura, contagem):
+            d = m.duracao
+            return (f"{nome[:largura]:<{largura}} {m.chamadas:>8} {m.erros:>6} {d.soma * 1000:>10.1f} "
+                    f"{d.soma / m.chamadas * 1000 if m.chamadas else 0:>8.2f} {d.percentil(95) * 1000:>8.1f} "
+                    f"{d.maximo * 1000:>8.1f} {contagem:>10}")
+
+        saida = [f"Instrumentação desde {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.inicio))}", "",
+                 f"{'método':<40} {'chamadas':>8} {'erros':>6} {'total ms':>10} {'média ms':>8} {'p95 ms':>8} "
+                 f"{'máx ms':>8} {'linhas':>10}"]
+        saida += [linha(nome, m, 40, m.linhas) for nome, m in metodos]
+        saida += ["", f"{'SQL':<70} {'execuções':>8} {'':>6} {'total ms':>10} {'média ms':>8} {'p95 ms':>8} "
+                      f"{'máx ms':>8} {'passos VM':>10}"]
+        saida += [linha(sql, m, 70, m.passos) for sql, m in comandos]
+        if self.planos:
+            saida += ["", "Planos das consultas lentas:"]
+            for sql, plano in self.planos.items():
+                saida += [f"  {sql}", *(f"    {passo}" for passo in plano)]
+        return "\n".join(saida)
+
+    def prometheus(self, prefixo: str = "ponto_db") -> str:
+        """Métricas no formato de texto do Prometheus (histogramas e contadores)."""
+        with self._trava:
+            metodos = list(self.metodos.items())
+            comandos = list(self.comandos.items())
+
+        saida = []
+        for serie, rotulo, itens, descricao in (
+                ("metodo", "metodo", metodos, "Duração das chamadas dos métodos do BancoSQLite"),
+                ("sql", "sql", comandos, "Duração dos comandos SQL (normalizados)")):
+            nome = f"{prefixo}_{serie}_segundos"
+            saida += [f"# HELP {nome} {descricao}", f"# TYPE {nome} histogram"]
+            for chave, metrica in itens:
+                r = f'{rotulo}="{_escapar(chave)}"'
+                acumulado = 0
+                for limite, contagem in zip((*metrica.duracao.limites, "+Inf"), metrica.duracao.contagens):
+                    acumulado += contagem
+                    saida.append(f'{nome}_bucket{{{r},le="{limite}"}} {acumulado}')
+                saida.append(f"{nome}_sum{{{r}}} {metrica.duracao.soma:.6f}")
+                saida.append(f"{nome}_count{{{r}}} {metrica.chamadas}")
+
+        for nome, descricao, itens, campo, rotulo in (
+                (f"{prefixo}_metodo_erros_total", "Chamadas que falharam", metodos, "erros", "metodo"),
+                (f"{prefixo}_metodo_linhas_total", "Linhas devolvidas pelos métodos", metodos, "linhas", "metodo"),
+                (f"{prefixo}_sql_passos_vm_total", "Instruções da VM do SQLite por comando", comandos, "passos",
+                 "sql")):
+            saida += [f"# HELP {nome} {descricao}", f"# TYPE {nome} counter"]
+            saida += [f'{nome}{{{rotulo}="{_escapar(chave)}"}} {getattr(m, campo)}' for chave, m in itens]
+        return "\n".join(saida) + "\n"
+
+    def gravar_prometheus(self, caminho, prefixo: str = "ponto_db") -> None:
+        """Grava prometheus() no arquivo (troca atômica, para o textfile collector)."""
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.prometheus(prefixo))
+        os.replace(temporario, caminho)
+
+    def limpar(self) -> None:
+        """Zera as métricas coletadas (a instrumentação continua ligada)."""
+        with self._trava:
+            self.metodos.clear()
+            self.comandos.clear()
+            self.planos.clear()
+            self.inicio = time.time()
+
+
+def _contar_linhas(resultado) -> Optional[int]:
+    """Linhas devolvidas por um método: listas, (registros, proxima) ou estatísticas com "resultados"."""
+    if isinstance(resultado, list):
+        return len(resultado)
+    if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], list):
+        return len(resultado[0])
+    if isinstance(resultado, dict) and isinstance(resultado.get("resultados"), list):
+        return len(resultado["resultados"])
+    return None
+
+
+def _escapar(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
@@ -0,0 +1,200 @@
+"""
+Leitor dos arquivos exportados pelo relógio de ponto (AFD).
+
+Cada linha tem campos de largura fixa: identificador (NSR + tipo do registro),
+timestamp ISO com fuso, CPF/código e valor. ler_registros monta a lista de
+dicionários (com strptime, como a tela de importação sempre fez); iterar_registros
+e parse_line_rapido são o caminho rápido usado nas importações (BancoSQLite.importar_afd,
+banco.importacao_paralela), um RegistroPonto por linha sem strptime.
+"""
+from datetime import date, datetime
+
+
+def _parse_line(line):
+    try:
+        """
+        Faz o parsing de uma linha de registro com o seguinte layout:
+          - posições 0 a 9: Identificador (registro)
+          - posições 10 a 33: Timestamp (24 caracteres)
+          - posições 34 a 44: Código (11 caracteres)
+          - posições 45 em diante: Valor (ex: '1AFA', 'A1F5', etc.)
+        Caso a linha não contenha todos os campos, os campos ausentes serão tratados como vazios.
+        """
+        registro = line[:10]
+        timestamp = line[10:34]
+
+        # Converter o timestamp para um objeto datetime
+        dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S%z")
+        # Formatar a data como dd/mm/aaaa
+        data_formatada = dt.strftime("%d/%m/%Y")
+        # Extrair a hora no formato HH:MM:SS
+        hora_formatada = dt.strftime("%H:%M:%S")
+
+        # Se a linha tiver pelo menos 45 caracteres, extrai o código; caso contrário, pega o que houver a partir do índice 34
+        codigo = line[34:45] if 45 <= len(line) < 90 else line[34:]
+        # Se a linha tiver mais de 45 caracteres, extrai o valor (removendo espaços extras)
+        valor = line[45:].strip() if len(line) > 45 else ""
+
+        return {
+            "registro": registro,
+            "timestamp": timestamp,
+            "data": data_formatada,
+            "hora": hora_formatada,
+            "codigo": codigo.strip(),
+            "valor": valor
+        }
+    except Exception as e:
+        print(e)
+
+
+# Tabelas de apoio do leitor rápido: os arquivos do REP repetem poucos fusos e
+# poucas datas, então cada valor distinto é convertido uma única vez.
+_DIA_ZERO_EPOCH = date(1970, 1, 1).toordinal()
+_OFFSETS_UTC = {}  # '-0400' -> -14400 (segundos em relação ao UTC)
+_DATAS = {}  # '2025-02-03' -> (dias desde 1970-01-01, '03/02/2025')
+
+
+class RegistroPonto:
+    """
+    Registro de ponto compacto, gerado pelo modo streaming do leitor (iterar_registros).
+
+    Usa __slots__ para não alocar um dicionário por linha. O acesso por chave
+    (reg["hora"]) continua funcionando, como nos dicionários de ler_registros.
+    """
+    __slots__ = ("registro", "timestamp", "data", "hora", "codigo", "valor", "epoch_utc")
+
+    def __init__(self, registro, timestamp, data, hora, codigo, valor, epoch_utc):
+        self.registro = registro
+        self.timestamp = timestamp
+        self.data = data
+        self.hora = hora
+        self.codigo = codigo
+        self.valor = valor
+        self.epoch_utc = epoch_utc
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+
+    def __repr__(self):
+        return (f"RegistroPonto(registro={self.registro!r}, timestamp={self.timestamp!r}, "
+                f"codigo={self.codigo!r}, valor={self.valor!r})")
+
+
+def _offset_utc(texto):
+    """Converte um fuso no formato '-0400' para segundos, usando a tabela em cache."""
+    try:
+        return _OFFSETS_UTC[texto]
+    except KeyError:
+        pass
+
+    if len(texto) != 5 or texto[0] not in "+-" or not texto[1:].isdigit():
+        raise ValueError(f"Fuso horário inválido: {texto!r}")
+    segundos = int(texto[1:3]) * 3600 + int(texto[3:5]) * 60
+    if texto[0] == "-":
+        segundos = -segundos
+
+    _OFFSETS_UTC[texto] = segundos
+    return segundos
+
+
+def _data_registro(texto):
+    """Valida uma data 'AAAA-MM-DD' e devolve (dias desde 1970-01-01, 'DD/MM/AAAA'), com cache."""
+    try:
+        return _DATAS[texto]
+    except KeyError:
+        pass
+
+    if texto[4:5] != "-" or texto[7:8] != "-" or not texto[0:4].isdigit():
+        raise ValueError(f"Data inválida: {texto!r}")
+    # date() valida mês e dia (ex.: 2025-02-30 gera ValueError)
+    dia = date(int(texto[0:4]), int(texto[5:7]), int(texto[8:10]))
+
+    valor = (dia.toordinal() - _DIA_ZERO_EPOCH, f"{texto[8:10]}/{texto[5:7]}/{texto[0:4]}")
+    _DATAS[texto] = valor
+    return valor
+
+
+def parse_line_rapido(line):
+    """
+    Versão do _parse_line sem strptime/strftime, usada pelo modo streaming.
+
+    Recorta os campos de largura fixa por fatiamento e interpreta o timestamp
+    ('%Y-%m-%dT%H:%M:%S%z') manualmente. Linhas inválidas geram ValueError.
+    """
+    timestamp = line[10:34]
+    if len(timestamp) != 24 or timestamp[10] != "T" or timestamp[13] != ":" or timestamp[16] != ":":
+        raise ValueError(f"Timestamp inválido: {timestamp!r}")
+
+    dias, data_formatada = _data_registro(timestamp[0:10])
+    hora = int(timestamp[11:13])
+    minuto = int(timestamp[14:16])
+    segundo = int(timestamp[17:19])
+    if hora > 23 or minuto > 59 or segundo > 61:
+        raise ValueError(f"Horário inválido: {timestamp!r}")
+
+    epoch_utc = dias * 86400 + hora * 3600 + minuto * 60 + segundo - _offset_utc(timestamp[19:24])
+
+    # Mesmas regras de recorte do _parse_line
+    tamanho = len(line)
+    codigo = line[34:45] if 45 <= tamanho < 90 else line[34:]
+    valor = line[45:].strip() if tamanho > 45 else ""
+
+    return RegistroPonto(line[:10], timestamp, data_formatada, timestamp[11:19],
+                         codigo.strip(), valor, epoch_utc)
+
+
+def iterar_registros(arquivo, encoding="ANSI"):
+    """
+    Lê o arquivo do relógio de forma preguiçosa, gerando um RegistroPonto por linha.
+
+    Nada é acumulado em memória, o que permite processar exportações com milhões
+    de linhas. Linhas vazias são ignoradas; linhas inválidas são puladas, cada uma
+    registrada em DEBUG (sujeito ao FiltroAmostragem) e, ao final, um único aviso
+    com o total e as primeiras como exemplo.
+    """
+    from banco.registro_log import obter_logger  # import local: main não carrega logging/json ao iniciar
+
+    logger = obter_logger("importacao")
+    parse = parse_line_rapido
+    erros = 0
+    amostra = []
+    try:
+        with open(arquivo, encoding=encoding) as f:
+            for numero, linha in enumerate(f, 1):
+                linha = linha.rstrip("\n")
+                if not linha or linha.isspace():  # ignora linhas vazias
+                    continue
+                try:
+                    yield parse(linha)
+                except ValueError as e:
+                    erros += 1
+                    if len(amostra) < 3:
+                        amostra.append(f"linha {numero}: {e}")
+                    logger.debug("Linha %d inválida em '%s': %s", numero, arquivo, e)
+    finally:
+        if erros:
+            logger.warning("Arquivo '%s': %d linhas inválidas ignoradas (ex.: %s)", arquivo, erros, "; ".join(amostra))
+
+
+def ler_registros(arquivo, streaming=False, encoding="ANSI"):
+    """
+    Abre o arquivo e lê todos os registros, aplicando a função de parsing para cada linha.
+
+    Com streaming=True retorna o gerador de iterar_registros em vez de montar a lista.
+    """
+    if streaming:
+        return iterar_registros(arquivo, encoding=encoding)
+
+    try:
+        registros = []
+        with open(arquivo, encoding=encoding) as f:
+            for linha in f:
+                linha = linha.rstrip("\n")
+                if linha.strip():  # ignora linhas vazias
+                    registros.append(_parse_line(linha))
+        return registros
+    except Exception as e:
+        print(e)
@@ -0,0 +1,482 @@
+"""
+Migrações versionadas do esquema do banco de ponto.
+
+A versão aplicada fica gravada no cabeçalho do arquivo (PRAGMA user_version).
+Cada migração roda uma única vez, dentro de uma transação, na ordem de MIGRACOES.
+"""
+import logging
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+from banco.apuracao import JORNADA_POR_DIA_SEMANA
+
+logger = logging.getLogger('SQLiteDB.migracao')
+
+# Jornada usada quando nem o funcionário nem a empresa têm uma jornada definida
+JORNADA_PADRAO_ID = 1
+
+# Colunas inteiras de ponto derivadas do timestamp local 'AAAA-MM-DDTHH:MM:SS-0300' (migração 6).
+# Os comandos do BancoSQLite gravam as colunas junto com a marcação; para quem não as
+# informa, triggers preenchem depois. {timestamp} é a coluna ou o parâmetro com o texto.
+DIA_LOCAL_SQL = "CAST(julianday(substr({timestamp}, 1, 10)) - 2440587.5 AS INTEGER)"
+SEGUNDO_LOCAL_SQL = (
+    "(CAST(substr({timestamp}, 12, 2) AS INTEGER) * 3600"
+    " + CAST(substr({timestamp}, 15, 2) AS INTEGER) * 60 + CAST(substr({timestamp}, 18, 2) AS INTEGER))"
+)
+# Fuso '-0300', '+05:30' ou ausente (UTC)
+_FUSO_SQL = """
+    CASE WHEN substr(timestamp, 20, 1) IN ('+', '-')
+         THEN (CASE substr(timestamp, 20, 1) WHEN '-' THEN -1 ELSE 1 END)
+              * (CAST(substr(replace(substr(timestamp, 20), ':', ''), 2, 2) AS INTEGER) * 3600
+                 + CAST(substr(replace(substr(timestamp, 20), ':', ''), 4, 2) AS INTEGER) * 60)
+         ELSE 0 END
+"""
+
+
+# Índices das tabelas de cadastro. Essas tabelas são criadas pela aplicação via
+# criar_tabela, então os índices só são criados quando a tabela e as colunas existem.
+INDICES_CADASTRO = {
+    "cadastro_funcionario": [
+        # Join ponto.cpf = cadastro_funcionario.CPF cobrindo as colunas lidas nos relatórios
+        ("idx_funcionario_cpf", ("CPF", "nome", "empresa", "n_folha", "pis_pasep")),
+        # Filtro por empresa em calcular_horas_extras_faltantes_por_empresa
+        ("idx_funcionario_empresa", ("empresa", "CPF", "nome")),
+    ],
+}
+
+
+def criar_indices_cadastro(cursor: sqlite3.Cursor, nome_tabela: Optional[str] = None) -> None:
+    """Cria os índices de INDICES_CADASTRO para as tabelas que já existem no banco."""
+    tabelas = [nome_tabela] if nome_tabela else list(INDICES_CADASTRO)
+    for tabela in tabelas:
+        indices = INDICES_CADASTRO.get(tabela)
+        if not indices:
+            continue
+
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        colunas = {linha[1].lower() for linha in cursor.fetchall()}
+        if not colunas:
+            continue  # tabela ainda não existe
+
+        for nome_indice, colunas_indice in indices:
+            if all(coluna.lower() in colunas for coluna in colunas_indice):
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {nome_indice} ON {tabela} ({', '.join(colunas_indice)})"
+                )
+
+
+def _v1_indices_ponto(cursor: sqlite3.Cursor) -> None:
+    """Chave única em ponto(cpf, timestamp) e índice cobrindo os filtros por mês/período."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ponto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cpf TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            tipo TEXT CHECK(tipo IN ('entrada', 'saida')),
+            codigo_empresa INTEGER NOT NULL,
+            FOREIGN KEY (codigo_empresa) REFERENCES cadastro_empresa(id),
+            FOREIGN KEY (cpf) REFERENCES cadastro_funcionario(cpf)
+        )
+    """)
+
+    # Remove duplicidades antigas (mantém o registro mais recente) antes da chave única
+    cursor.execute("""
+        DELETE FROM ponto
+        WHERE id NOT IN (SELECT MAX(id) FROM ponto GROUP BY cpf, timestamp)
+    """)
+    if cursor.rowcount > 0:
+        logger.warning("Migração: %d marcações duplicadas removidas da tabela ponto", cursor.rowcount)
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_ponto_cpf_timestamp ON ponto (cpf, timestamp)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ponto_timestamp ON ponto (timestamp, cpf, tipo, codigo_empresa)"
+    )
+    criar_indices_cadastro(cursor)
+
+
+def _v2_ponto_dia(cursor: sqlite3.Cursor) -> None:
+    """
+    Tabela materializada com a apuração diária (ponto_dia) e a fila ponto_dia_pendente.
+
+    Os triggers de ponto enfileiram os dias afetados por qualquer escrita; o
+    BancoSQLite recalcula esses dias. A fila já nasce com todos os dias existentes.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ponto_dia (
+            cpf TEXT NOT NULL,
+            data TEXT NOT NULL,
+            codigo_empresa INTEGER,
+            entrada_manha TEXT NOT NULL DEFAULT '00:00:00',
+            saida_manha TEXT NOT NULL DEFAULT '00:00:00',
+            entrada_tarde TEXT NOT NULL DEFAULT '00:00:00',
+            saida_tarde TEXT NOT NULL DEFAULT '00:00:00',
+            segundos_trabalhados INTEGER NOT NULL DEFAULT 0,
+            segundos_jornada INTEGER NOT NULL DEFAULT 0,
+            segundos_extras INTEGER NOT NULL DEFAULT 0,
+            segundos_faltantes INTEGER NOT NULL DEFAULT 0,
+            atualizado_em TEXT,
+            PRIMARY KEY (cpf, data)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ponto_dia_data ON ponto_dia (data, cpf)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ponto_dia_pendente (
+            cpf TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (cpf, data)
+        ) WITHOUT ROWID
+    """)
+
+    # ON CONFLICT DO NOTHING e não INSERT OR IGNORE: dentro de um trigger o OR IGNORE é
+    # substituído pela política do comando externo, e um UPSERT em ponto (ON CONFLICT
+    # DO UPDATE) que alterasse uma marcação falharia com UNIQUE em ponto_dia_pendente
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_dia_insert AFTER INSERT ON ponto
+        BEGIN
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (NEW.cpf, substr(NEW.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_dia_update AFTER UPDATE ON ponto
+        BEGIN
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (OLD.cpf, substr(OLD.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (NEW.cpf, substr(NEW.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_dia_delete AFTER DELETE ON ponto
+        BEGIN
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (OLD.cpf, substr(OLD.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+        END
+    """)
+
+    cursor.execute("""
+        INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data)
+        SELECT DISTINCT cpf, substr(timestamp, 1, 10) FROM ponto
+    """)
+
+
+def _v3_jornadas(cursor: sqlite3.Cursor) -> None:
+    """
+    Jornadas de trabalho (por empresa e por funcionário) e o calendário pré-calculado
+    de segundos previstos por (jornada, data), já considerando os feriados.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jornada (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jornada_dia_semana (
+            jornada_id INTEGER NOT NULL,
+            dia_semana INTEGER NOT NULL CHECK(dia_semana BETWEEN 0 AND 6),
+            segundos INTEGER NOT NULL,
+            PRIMARY KEY (jornada_id, dia_semana),
+            FOREIGN KEY (jornada_id) REFERENCES jornada(id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jornada_empresa (
+            codigo_empresa INTEGER PRIMARY KEY,
+            jornada_id INTEGER NOT NULL,
+            FOREIGN KEY (jornada_id) REFERENCES jornada(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jornada_funcionario (
+            cpf TEXT PRIMARY KEY,
+            jornada_id INTEGER NOT NULL,
+            FOREIGN KEY (jornada_id) REFERENCES jornada(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS calendario_jornada (
+            jornada_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            segundos_previstos INTEGER NOT NULL,
+            PRIMARY KEY (jornada_id, data)
+        ) WITHOUT ROWID
+    """)
+
+    # Jornada padrão: a mesma tabela por dia da semana usada até aqui (44 horas)
+    cursor.execute("INSERT OR IGNORE INTO jornada (id, descricao) VALUES (?, ?)",
+                   (JORNADA_PADRAO_ID, "44 horas semanais (padrão)"))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO jornada_dia_semana (jornada_id, dia_semana, segundos) VALUES (?, ?, ?)",
+        [(JORNADA_PADRAO_ID, dia, horas * 3600) for dia, horas in JORNADA_POR_DIA_SEMANA.items()]
+    )
+
+
+def _v4_tabelas_log(cursor: sqlite3.Cursor) -> None:
+    """
+    Tabelas de histórico de alterações do ponto, antes criadas (com um commit cada)
+    a cada inicialização do BancoSQLite.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS log_alteracoes_ponto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_alteracao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cpf TEXT NOT NULL,
+            funcionario TEXT NOT NULL,
+            data TEXT NOT NULL,
+            campo_alterado TEXT NOT NULL,
+            valor_antigo TEXT,
+            valor_novo TEXT,
+            usuario TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ponto_alteracoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ponto_id INTEGER NOT NULL,
+            campo_alterado TEXT NOT NULL,
+            valor_antigo TEXT NOT NULL,
+            valor_novo TEXT NOT NULL,
+            data_alteracao TEXT NOT NULL,
+            FOREIGN KEY (ponto_id) REFERENCES ponto(id)
+        )
+    """)
+    # visualizar_historico_alteracoes filtra por CPF e ordena pela data da alteração
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_log_alteracoes_cpf ON log_alteracoes_ponto (cpf, data_alteracao)"
+    )
+
+
+def _v5_controle_exportacao(cursor: sqlite3.Cursor) -> None:
+    """
+    Controle de alterações para a exportação incremental (banco.exportacao_colunar).
+
+    Marcações novas são reconhecidas pelo id (AUTOINCREMENT, nunca reaproveitado);
+    as alteradas ganham ponto.alterado_em por trigger, só quando algum valor muda de
+    fato (reimportar o mesmo arquivo não marca nada). Exclusões e marcações que mudam
+    de empresa/mês deixam a partição de origem em ponto_particao_alterada.
+    """
+    cursor.execute("PRAGMA table_info(ponto)")
+    if "alterado_em" not in {linha[1].lower() for linha in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE ponto ADD COLUMN alterado_em TEXT")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ponto_alterado_em ON ponto (alterado_em) WHERE alterado_em IS NOT NULL"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ponto_dia_atualizado_em ON ponto_dia (atualizado_em)")
+    # Uma partição (empresa, mês) sem varrer o mês de todas as empresas; a ordem (data, cpf) vem da chave
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ponto_dia_empresa_data ON ponto_dia (codigo_empresa, data)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ponto_particao_alterada (
+            codigo_empresa INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            alterado_em TEXT NOT NULL,
+            PRIMARY KEY (codigo_empresa, mes)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exportacao_estado (
+            destino TEXT NOT NULL,
+            conjunto TEXT NOT NULL,
+            formato TEXT NOT NULL,
+            ultimo_id INTEGER,
+            marca_alteracao TEXT,
+            marca_particao TEXT,
+            exportado_em TEXT NOT NULL,
+            PRIMARY KEY (destino, conjunto, formato)
+        ) WITHOUT ROWID
+    """)
+
+    agora = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_alterado_em
+        AFTER UPDATE OF cpf, timestamp, tipo, codigo_empresa ON ponto
+        WHEN OLD.cpf IS NOT NEW.cpf OR OLD.timestamp IS NOT NEW.timestamp
+          OR OLD.tipo IS NOT NEW.tipo OR OLD.codigo_empresa IS NOT NEW.codigo_empresa
+        BEGIN
+            UPDATE ponto SET alterado_em = {agora} WHERE id = NEW.id;
+            INSERT INTO ponto_particao_alterada (codigo_empresa, mes, alterado_em)
+            SELECT OLD.codigo_empresa, substr(OLD.timestamp, 1, 7), {agora}
+            WHERE OLD.codigo_empresa IS NOT NEW.codigo_empresa
+               OR substr(OLD.timestamp, 1, 7) IS NOT substr(NEW.timestamp, 1, 7)
+            ON CONFLICT (codigo_empresa, mes) DO UPDATE SET alterado_em = excluded.alterado_em;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_particao_delete AFTER DELETE ON ponto
+        BEGIN
+            INSERT INTO ponto_particao_alterada (codigo_empresa, mes, alterado_em)
+            VALUES (OLD.codigo_empresa, substr(OLD.timestamp, 1, 7), {agora})
+            ON CONFLICT (codigo_empresa, mes) DO UPDATE SET alterado_em = excluded.alterado_em;
+        END
+    """)
+
+
+def _v6_colunas_data_ponto(cursor: sqlite3.Cursor) -> None:
+    """
+    Data e hora de ponto também como inteiros, para filtros e cálculos sem substr:
+      dia_local:     dias desde 1970-01-01 da data local da marcação
+      segundo_local: segundos desde a meia-noite (hora local)
+      epoch_utc:     segundos Unix em UTC (coluna gerada VIRTUAL, calculada na leitura)
+
+    dia_local e segundo_local são colunas comuns (o SQLite não usa como cobertura um
+    índice com colunas geradas), preenchidas aqui para as marcações existentes. O
+    índice (dia_local, segundo_local, cpf, tipo, codigo_empresa) substitui o de texto
+    idx_ponto_timestamp, então o custo de cada INSERT não aumenta.
+    """
+    cursor.execute("PRAGMA table_info(ponto)")
+    colunas = {linha[1].lower() for linha in cursor.fetchall()}
+    if "dia_local" not in colunas:
+        cursor.execute("ALTER TABLE ponto ADD COLUMN dia_local INTEGER")
+    if "segundo_local" not in colunas:
+        cursor.execute("ALTER TABLE ponto ADD COLUMN segundo_local INTEGER")
+    cursor.execute("PRAGMA table_xinfo(ponto)")
+    if "epoch_utc" not in {linha[1].lower() for linha in cursor.fetchall()}:
+        cursor.execute(f"""
+            ALTER TABLE ponto ADD COLUMN epoch_utc INTEGER
+            GENERATED ALWAYS AS (dia_local * 86400 + segundo_local - {_FUSO_SQL}) VIRTUAL
+        """)
+
+    # O trigger da apuração diária passa a olhar só as colunas de dados; sem isso o
+    # preenchimento abaixo (e o de alterado_em) enfileiraria todos os dias de novo
+    cursor.execute("DROP TRIGGER IF EXISTS trg_ponto_dia_update")
+    cursor.execute("""
+        CREATE TRIGGER trg_ponto_dia_update AFTER UPDATE OF cpf, timestamp, tipo, codigo_empresa ON ponto
+        BEGIN
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (OLD.cpf, substr(OLD.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+            INSERT INTO ponto_dia_pendente (cpf, data) VALUES (NEW.cpf, substr(NEW.timestamp, 1, 10))
+                ON CONFLICT DO NOTHING;
+        END
+    """)
+
+    cursor.execute(f"""
+        UPDATE ponto SET dia_local = {DIA_LOCAL_SQL.format(timestamp="timestamp")},
+                         segundo_local = {SEGUNDO_LOCAL_SQL.format(timestamp="timestamp")}
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_ponto_timestamp")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ponto_dia_local ON ponto (dia_local, segundo_local, cpf, tipo, codigo_empresa)"
+    )
+
+    colunas_data = (f"dia_local = {DIA_LOCAL_SQL.format(timestamp='NEW.timestamp')}, "
+                    f"segundo_local = {SEGUNDO_LOCAL_SQL.format(timestamp='NEW.timestamp')}")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_data_insert AFTER INSERT ON ponto
+        WHEN NEW.dia_local IS NULL OR NEW.segundo_local IS NULL
+        BEGIN
+            UPDATE ponto SET {colunas_data} WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ponto_data_update AFTER UPDATE OF timestamp ON ponto
+        WHEN OLD.timestamp IS NOT NEW.timestamp
+        BEGIN
+            UPDATE ponto SET {colunas_data} WHERE id = NEW.id;
+        END
+    """)
+
+
+def _v7_manifesto_importacao(cursor: sqlite3.Cursor) -> None:
+    """
+    Manifesto dos arquivos do relógio já importados (banco.importacao_paralela).
+
+    A chave é o SHA-256 do conteúdo, então o mesmo arquivo não é importado de novo
+    mesmo renomeado ou copiado para outra pasta. O índice por (caminho, tamanho,
+    modificado_em) permite pular arquivos inalterados sem lê-los.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS importacao_arquivo (
+            checksum TEXT PRIMARY KEY,
+            caminho TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            modificado_em INTEGER NOT NULL,
+            codigo_empresa INTEGER,
+            lidos INTEGER NOT NULL,
+            inseridos INTEGER NOT NULL,
+            atualizados INTEGER NOT NULL,
+            ignorados INTEGER NOT NULL,
+            erros INTEGER NOT NULL,
+            importado_em TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_importacao_arquivo_caminho "
+        "ON importacao_arquivo (caminho, tamanho, modificado_em)"
+    )
+
+
+def _v8_posicao_leitura(cursor: sqlite3.Cursor) -> None:
+    """
+    Ponto de leitura dos arquivos acompanhados em tempo real (banco.acompanhamento).
+
+    Guarda, por arquivo, o byte logo após a última linha completa já gravada em ponto
+    e a identidade do arquivo (dispositivo + inode): um arquivo trocado ou truncado
+    volta a ser lido do início. A posição é gravada na mesma transação das marcações.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leitura_arquivo (
+            caminho TEXT PRIMARY KEY,
+            dispositivo INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            posicao INTEGER NOT NULL,
+            linhas INTEGER NOT NULL,
+            codigo_empresa INTEGER,
+            atualizado_em TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+MIGRACOES: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "índices e chave única da tabela ponto", _v1_indices_ponto),
+    (2, "apuração diária materializada (ponto_dia)", _v2_ponto_dia),
+    (3, "jornadas de trabalho e calendário de horas previstas", _v3_jornadas),
+    (4, "tabelas de histórico de alterações do ponto", _v4_tabelas_log),
+    (5, "controle de alterações para a exportação incremental", _v5_controle_exportacao),
+    (6, "colunas inteiras de data e hora em ponto", _v6_colunas_data_ponto),
+    (7, "manifesto dos arquivos do relógio importados", _v7_manifesto_importacao),
+    (8, "posição de leitura dos arquivos acompanhados", _v8_posicao_leitura),
+]
+
+
+def versao_atual(conn: sqlite3.Connection) -> int:
+    """Retorna a versão do esquema gravada no banco."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn: sqlite3.Connection) -> int:
+    """
+    Aplica as migrações pendentes, cada uma na sua própria transação.
+
+    Returns:
+        int: Versão do esquema após a execução
+    """
+    versao = versao_atual(conn)
+    if versao == 0 and not conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+        # Banco novo: auto_vacuum só muda antes da primeira tabela e, já em WAL, precisa
+        # do VACUUM (instantâneo no banco vazio). Libera espaço sem VACUUM (banco.bkp_banco)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    for numero, descricao, migracao in MIGRACOES:
+        if numero <= versao:
+            continue
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            migracao(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Erro ao aplicar a migração %d (%s): %s", numero, descricao, e)
+            raise
+        finally:
+            cursor.close()
+
+        versao = numero
+        logger.info("Migração %d aplicada: %s", numero, descricao)
+
+    # Tabelas de cadastro podem ter sido criadas depois da última migração
+    criar_indices_cadastro(conn.cursor())
+    conn.commit()
+    return versao
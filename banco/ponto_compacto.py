@@ -0,0 +1,202 @@
+"""
+Marcações de ponto em memória compacta, para apurar períodos longos.
+
+Uma tupla por marcação (CPF, data e horário em texto, inteiros como objetos) custa
+perto de 300 bytes; para um ano de todas as empresas isso passa de gigabytes.
+PontoCompacto guarda cada coluna num array do módulo array: o funcionário como
+índice em `cpfs` (cada CPF guardado uma vez), o dia como ponto.dia_local, os
+segundos desde a meia-noite, o tipo como bitmask e a empresa, cerca de 17 bytes por
+marcação. As marcações ficam ordenadas por (funcionário, dia, segundo) e
+`inicio_dia` guarda a posição da primeira marcação de cada funcionário/dia, então a
+apuração percorre um dia por vez sem agrupar nada em dicionários.
+
+Com NumPy instalado, vetores() devolve as mesmas colunas sem cópia (np.frombuffer)
+para o motor vetorizado (banco.apuracao_vetorizada).
+"""
+from array import array
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from banco.apuracao import ORDINAL_EPOCA, apurar_dia_convertidas
+
+# Bits de `marca`; zero é marcação sem tipo
+MARCA_ENTRADA = 1
+MARCA_SAIDA = 2
+_MARCAS = {"entrada": MARCA_ENTRADA, "saida": MARCA_SAIDA}
+_TIPOS = {0: None, MARCA_ENTRADA: "entrada", MARCA_SAIDA: "saida"}
+
+# Empresa ou segundos previstos ausentes (NULL no banco)
+SEM_VALOR = -1
+
+
+# 'HH:MM:' de cada minuto do dia e 'SS' de cada segundo, para montar o horário sem formatar números
+_MINUTOS = [f"{minuto // 60:02d}:{minuto % 60:02d}:" for minuto in range(24 * 60)]
+_SEGUNDOS = [f"{segundo:02d}" for segundo in range(60)]
+
+
+def horario_dos_segundos(segundos: int) -> str:
+    """Converte segundos desde a meia-noite em 'HH:MM:SS' (o horário de ponto.timestamp)."""
+    minuto, segundo = divmod(segundos, 60)
+    return _MINUTOS[minuto] + _SEGUNDOS[segundo]
+
+
+def _valor(valor) -> int:
+    return SEM_VALOR if valor is None else valor
+
+
+class PontoCompacto:
+    """
+    Marcações em colunas, ordenadas por (funcionário, dia, segundo).
+
+    Exemplo:
+        cursor.execute("SELECT cpf, dia_local, segundo_local, tipo, codigo_empresa, NULL "
+                       "FROM ponto ORDER BY cpf, timestamp")
+        ponto = PontoCompacto.carregar(cursor)
+        for cpf, data, codigo_empresa, *apuracao in ponto.apurar():
+            ...
+    """
+
+    __slots__ = ("cpfs", "funcionario", "dia", "segundo", "marca", "empresa", "inicio_dia", "previsto", "_codigos")
+
+    def __init__(self):
+        self.cpfs: List[str] = []  # código do funcionário -> CPF
+        self._codigos = {}
+        # Uma posição por marcação
+        self.funcionario = array("i")
+        self.dia = array("i")  # ponto.dia_local
+        self.segundo = array("i")  # ponto.segundo_local
+        self.marca = array("B")  # MARCA_ENTRADA / MARCA_SAIDA
+        self.empresa = array("i")
+        # Uma posição por funcionário/dia: primeira marcação e segundos previstos (da última marcação)
+        self.inicio_dia = array("q")
+        self.previsto = array("i")
+
+    def __len__(self) -> int:
+        return len(self.segundo)
+
+    @property
+    def quantidade_dias(self) -> int:
+        return len(self.inicio_dia)
+
+    def bytes_usados(self) -> int:
+        """Memória dos arrays (sem a lista de CPFs)."""
+        return sum(coluna.buffer_info()[1] * coluna.itemsize for coluna in (
+            self.funcionario, self.dia, self.segundo, self.marca, self.empresa, self.inicio_dia, self.previsto))
+
+    def acrescentar(self, linhas: Iterable[tuple]) -> None:
+        """
+        Acrescenta marcações (cpf, dia_local, segundo_local, tipo, codigo_empresa, segundos_previstos).
+
+        As linhas devem vir ordenadas por CPF e horário (ORDER BY cpf, timestamp),
+        continuando a ordem das já acrescentadas.
+
+        Raises:
+            ValueError: Funcionário/dia fora de ordem
+        """
+        linhas = list(linhas)
+        if not linhas:
+            return
+        cpf_col, dia_col, segundo_col, tipo_col, empresa_col, previsto_col = zip(*linhas)
+
+        # Códigos dos funcionários na ordem em que aparecem (o dict guarda a ordem de inserção)
+        codigos = self._codigos
+        conhecidos = len(codigos)
+        funcionario_col = [codigos.setdefault(cpf, len(codigos)) for cpf in cpf_col]
+        if len(codigos) > conhecidos:
+            self.cpfs.extend(islice(codigos, conhecidos, None))
+
+        # Início de cada funcionário/dia; os segundos previstos são os da última marcação do dia
+        inicio_dia, previsto = self.inicio_dia, self.previsto
+        base = len(self.segundo)
+        chave = (self.funcionario[-1], self.dia[-1]) if base else None
+        for posicao, atual in enumerate(zip(funcionario_col, dia_col)):
+            if atual != chave:
+                if chave is not None and atual < chave:
+                    raise ValueError(f"Marcações fora de ordem: CPF {cpf_col[posicao]}, dia_local {atual[1]}")
+                if posicao:
+                    previsto[-1] = _valor(previsto_col[posicao - 1])
+                chave = atual
+                inicio_dia.append(base + posicao)
+                previsto.append(SEM_VALOR)
+        previsto[-1] = _valor(previsto_col[-1])
+
+        self.funcionario.extend(funcionario_col)
+        self.dia.extend(dia_col)
+        self.segundo.extend(segundo_col)
+        self.marca.extend([_MARCAS.get(tipo, 0) for tipo in tipo_col])
+        self.empresa.extend(empresa_col if None not in empresa_col else map(_valor, empresa_col))
+
+    @classmethod
+    def carregar(cls, cursor, tamanho_bloco: int = 10000) -> "PontoCompacto":
+        """
+        Lê as linhas de um cursor já executado, em blocos (ver acrescentar).
+
+        Args:
+            cursor: Cursor com (cpf, dia_local, segundo_local, tipo, codigo_empresa, segundos_previstos)
+            tamanho_bloco: Linhas buscadas por vez
+
+        Returns:
+            PontoCompacto: As marcações lidas
+        """
+        ponto = cls()
+        while True:
+            linhas = cursor.fetchmany(tamanho_bloco)
+            if not linhas:
+                return ponto
+            ponto.acrescentar(linhas)
+
+    def apurar(self) -> Iterator[tuple]:
+        """
+        Apura cada funcionário/dia com as regras de banco.apuracao.
+
+        Yields:
+            tuple: (cpf, data 'YYYY-MM-DD', codigo_empresa da última marcação,
+                    entrada_manha, saida_manha, entrada_tarde, saida_tarde,
+                    segundos_trabalhados, segundos_jornada, segundos_extras, segundos_faltantes)
+        """
+        cpfs, funcionario, dia, segundo, marca, empresa = (
+            self.cpfs, self.funcionario, self.dia, self.segundo, self.marca, self.empresa)
+        minutos, segundos, tipos = _MINUTOS, _SEGUNDOS, _TIPOS  # horario_dos_segundos, sem a chamada
+        datas = {}
+        fins = self.inicio_dia[1:]
+        fins.append(len(segundo))
+
+        for inicio, fim, segundos_previstos in zip(self.inicio_dia, fins, self.previsto):
+            dia_local = dia[inicio]
+            data = datas.get(dia_local)
+            if data is None:
+                data = datas[dia_local] = date.fromordinal(dia_local + ORDINAL_EPOCA).isoformat()
+            # Só as marcações do dia viram tuplas, e só enquanto o dia é apurado
+            convertidas = [(s, minutos[s // 60] + segundos[s % 60], tipos[m])
+                           for s, m in zip(segundo[inicio:fim], marca[inicio:fim])]
+            codigo_empresa = empresa[fim - 1]
+            yield (cpfs[funcionario[inicio]], data, None if codigo_empresa == SEM_VALOR else codigo_empresa,
+                   *apurar_dia_convertidas(data, convertidas,
+                                           jornada=None if segundos_previstos == SEM_VALOR else segundos_previstos))
+
+    def vetores(self) -> dict:
+        """
+        As colunas como vetores NumPy, sem cópia (requer numpy instalado).
+
+        Returns:
+            dict: funcionario, dia, segundo, marca, empresa (por marcação) e
+                  inicio_dia, previsto, marcacoes_dia (por funcionário/dia)
+        """
+        import numpy as np
+
+        def vetor(coluna, tipo):
+            return np.frombuffer(coluna, dtype=tipo) if len(coluna) else np.empty(0, dtype=tipo)
+
+        inicio_dia = vetor(self.inicio_dia, np.int64)
+        return {
+            "funcionario": vetor(self.funcionario, np.intc),
+            "dia": vetor(self.dia, np.intc),
+            "segundo": vetor(self.segundo, np.intc),
+            "marca": vetor(self.marca, np.uint8),
+            "empresa": vetor(self.empresa, np.intc),
+            "inicio_dia": inicio_dia,
+            "previsto": vetor(self.previsto, np.intc),
+            "marcacoes_dia": np.diff(inicio_dia, append=len(self)),
+        }
+
@@ -0,0 +1,310 @@
+"""
+Logs da camada de dados.
+
+Todos os loggers ficam sob "SQLiteDB", um por categoria (SQLiteDB.consulta,
+SQLiteDB.ponto, ...), para que o nível de cada área possa ser ajustado em separado.
+Quem registra uma mensagem só a coloca numa fila (QueueHandler); a formatação
+final, o console colorido e o arquivo JSON ficam com a thread do QueueListener,
+então uma importação ou consulta nunca espera pelo terminal.
+
+Nos caminhos quentes use mensagens no estilo % (logger.debug("... %s", valor)):
+o texto só é montado se o registro passar pelo nível, e o FiltroAmostragem
+consegue agrupar as repetições pelo modelo da mensagem. Para operações por linha,
+prefira Agregador, que gera uma linha de resumo ("1.000 marcações em 1,2 s").
+
+Variável de ambiente PONTO_LOG (opcional): nível geral e por categoria,
+ex.: "WARNING,importacao=INFO,consulta=DEBUG".
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+LOGGER_RAIZ = "SQLiteDB"
+CATEGORIAS = ("conexao", "migracao", "consulta", "escrita", "ponto", "importacao", "metricas", "backup")
+
+# Atributos padrão do LogRecord (o que sobra vai como campo extra no JSON)
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_trava = threading.Lock()
+_listener = None
+
+
+def obter_logger(categoria: Optional[str] = None) -> logging.Logger:
+    """Logger da categoria (ex.: "consulta" -> SQLiteDB.consulta); sem categoria, o logger raiz."""
+    return logging.getLogger(f"{LOGGER_RAIZ}.{categoria}" if categoria else LOGGER_RAIZ)
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, com os campos passados em extra={...}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "quando": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for nome, valor in vars(record).items():
+            if nome not in _ATRIBUTOS_PADRAO and not nome.startswith("_"):
+                dados[nome] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados["excecao"] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroAmostragem(logging.Filter):
+    """
+    Limita mensagens repetidas abaixo de WARNING: de cada modelo de mensagem
+    (logger + texto com %s) passam as `primeiras` de cada janela de `intervalo`
+    segundos; as demais são descartadas e contadas na próxima que passar.
+    Avisos e erros passam sempre.
+    """
+
+    def __init__(self, primeiras: int = 20, intervalo: float = 10.0):
+        super().__init__()
+        self.primeiras = primeiras
+        self.intervalo = intervalo
+        self._janelas: Dict[tuple, list] = {}  # (logger, msg) -> [inicio, vistas, suprimidas]
+        self._trava = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        chave = (record.name, record.msg)
+        agora = time.monotonic()
+        with self._trava:
+            janela = self._janelas.get(chave)
+            if janela is None or agora - janela[0] > self.intervalo:
+                suprimidas = janela[2] if janela else 0
+                if len(self._janelas) > 10_000:
+                    self._janelas.clear()
+                self._janelas[chave] = [agora, 1, 0]
+                if suprimidas:
+                    record.suprimidas = suprimidas
+                    record.msg = f"{record.msg} (+{suprimidas} semelhantes suprimidas)"
+                return True
+            if janela[1] < self.primeiras:
+                janela[1] += 1
+                return True
+            janela[2] += 1
+            return False
+
+
+def _milhar(valor: float) -> str:
+    """10000 -> "10.000"."""
+    return f"{valor:,.0f}".replace(",", ".")
+
+
+class Agregador:
+    """
+    Conta eventos repetidos (marcações gravadas, consultas, ...) e registra um
+    resumo por janela de tempo em vez de uma linha por evento, ex.:
+    "marcações gravadas: 10.000 em 1,2 s (8.333/s) [inseridas=9.800, atualizadas=200]".
+
+    O resumo sai `intervalo` segundos depois do primeiro evento da janela (numa
+    thread Timer), ao chamar emitir() ou ao sair do bloco with.
+
+    Exemplo:
+        with Agregador(obter_logger("importacao"), "marcações importadas") as contagem:
+            for lote in lotes:
+                contagem.contar(len(lote))
+    """
+
+    def __init__(self, logger: logging.Logger, descricao: str, intervalo: float = 5.0,
+                 nivel: int = logging.INFO):
+        """
+        Args:
+            logger: Logger que recebe o resumo
+            descricao: Texto do resumo (o que está sendo contado)
+            intervalo: Segundos entre resumos (None = só ao emitir/fechar)
+            nivel: Nível do resumo
+        """
+        self.logger = logger
+        self.descricao = descricao
+        self.intervalo = intervalo
+        self.nivel = nivel
+        self._trava = threading.Lock()
+        self._timer = None
+        self._zerar()
+
+    def _zerar(self) -> None:
+        self._total = 0
+        self._por_tipo: Dict[str, int] = {}
+        self._inicio = self._ultimo = None
+
+    def contar(self, quantidade: int = 1, tipo: Optional[str] = None) -> None:
+        """Soma `quantidade` eventos (opcionalmente separados por tipo, ex.: "inseridas")."""
+        if not self.logger.isEnabledFor(self.nivel):
+            return
+        with self._trava:
+            if self._inicio is None:
+                self._inicio = time.perf_counter()
+                if self.intervalo is not None:
+                    self._timer = threading.Timer(self.intervalo, self.emitir)
+                    self._timer.daemon = True
+                    self._timer.start()
+            self._ultimo = time.perf_counter()
+            self._total += quantidade
+            if tipo is not None:
+                self._por_tipo[tipo] = self._por_tipo.get(tipo, 0) + quantidade
+
+    def emitir(self) -> None:
+        """Registra o resumo da janela atual (se houve eventos) e começa outra."""
+        with self._trava:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            if not self._total:
+                return
+            total, por_tipo = self._total, self._por_tipo
+            segundos = self._ultimo - self._inicio  # do primeiro ao último evento da janela
+            self._zerar()
+
+        detalhes = f" [{', '.join(f'{t}={_milhar(q)}' for t, q in por_tipo.items())}]" if por_tipo else ""
+        self.logger.log(
+            self.nivel, "%s: %s em %.1f s (%s/s)%s",
+            self.descricao, _milhar(total), segundos, _milhar(total / segundos) if segundos > 0 else "-", detalhes,
+            extra={"quantidade": total, "segundos": round(segundos, 3), **por_tipo},
+        )
+
+    def __enter__(self) -> "Agregador":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.emitir()
+
+
+def _niveis_ambiente() -> Dict[Optional[str], str]:
+    """Lê PONTO_LOG ("NIVEL,categoria=NIVEL,...") -> {None: geral, categoria: nível}."""
+    niveis = {}
+    for parte in filter(None, (p.strip() for p in os.environ.get("PONTO_LOG", "").split(","))):
+        categoria, _, nivel = parte.rpartition("=")
+        niveis[categoria or None] = nivel.upper()
+    return niveis
+
+
+def _handler_fila(fila) -> logging.Handler:
+    """
+    QueueHandler que mantém a exceção fora da mensagem: o prepare padrão junta o
+    traceback ao texto e zera exc_info, e o FormatadorJSON perderia o campo "excecao".
+    """
+    import copy
+    import logging.handlers
+
+    class HandlerFila(logging.handlers.QueueHandler):
+        def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+            record = copy.copy(record)
+            record.message = record.getMessage()
+            record.msg, record.args = record.message, None
+            if record.exc_info:
+                if not record.exc_text:
+                    record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None  # traceback e frames não vão para a fila
+            return record
+
+    return HandlerFila(fila)
+
+
+def _handler_console() -> logging.Handler:
+    formato = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    try:
+        import colorlog
+    except ImportError:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(formato))
+        return handler
+
+    handler = colorlog.StreamHandler()
+    handler.setFormatter(
+        colorlog.ColoredFormatter(
+            "%(log_color)s" + formato,
+            log_colors={
+                'DEBUG': 'cyan',
+                'INFO': 'green',
+                'WARNING': 'yellow',
+                'ERROR': 'red',
+                'CRITICAL': 'red,bg_white',
+            }
+        )
+    )
+    return handler
+
+
+def configurar_logs(nivel: Union[int, str] = "INFO", niveis: Optional[Dict[str, Union[int, str]]] = None,
+                    arquivo_json: Optional[Union[str, os.PathLike]] = None, max_bytes: int = 10 * 1024 * 1024,
+                    backups: int = 5, console: bool = True, amostragem: Optional[tuple] = (20, 10.0)
+                    ) -> logging.Logger:
+    """
+    Configura os logs da camada de dados (pode ser chamada de novo para reconfigurar).
+
+    Args:
+        nivel: Nível geral do logger SQLiteDB
+        niveis: Nível por categoria, ex.: {"consulta": "DEBUG", "ponto": "WARNING"}
+        arquivo_json: Se informado, grava também uma linha JSON por registro neste
+                      arquivo, com rotação (RotatingFileHandler)
+        max_bytes: Tamanho de cada arquivo JSON antes da rotação
+        backups: Quantidade de arquivos rotacionados mantidos
+        console: Mostra os registros no terminal (colorido, se houver colorlog)
+        amostragem: (primeiras, intervalo) do FiltroAmostragem; None desliga
+
+    Returns:
+        logging.Logger: O logger raiz SQLiteDB
+
+    PONTO_LOG, se definida, tem precedência sobre nivel/niveis.
+    """
+    import logging.handlers
+    import queue
+
+    global _listener
+    raiz = obter_logger()
+    with _trava:
+        parar_logs()
+
+        handlers = []
+        if console:
+            handlers.append(_handler_console())
+        if arquivo_json:
+            arquivo = logging.handlers.RotatingFileHandler(
+                arquivo_json, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+            )
+            arquivo.setFormatter(FormatadorJSON())
+            handlers.append(arquivo)
+
+        fila = queue.SimpleQueue()
+        handler_fila = _handler_fila(fila)
+        if amostragem:
+            handler_fila.addFilter(FiltroAmostragem(*amostragem))
+        for antigo in list(raiz.handlers):
+            raiz.removeHandler(antigo)
+        raiz.addHandler(handler_fila)
+        raiz.propagate = False
+
+        ambiente = _niveis_ambiente()
+        raiz.setLevel(ambiente.pop(None, nivel))
+        for categoria, nivel_categoria in {**(niveis or {}), **ambiente}.items():
+            obter_logger(categoria).setLevel(nivel_categoria)
+
+        _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+        _listener.start()
+    return raiz
+
+
+def parar_logs() -> None:
+    """Esvazia a fila e para a thread de escrita dos logs (chamada também na saída do programa)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(parar_logs)
@@ -0,0 +1,75 @@
+"""
+Relatórios entregues em blocos e canceláveis, para rodar fora da thread da interface
+(ver janelas/tarefa_relatorio.py).
+
+Cada relatório de RELATORIOS aponta para um método gerador de BancoSQLite que entrega
+o resultado em listas de até `tamanho_bloco` linhas (as mesmas tuplas do método que
+devolve a lista inteira) e traz os títulos das colunas. executar_relatorio roda o
+gerador dentro de BancoSQLite.cancelavel: ao sinalizar o Event de cancelamento, a
+consulta em andamento é interrompida pelo progress handler do SQLite e o gerador
+levanta RelatorioCancelado.
+"""
+import threading
+from typing import Iterator, List, Optional
+
+
+class RelatorioCancelado(Exception):
+    """O relatório foi cancelado antes de terminar."""
+
+
+class Relatorio:
+    """Método gerador de BancoSQLite e títulos das colunas de um relatório."""
+
+    __slots__ = ("metodo", "colunas")
+
+    def __init__(self, metodo: str, colunas: tuple):
+        self.metodo = metodo
+        self.colunas = colunas
+
+
+RELATORIOS = {
+    # visualiza_ponto_filtro(mes_ano, employee_id)
+    "ponto_mes": Relatorio("visualiza_ponto_blocos", (
+        "CPF", "Nome", "Data", "Entrada manhã", "Saída manhã", "Entrada tarde", "Saída tarde",
+    )),
+    # calcular_horas_extras_faltantes_por_empresa(empresa, data_inicial, data_final, motor=...)
+    "horas_extras_faltantes": Relatorio("horas_extras_faltantes_blocos", (
+        "Nome", "Empresa", "Data", "Trabalhado", "Extras", "Faltantes",
+    )),
+}
+
+
+def obter_relatorio(nome: str) -> Relatorio:
+    relatorio = RELATORIOS.get(nome)
+    if relatorio is None:
+        raise ValueError(f"Relatório desconhecido: {nome!r} (disponíveis: {', '.join(RELATORIOS)})")
+    return relatorio
+
+
+def executar_relatorio(db, nome: str, *argumentos, cancelamento: Optional[threading.Event] = None,
+                       tamanho_bloco: int = 500, **opcoes) -> Iterator[List[tuple]]:
+    """
+    Executa um relatório de RELATORIOS na thread atual, bloco a bloco.
+
+    Args:
+        db: Instância de BancoSQLite
+        nome: Nome do relatório em RELATORIOS
+        *argumentos, **opcoes: Argumentos do método do relatório
+        cancelamento: Event que, sinalizado, interrompe o relatório
+        tamanho_bloco: Linhas por bloco
+
+    Yields:
+        list: Bloco de linhas
+
+    Raises:
+        RelatorioCancelado: cancelamento foi sinalizado
+    """
+    gerador = getattr(db, obter_relatorio(nome).metodo)
+    cancelamento = cancelamento or threading.Event()
+    if cancelamento.is_set():  # cancelado antes de a tarefa sair da fila
+        raise RelatorioCancelado(nome)
+    with db.cancelavel(cancelamento):
+        for bloco in gerador(*argumentos, tamanho_bloco=tamanho_bloco, **opcoes):
+            if cancelamento.is_set():
+                raise RelatorioCancelado(nome)
+            yield bloco
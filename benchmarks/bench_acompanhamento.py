@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do acompanhamento em tempo real (BancoSQLite.acompanhar_arquivos).
+
+Um arquivo do REP com um dia de marcações recebe acréscimos de poucas linhas (às
+vezes com a última linha pela metade). Compara o custo de cada atualização relendo
+o arquivo inteiro (importar_afd, como hoje) com a leitura só do acréscimo
+(importar_acrescimo), mede a latência entre gravar no arquivo e a marcação estar em
+ponto com inotify e com polling, e confere que a tabela ponto fica igual à de uma
+importação completa, inclusive depois de o arquivo ser trocado por outro. Relendo o
+arquivo inteiro, a linha que o REP ainda está gravando vira uma marcação com CPF
+cortado; o acompanhamento só lê linhas completas.
+
+Uso: python benchmarks/bench_acompanhamento.py [linhas_iniciais]
+"""
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+# "ANSI" só existe no Windows; no benchmark usamos o equivalente explícito
+ENCODING = "cp1252"
+CPFS = [f"{i * 7919:011d}" for i in range(1, 3001)]
+
+
+def linhas_afd(inicio, quantidade):
+    """Linhas do REP com NSR a partir de `inicio`, em ordem cronológica no dia 2025-03-10."""
+    for nsr in range(inicio, inicio + quantidade):
+        segundos = 6 * 3600 + nsr // 4
+        h, resto = divmod(segundos, 3600)
+        m, s = divmod(resto, 60)
+        yield (f"{nsr:09d}3" f"2025-03-10T{h:02d}:{m:02d}:{s:02d}-0300"
+               f"{CPFS[nsr % len(CPFS)]}{random.randrange(16 ** 4):04X}\n")
+
+
+def acrescentar(caminho, texto):
+    with open(caminho, "a", encoding=ENCODING) as f:
+        f.write(texto)
+        f.flush()
+
+
+def conteudo(db):
+    return db.conn.execute("SELECT cpf, timestamp, tipo, codigo_empresa FROM ponto ORDER BY cpf, timestamp").fetchall()
+
+
+def contar(db):
+    return db.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+
+
+def medir_latencia(db, caminho, inotify, nsr, repeticoes=10):
+    """Acrescenta uma linha por vez e mede quanto tempo ela leva para aparecer em ponto."""
+    parar = threading.Event()
+    acompanhamento = threading.Thread(target=db.acompanhar_arquivos, args=(caminho, 1),
+                                      kwargs={"parar": parar, "encoding": ENCODING, "inotify": inotify,
+                                              "intervalo": 0.5})
+    acompanhamento.start()
+    time.sleep(1.0)  # leitura inicial
+    latencias = []
+    for _ in range(repeticoes):
+        antes = contar(db)
+        inicio = time.perf_counter()
+        acrescentar(caminho, next(linhas_afd(nsr, 1)))
+        nsr += 1
+        while contar(db) == antes:
+            time.sleep(0.002)
+        latencias.append(time.perf_counter() - inicio)
+        time.sleep(random.uniform(0, 0.3))
+    parar.set()
+    acompanhamento.join()
+    return statistics.median(latencias), max(latencias), nsr
+
+
+def main():
+    iniciais = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    configurar_logs(nivel="CRITICAL")
+    random.seed(21)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "rep001.txt")
+        acrescentar(caminho, "".join(linhas_afd(1, iniciais)))
+        nsr = iniciais + 1
+        print(f"arquivo com {iniciais:,} linhas ({os.path.getsize(caminho) / 1024 / 1024:.1f} MiB)\n")
+
+        antigo = BancoSQLite(Path(pasta) / "antigo.db", perfil="importacao")
+        novo = BancoSQLite(Path(pasta) / "novo.db", perfil="importacao")
+        antigo.importar_afd(caminho, 1, encoding=ENCODING)
+        novo.importar_acrescimo(caminho, 1, encoding=ENCODING)
+
+        # Acréscimos de 1 a 20 linhas, às vezes terminando com uma linha incompleta
+        tempos_antigo, tempos_novo = [], []
+        pendente = ""
+        for _ in range(15):
+            texto = pendente + "".join(linhas_afd(nsr, random.randint(1, 20)))
+            nsr += texto.count("\n")
+            pendente = ""
+            if random.random() < 0.3:
+                extra = next(linhas_afd(nsr, 1))
+                nsr += 1
+                corte = random.randint(1, len(extra) - 1)
+                texto, pendente = texto + extra[:corte], extra[corte:]
+            acrescentar(caminho, texto)
+
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                antigo.importar_afd(caminho, 1, encoding=ENCODING)
+            tempos_antigo.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            novo.importar_acrescimo(caminho, 1, encoding=ENCODING)
+            tempos_novo.append(time.perf_counter() - inicio)
+        acrescentar(caminho, pendente)
+        novo.importar_acrescimo(caminho, 1, encoding=ENCODING)
+
+        # Referência: o arquivo completo importado de uma vez num banco novo
+        referencia = BancoSQLite(Path(pasta) / "referencia.db", perfil="importacao")
+        referencia.importar_afd(caminho, 1, encoding=ENCODING)
+        assert conteudo(referencia) == conteudo(novo), "tabela ponto diferente"
+
+        t_antigo, t_novo = statistics.median(tempos_antigo), statistics.median(tempos_novo)
+        print("por atualização (mediana de 15 acréscimos de 1 a 20 linhas)")
+        print(f"  importar_afd (arquivo inteiro)     {t_antigo * 1000:9.1f} ms   "
+              f"{contar(antigo) - contar(referencia)} marcações falsas de linhas incompletas")
+        print(f"  importar_acrescimo (só o novo)     {t_novo * 1000:9.1f} ms   {t_antigo / t_novo:,.0f}x\n")
+        antigo.fechar_conexao()
+
+        # Arquivo trocado por outro (ex.: REP reiniciado): lido de novo desde o início
+        os.replace(caminho, caminho + ".antigo")
+        acrescentar(caminho, "".join(linhas_afd(nsr, 50)))
+        nsr += 50
+        resultado = novo.importar_acrescimo(caminho, 1, encoding=ENCODING)
+        referencia.importar_afd(caminho, 1, encoding=ENCODING)
+        assert resultado["lidos"] == 50 and conteudo(referencia) == conteudo(novo), resultado
+        referencia.fechar_conexao()
+
+        print("latência do arquivo até ponto (mediana / máxima de 10 linhas)")
+        for nome, inotify in (("inotify", True), ("polling a cada 0,5 s", False)):
+            mediana, maxima, nsr = medir_latencia(novo, caminho, inotify, nsr)
+            print(f"  {nome:<34} {mediana * 1000:9.1f} ms / {maxima * 1000:.1f} ms")
+        novo.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backup online, verificação de restauração e compactação (banco.bkp_banco) num banco de GBs.
+
+Um ano de marcações de 10 empresas mais uma tabela de enchimento (randomblob) até o
+tamanho pedido. Enquanto o sistema grava uma marcação e lê o espelho do funcionário a
+cada 10 ms (outra thread, como a interface), mede:
+  - snapshot sem pausa entre os passos (padrão) x com pausa: MB/s do backup e a
+    latência das gravações/leituras (média, p99, máxima), comparadas com o sistema
+    sozinho;
+  - snapshot pulado (banco sem alterações);
+  - verificar_restauracao: restauração num arquivo temporário + integrity_check;
+  - compactar depois de apagar o enchimento: tempo, tamanho do arquivo antes/depois e
+    a latência do sistema durante a compactação.
+Com pouca memória livre o banco não cabe no cache do sistema e os números incluem a
+leitura do disco.
+
+Uso: python benchmarks/bench_backup.py [GiB] [funcionarios]
+"""
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_datas_inteiras import preparar  # noqa: E402
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.bkp_banco import BackupBanco  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+TAMANHO_BLOB = 3000
+CPF = "99999999999"
+
+
+def encher(db, gib):
+    """Acrescenta linhas de enchimento até o arquivo chegar a `gib` GiB."""
+    db.criar_tabela("enchimento", {"dados": "BLOB"})
+    alvo = int(gib * 2 ** 30)
+    while db.db_path.stat().st_size < alvo:
+        with db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO enchimento (dados)
+                WITH RECURSIVE r(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM r WHERE n < 20000)
+                SELECT randomblob(?) FROM r
+            """, (TAMANHO_BLOB,))
+        db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+class Sistema:
+    """Thread que grava uma marcação e lê o espelho do funcionário a cada 10 ms, medindo cada operação."""
+
+    def __init__(self, db):
+        self.db = db
+        self.latencias = []
+        self._parar = threading.Event()
+        self._segundo = 0
+        self._thread = None
+
+    def __enter__(self):
+        self.latencias = []
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+    def _executar(self):
+        while not self._parar.is_set():
+            segundo = self._segundo = self._segundo + 1
+            horario = f"{segundo // 3600 % 24:02d}:{segundo // 60 % 60:02d}:{segundo % 60:02d}"
+            inicio = time.perf_counter()
+            self.db.inserir_atualizar_ponto(CPF, f"2025-{segundo // 86400 % 12 + 1:02d}-02T{horario}-0300",
+                                            "entrada", 1)
+            self.db.conn.execute("SELECT timestamp, tipo FROM ponto WHERE cpf = ? ORDER BY timestamp DESC LIMIT 20",
+                                 (CPF,)).fetchall()
+            self.latencias.append(time.perf_counter() - inicio)
+            time.sleep(0.01)
+        self.db.pool.fechar_conexao_thread()
+
+    def resumo(self):
+        latencias = sorted(self.latencias)
+        p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+        return (f"{len(latencias):5d} operações   média {statistics.mean(latencias) * 1000:6.1f} ms   "
+                f"p99 {p99 * 1000:6.1f} ms   máxima {latencias[-1] * 1000:7.1f} ms")
+
+
+def main():
+    gib = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    funcionarios = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    configurar_logs(nivel="ERROR")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "ponto.db")
+        inicio = time.perf_counter()
+        preparar(db, funcionarios)
+        encher(db, gib)
+        marcacoes = db.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+        tamanho = db.db_path.stat().st_size
+        print(f"banco de {tamanho / 2 ** 30:.2f} GiB ({marcacoes:,} marcações + enchimento), "
+              f"gerado em {time.perf_counter() - inicio:.0f} s\n")
+
+        with Sistema(db) as sistema:
+            time.sleep(3)
+        print(f"{'sistema sozinho (3 s)':<34} {sistema.resumo()}\n")
+
+        backup = BackupBanco(db, Path(pasta) / "backups", manter=2)
+        for titulo, pausa in (("snapshot sem pausa (padrão)", 0.0), ("snapshot, pausa de 5 ms por passo", 0.005)):
+            backup.pausa = pausa
+            with Sistema(db) as sistema:
+                entrada = backup.snapshot(forcar=True)
+            print(f"{titulo:<34} {entrada['bytes'] / 2 ** 20 / entrada['segundos']:5.0f} MB/s   "
+                  f"{entrada['segundos']:6.1f} s")
+            print(f"  {'sistema durante o backup':<32} {sistema.resumo()}")
+
+        backup.pausa = 0.0
+        backup.snapshot()  # as gravações do sistema durante o último snapshot entram neste
+        inicio = time.perf_counter()
+        pulado = backup.snapshot()
+        print(f"\n{'snapshot sem alterações':<34} {'pulado' if pulado is None else 'COPIADO'} em "
+              f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        resultado = backup.verificar_restauracao()
+        assert resultado["ok"], resultado["erros"]
+        print(f"{'verificar_restauracao':<34} restauração {resultado['segundos_restauracao']:6.1f} s   "
+              f"integrity_check + contagens {resultado['segundos_verificacao']:6.1f} s")
+        print(f"snapshots mantidos: {', '.join(entrada['arquivo'] for entrada in backup.snapshots())}\n")
+
+        db.deleta_todos_dados("enchimento")
+        with Sistema(db) as sistema:
+            resultado = backup.compactar()
+        # Com as leituras do sistema em andamento o checkpoint da compactação pode ficar parcial
+        db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        print(f"compactar após apagar o enchimento: {resultado['paginas_liberadas']:,} páginas em "
+              f"{resultado['segundos']:.1f} s, {resultado['bytes_antes'] / 2 ** 20:,.0f} -> "
+              f"{db.db_path.stat().st_size / 2 ** 20:,.0f} MiB")
+        print(f"  {'sistema durante a compactação':<32} {sistema.resumo()}")
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do SQL dinâmico das operações genéricas: montagem por f-string a cada
+chamada (como era antes de banco.construtor_sql) contra o SQL memorizado, com os
+dicionários chegando com as colunas em ordens diferentes.
+
+Mede (1) só a montagem do SQL e (2) a consulta completa (montagem + execução),
+onde a ordem variável das colunas também faz o cache de statements do sqlite3 errar.
+
+Uso: python benchmarks/bench_construtor_sql.py [chamadas]
+"""
+import itertools
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.construtor_sql import ConstrutorSQL  # noqa: E402
+
+COLUNAS = [f"campo_{i:02d}" for i in range(12)]
+
+
+def sql_antes(tabela, filtros):
+    """Montagem original de consultar_registros."""
+    query = f"SELECT * FROM {tabela}"
+    if filtros:
+        where_clause = ' AND '.join([f"{campo} = ?" for campo in filtros.keys()])
+        query += f" WHERE {where_clause}"
+    return query
+
+
+def sql_depois(construtor, tabela, filtros):
+    return construtor.selecionar(tabela, tuple(sorted(filtros)))
+
+
+def medir(nome, funcao, chamadas):
+    inicio = time.perf_counter()
+    funcao()
+    decorrido = time.perf_counter() - inicio
+    print(f"{nome:<40} {decorrido / chamadas * 1e6:8.2f} µs/chamada")
+    return decorrido
+
+
+def main():
+    chamadas = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rnd = random.Random(1)
+
+    # Filtros de 4 colunas em ordem aleatória: muitos textos de SQL diferentes para o mesmo conjunto
+    filtros = []
+    for _ in range(chamadas):
+        colunas = rnd.sample(COLUNAS, 4)
+        filtros.append({coluna: rnd.randrange(10) for coluna in colunas})
+    print(f"{chamadas} chamadas; {len({tuple(f) for f in filtros})} ordens de colunas distintas, "
+          f"{len({tuple(sorted(f)) for f in filtros})} conjuntos distintos "
+          f"(de {len(list(itertools.combinations(COLUNAS, 4)))} possíveis)\n")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = str(Path(pasta) / "bench.db")
+        conn = sqlite3.connect(caminho)
+        conn.execute(f"CREATE TABLE registros (id INTEGER PRIMARY KEY, {', '.join(f'{c} INTEGER' for c in COLUNAS)})")
+        conn.executemany(
+            f"INSERT INTO registros ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})",
+            [[rnd.randrange(10) for _ in COLUNAS] for _ in range(200)]
+        )
+        conn.commit()
+        conn.close()
+
+        antes_conn = sqlite3.connect(caminho)  # cached_statements padrão (128)
+        depois_conn = sqlite3.connect(caminho, cached_statements=512)
+        construtor = ConstrutorSQL(lambda: depois_conn)
+
+        print("Montagem do SQL")
+        t_antes = medir("  antes (f-string a cada chamada)", lambda: [sql_antes("registros", f) for f in filtros],
+                        chamadas)
+        t_depois = medir("  depois (ConstrutorSQL memorizado)",
+                         lambda: [sql_depois(construtor, "registros", f) for f in filtros], chamadas)
+        print(f"  {t_antes / t_depois:.1f}x\n")
+
+        def consultar_antes():
+            for f in filtros:
+                antes_conn.execute(sql_antes("registros", f), list(f.values())).fetchall()
+
+        def consultar_depois():
+            for f in filtros:
+                colunas = tuple(sorted(f))
+                depois_conn.execute(construtor.selecionar("registros", colunas), [f[c] for c in colunas]).fetchall()
+
+        print("Consulta completa (montagem + prepare + execução)")
+        t_antes = medir("  antes", consultar_antes, chamadas)
+        t_depois = medir("  depois", consultar_depois, chamadas)
+        print(f"  {t_antes / t_depois:.1f}x")
+
+        antes_conn.close()
+        depois_conn.close()
+
+
+if __name__ == "__main__":
+    main()
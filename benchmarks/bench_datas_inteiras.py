@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filtros de mês e de período em ponto: texto ISO x colunas inteiras (migração 6).
+
+Para cada filtro compara o LIKE/substr sobre ponto.timestamp (sem índice utilizável),
+a faixa de texto no índice antigo idx_ponto_timestamp (recriado só para a comparação)
+e a faixa em dia_local no índice idx_ponto_dia_local, devolvendo as mesmas linhas
+(CPF, dia, segundos do dia e tipo, como o motor vetorizado lê). Mediana de 5 execuções.
+
+Uso: python benchmarks/bench_datas_inteiras.py [funcionarios]
+"""
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.apuracao import dia_local  # noqa: E402
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.migracoes import DIA_LOCAL_SQL, SEGUNDO_LOCAL_SQL  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+SEGUNDOS_TEXTO = SEGUNDO_LOCAL_SQL.format(timestamp="timestamp")
+LINHAS_TEXTO = f"SELECT cpf, substr(timestamp, 1, 10), {SEGUNDOS_TEXTO}, tipo FROM ponto"
+LINHAS_INTEIRO = "SELECT cpf, dia_local, segundo_local, tipo FROM ponto"
+
+
+def preparar(db, funcionarios):
+    with db.transaction() as cursor:
+        # Quatro marcações por dia útil de 2024, dez empresas
+        cursor.execute(f"""
+            WITH RECURSIVE dias(data) AS (
+                SELECT date('2024-01-01') UNION ALL SELECT date(data, '+1 day') FROM dias WHERE data < '2024-12-31'
+            ),
+            funcionarios(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM funcionarios WHERE n < ?),
+            marcacoes AS (
+                SELECT printf('%011d', n * 7919) AS cpf, dias.data || 'T' || h.hora || '-0300' AS timestamp,
+                       h.tipo, n % 10 + 1 AS codigo_empresa
+                FROM funcionarios CROSS JOIN dias
+                CROSS JOIN (SELECT '08:00:00' AS hora, 'entrada' AS tipo UNION ALL SELECT '12:00:00', 'saida'
+                            UNION ALL SELECT '13:00:00', 'entrada' UNION ALL SELECT '17:00:00', 'saida') h
+                WHERE strftime('%w', dias.data) NOT IN ('0', '6')
+            )
+            INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa, dia_local, segundo_local)
+            SELECT cpf, timestamp, tipo, codigo_empresa,
+                   {DIA_LOCAL_SQL.format(timestamp="timestamp")}, {SEGUNDOS_TEXTO}
+            FROM marcacoes
+        """, (funcionarios,))
+        cursor.execute("DELETE FROM ponto_dia_pendente")  # a apuração diária não entra na medição
+        cursor.execute("CREATE INDEX idx_ponto_timestamp ON ponto (timestamp, cpf, tipo, codigo_empresa)")
+    db.conn.execute("ANALYZE")
+
+
+def medir(db, consulta, parametros):
+    tempos = []
+    for _ in range(5):
+        inicio = time.perf_counter()
+        linhas = db.conn.execute(consulta, parametros).fetchall()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), sorted(linhas, key=str)
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    configurar_logs(nivel="WARNING")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "datas.db")
+        preparar(db, funcionarios)
+        total = db.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+        print(f"{funcionarios} funcionários, {total:,} marcações em 2024\n")
+
+        fev, mar = dia_local("2024-02-01"), dia_local("2024-03-01")
+        tri_inicio, tri_fim = dia_local("2024-04-01"), dia_local("2024-06-30")
+        cenarios = [
+            ("mês (fev/2024), empresa 3", [
+                ("LIKE 'AAAA-MM-%'", f"{LINHAS_TEXTO} WHERE timestamp LIKE ? AND codigo_empresa = ?",
+                 ("2024-02-%", 3)),
+                ("substr(timestamp, 1, 7) = ?", f"{LINHAS_TEXTO} WHERE substr(timestamp, 1, 7) = ? "
+                                                f"AND codigo_empresa = ?", ("2024-02", 3)),
+                ("faixa de texto (idx_ponto_timestamp)", f"{LINHAS_TEXTO} INDEXED BY idx_ponto_timestamp "
+                                                         f"WHERE timestamp >= ? AND timestamp < ? "
+                                                         f"AND codigo_empresa = ?", ("2024-02", "2024-03", 3)),
+                ("dia_local (idx_ponto_dia_local)", f"{LINHAS_INTEIRO} WHERE dia_local >= ? AND dia_local < ? "
+                                                    f"AND codigo_empresa = ?", (fev, mar, 3)),
+            ]),
+            ("período (2º trimestre), todas as empresas", [
+                ("substr(timestamp, 1, 10) BETWEEN", f"{LINHAS_TEXTO} WHERE substr(timestamp, 1, 10) "
+                                                     f"BETWEEN ? AND ?", ("2024-04-01", "2024-06-30")),
+                ("faixa de texto (idx_ponto_timestamp)", f"{LINHAS_TEXTO} INDEXED BY idx_ponto_timestamp "
+                                                         f"WHERE timestamp >= ? AND timestamp < ?",
+                 ("2024-04-01", "2024-06-30\x7f")),
+                ("dia_local (idx_ponto_dia_local)", f"{LINHAS_INTEIRO} WHERE dia_local BETWEEN ? AND ?",
+                 (tri_inicio, tri_fim)),
+            ]),
+        ]
+
+        for titulo, variantes in cenarios:
+            print(titulo)
+            referencia = None
+            for nome, consulta, parametros in variantes:
+                decorrido, linhas = medir(db, consulta, parametros)
+                # Texto devolve a data 'AAAA-MM-DD'; o inteiro, dias desde 1970
+                normalizadas = [(cpf, dia if isinstance(dia, int) else dia_local(dia), segundos, tipo)
+                                for cpf, dia, segundos, tipo in linhas]
+                normalizadas.sort()
+                if referencia is None:
+                    referencia, base = normalizadas, decorrido
+                assert normalizadas == referencia, f"{nome}: linhas diferentes"
+                print(f"  {nome:<40} {decorrido * 1000:8.1f} ms  {base / decorrido:5.1f}x  "
+                      f"{len(linhas):,} linhas")
+            print()
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
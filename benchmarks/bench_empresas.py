@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Um banco por empresa (banco.empresas) x o banco único.
+
+Um ano de marcações de 10 empresas num banco só é separado com dividir_banco. Depois:
+  - consultas entre empresas: o banco único x RoteadorEmpresas.consultar (uma conexão
+    por banco, em paralelo) x RoteadorEmpresas.anexados (ATTACH + visões), conferindo
+    que as linhas são as mesmas;
+  - disputa pela trava: enquanto um VACUUM roda em laço no banco da empresa 1 (ou no
+    banco único), a empresa 2 grava uma marcação a cada 10 ms; mede a espera de cada
+    gravação.
+
+Uso: python benchmarks/bench_empresas.py [funcionarios]
+"""
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_datas_inteiras import preparar  # noqa: E402
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.empresas import RoteadorEmpresas, dividir_banco  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+CONSULTAS = [
+    ("marcações por empresa e mês",
+     "SELECT codigo_empresa, substr(timestamp, 1, 7), COUNT(*), COUNT(DISTINCT cpf) FROM ponto "
+     "GROUP BY 1, 2 ORDER BY 1, 2", (), lambda linha: (linha[0], linha[1])),
+    ("marcações de um dia com o nome",
+     "SELECT p.cpf, f.nome, p.timestamp, p.tipo FROM ponto p JOIN cadastro_funcionario f ON f.CPF = p.cpf "
+     "WHERE p.dia_local = ? ORDER BY p.cpf, p.timestamp", (19800,), lambda linha: (linha[0], linha[2])),
+]
+
+
+def medir(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, statistics.median(tempos)
+
+
+def disputa(caminho_manutencao, db_gravacao, segundos=3.0):
+    """Latências das gravações de db_gravacao com VACUUM em laço em caminho_manutencao."""
+    parar = threading.Event()
+
+    def manutencao():
+        conn = sqlite3.connect(caminho_manutencao, timeout=30)
+        while not parar.is_set():
+            conn.execute("VACUUM")
+        conn.close()
+
+    tarefa = threading.Thread(target=manutencao)
+    tarefa.start()
+    time.sleep(0.2)
+    latencias, segundo = [], 8 * 3600
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        horario = f"{segundo // 3600:02d}:{segundo // 60 % 60:02d}:{segundo % 60:02d}"
+        inicio = time.perf_counter()
+        db_gravacao.inserir_atualizar_ponto("99999999999", f"2025-06-02T{horario}-0300", "entrada", 2)
+        latencias.append(time.perf_counter() - inicio)
+        segundo += 1
+        time.sleep(0.01)
+    parar.set()
+    tarefa.join()
+    return latencias
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    configurar_logs(nivel="ERROR")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        origem = Path(pasta) / "unico.db"
+        unico = BancoSQLite(origem)
+        preparar(unico, funcionarios)
+        unico.criar_tabela("cadastro_funcionario", {"nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER"})
+        with unico.transaction() as cursor:
+            cursor.execute("INSERT INTO cadastro_funcionario (nome, CPF, empresa) "
+                           "SELECT DISTINCT 'Funcionario ' || cpf, cpf, codigo_empresa FROM ponto")
+            cursor.execute("DROP INDEX idx_ponto_timestamp")  # criado por preparar só para a comparação dele
+        total = unico.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+        unico.fechar_conexao()
+        print(f"{funcionarios} funcionários em 10 empresas, {total:,} marcações em 2024 "
+              f"({origem.stat().st_size / 2 ** 20:.0f} MiB)\n")
+
+        inicio = time.perf_counter()
+        resumo = dividir_banco(origem, Path(pasta) / "empresas")
+        assert sum(copiadas["ponto"] for copiadas in resumo.values()) == total
+        print(f"dividir_banco: {len(resumo)} bancos em {time.perf_counter() - inicio:.1f} s\n")
+
+        unico = BancoSQLite(origem)
+        empresas = RoteadorEmpresas(Path(pasta) / "empresas")
+        for titulo, consulta, parametros, chave in CONSULTAS:
+            referencia, t_unico = medir(lambda: unico.conn.execute(consulta, parametros).fetchall())
+            paralelo, t_paralelo = medir(lambda: empresas.consultar(consulta, parametros, chave=chave))
+            with empresas.anexados() as conn:
+                anexado, t_anexado = medir(lambda: conn.execute(consulta, parametros).fetchall())
+            assert referencia == paralelo == anexado, titulo
+            print(f"{titulo} ({len(referencia):,} linhas)")
+            print(f"  banco único                 {t_unico * 1000:8.1f} ms")
+            print(f"  consultar (paralelo)        {t_paralelo * 1000:8.1f} ms")
+            print(f"  anexados (ATTACH + visões)  {t_anexado * 1000:8.1f} ms")
+
+        print("\ngravações da empresa 2 durante VACUUM em laço da empresa 1 (3 s)")
+        for titulo, caminho, db in (("banco único", origem, unico),
+                                    ("um banco por empresa", empresas.caminho(1), empresas.banco(2))):
+            latencias = disputa(caminho, db)
+            print(f"  {titulo:<22} {len(latencias):4d} gravações   média {statistics.mean(latencias) * 1000:7.1f} ms"
+                  f"   máxima {max(latencias) * 1000:7.1f} ms")
+        empresas.fechar()
+        unico.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da exportação do ponto para a folha (um ano, todas as empresas).
+
+Compara a lógica anterior de exporta_ponto_periodo (fetchall, linhas montadas em
+Python e sort() da lista inteira), o exporta_ponto_periodo atual (linha montada e
+ordenada no SQLite) e exportar_ponto_arquivo (gravação em blocos direto no arquivo),
+conferindo que o conteúdo é o mesmo. Mede tempo e pico de memória (tracemalloc).
+Também mede os layouts AFD e AFDT do arquivo.
+
+Uso: python benchmarks/bench_exportacao.py [funcionarios]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+
+def exporta_antigo(db, data_inicio_iso, data_fim_iso):
+    """Cópia da lógica anterior de exporta_ponto_periodo."""
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT f.n_folha, f.pis_pasep, f.CPF as cpf, d.data, d.entrada_manha
+        FROM ponto_dia d
+        JOIN cadastro_funcionario f ON d.cpf = f.CPF
+        JOIN cadastro_empresa e ON d.codigo_empresa = e.id
+        WHERE d.data BETWEEN ? AND ?
+    """, (data_inicio_iso, data_fim_iso))
+    resultado = []
+    for empresa_id, pis, cpf, data_registro, entrada_manha in cursor.fetchall():
+        ano_, mes_, dia = data_registro.split('-')
+        minuto = entrada_manha[3:5] if entrada_manha else "00"
+        if not pis or pis.strip() == "":
+            pis = cpf
+        resultado.append(f"{empresa_id:04d}{pis.zfill(11)}{dia}{mes_}{ano_}:{minuto}")
+    resultado.sort()
+    return resultado
+
+
+def preparar(db, funcionarios):
+    db.criar_tabela("cadastro_empresa", {"nome": "TEXT", "cnpj": "TEXT", "razao_social": "TEXT"})
+    db.criar_tabela("cadastro_funcionario", {
+        "nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER", "n_folha": "INTEGER", "pis_pasep": "TEXT",
+    })
+    with db.transaction() as cursor:
+        cursor.executemany("INSERT INTO cadastro_empresa (id, nome, cnpj) VALUES (?, ?, ?)",
+                           [(e, f"Empresa {e}", f"{e:014d}") for e in range(1, 11)])
+        cursor.executemany(
+            "INSERT INTO cadastro_funcionario (nome, CPF, empresa, n_folha, pis_pasep) VALUES (?, ?, ?, ?, ?)",
+            [(f"Funcionario {i}", f"{i * 7919:011d}", i % 10 + 1, i % 5000, "" if i % 3 else f"{i:011d}")
+             for i in range(funcionarios)])
+        # Um ano de apuração diária (dias úteis), direto em ponto_dia, e as marcações de um mês em ponto
+        cursor.execute("""
+            WITH RECURSIVE dias(data) AS (
+                SELECT date('2024-01-01') UNION ALL SELECT date(data, '+1 day') FROM dias WHERE data < '2024-12-31'
+            )
+            INSERT INTO ponto_dia (cpf, data, codigo_empresa, entrada_manha, saida_manha, entrada_tarde, saida_tarde)
+            SELECT f.CPF, dias.data, f.empresa, printf('08:%02d:00', (f.id + julianday(dias.data)) % 60),
+                   '12:00:00', '13:00:00', '17:00:00'
+            FROM cadastro_funcionario f CROSS JOIN dias
+            WHERE strftime('%w', dias.data) NOT IN ('0', '6')
+        """)
+        cursor.execute("""
+            INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa)
+            SELECT d.cpf, d.data || 'T' || h.hora || '-0300', h.tipo, d.codigo_empresa
+            FROM ponto_dia d
+            CROSS JOIN (SELECT '08:00:00' AS hora, 'entrada' AS tipo UNION ALL SELECT '12:00:00', 'saida'
+                        UNION ALL SELECT '13:00:00', 'entrada' UNION ALL SELECT '17:00:00', 'saida') h
+            WHERE d.data BETWEEN '2024-03-01' AND '2024-03-31'
+        """)
+        cursor.execute("DELETE FROM ponto_dia_pendente")
+
+
+def medir(nome, funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    decorrido = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<44} {decorrido:7.3f} s   pico {pico / 1024 / 1024:8.1f} MiB")
+    return resultado, decorrido
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    configurar_logs(nivel="WARNING")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "exportacao.db")
+        preparar(db, funcionarios)
+        dias = db.conn.execute("SELECT COUNT(*) FROM ponto_dia").fetchone()[0]
+        print(f"{funcionarios} funcionários, {dias} dias apurados em 2024\n")
+
+        destino = os.path.join(pasta, "folha.txt")
+        antes, t_antes = medir("antes (fetchall + sort em Python)",
+                               lambda: exporta_antigo(db, "2024-01-01", "2024-12-31"))
+        lista, _ = medir("exporta_ponto_periodo (ordem do SQLite)",
+                         lambda: db.exporta_ponto_periodo("01/01/2024", "31/12/2024"))
+        estatisticas, t_arquivo = medir("exportar_ponto_arquivo minutos (streaming)",
+                                        lambda: db.exportar_ponto_arquivo(destino, "01/01/2024", "31/12/2024"))
+        with open(destino, encoding="cp1252") as arquivo:
+            assert antes == lista == arquivo.read().splitlines(), "conteúdo diferente"
+        print(f"  {estatisticas['linhas_por_segundo']:,} linhas/s, {estatisticas['mb_por_segundo']} MiB/s, "
+              f"{t_antes / t_arquivo:.1f}x mais rápido que antes\n")
+
+        for layout in ("afd", "afdt"):
+            estatisticas, _ = medir(f"exportar_ponto_arquivo {layout} (mar/2024, empresa 1)",
+                                    lambda: db.exportar_ponto_arquivo(destino, "01/03/2024", "31/03/2024",
+                                                                      layout=layout, codigo_empresa=1))
+            print(f"  {estatisticas['linhas']:,} linhas, {estatisticas['linhas_por_segundo']:,} linhas/s")
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da exportação colunar (BancoSQLite.exportar_colunar).
+
+Compara a leitura que a equipe de BI fazia direto no arquivo (pandas.read_sql de
+todo o ponto_dia com o cadastro e um único to_parquet) com a exportação em blocos
+particionada por empresa e mês, nos três formatos, e mede a exportação incremental
+depois de um dia de marcações novas. Mede tempo e pico de memória (tracemalloc mais
+o pico do pool de memória do Arrow, que o tracemalloc não enxerga) e confere que o
+conjunto de dados particionado tem as mesmas linhas da tabela.
+
+Uso: python benchmarks/bench_exportacao_colunar.py [funcionarios]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pyarrow as pa  # noqa: E402
+import pyarrow.dataset as ds  # noqa: E402
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+
+def exporta_antigo(db, destino):
+    """Leitura do BI: a tabela inteira num DataFrame e um único arquivo Parquet."""
+    import pandas as pd
+
+    tabela = pd.read_sql_query("""
+        SELECT d.*, f.nome, f.n_folha, f.pis_pasep
+        FROM ponto_dia d LEFT JOIN cadastro_funcionario f ON f.CPF = d.cpf
+    """, db.conn)
+    tabela.to_parquet(destino)
+    return {"linhas": len(tabela)}
+
+
+def preparar(db, funcionarios):
+    db.criar_tabela("cadastro_funcionario", {
+        "nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER", "n_folha": "INTEGER", "pis_pasep": "TEXT",
+    })
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO cadastro_funcionario (nome, CPF, empresa, n_folha, pis_pasep) VALUES (?, ?, ?, ?, ?)",
+            [(f"Funcionario {i}", f"{i * 7919:011d}", i % 10 + 1, i % 5000, "" if i % 3 else f"{i:011d}")
+             for i in range(funcionarios)])
+        # Quatro marcações por dia útil do primeiro semestre; ponto_dia vem dos triggers
+        cursor.execute("""
+            WITH RECURSIVE dias(data) AS (
+                SELECT date('2024-01-01') UNION ALL SELECT date(data, '+1 day') FROM dias WHERE data < '2024-06-30'
+            )
+            INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa)
+            SELECT f.CPF, dias.data || 'T' || h.hora || '-0300', h.tipo, f.empresa
+            FROM cadastro_funcionario f
+            CROSS JOIN dias
+            CROSS JOIN (SELECT '08:00:00' AS hora, 'entrada' AS tipo UNION ALL SELECT '12:00:00', 'saida'
+                        UNION ALL SELECT '13:00:00', 'entrada' UNION ALL SELECT '17:00:00', 'saida') h
+            WHERE strftime('%w', dias.data) NOT IN ('0', '6')
+        """)
+    db.atualizar_ponto_dia()
+
+
+def medir(nome, funcao):
+    """Tempo da primeira execução; memória numa segunda, com tracemalloc ligado."""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    decorrido = time.perf_counter() - inicio
+
+    pool = pa.default_memory_pool()
+    pico_arrow_antes = pool.max_memory()
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pico += max(pool.max_memory() - pico_arrow_antes, 0)
+    print(f"{nome:<40} {decorrido:7.3f} s   pico {pico / 1024 / 1024:8.1f} MiB   "
+          f"{resultado['linhas']:>9,} linhas")
+    return resultado, decorrido
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    configurar_logs(nivel="WARNING")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "colunar.db")
+        preparar(db, funcionarios)
+        marcacoes = db.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+        dias = db.conn.execute("SELECT COUNT(*) FROM ponto_dia").fetchone()[0]
+        print(f"{funcionarios} funcionários, {marcacoes:,} marcações e {dias:,} dias apurados (1º semestre)\n")
+
+        medir("antes (read_sql + to_parquet)", lambda: exporta_antigo(db, os.path.join(pasta, "antes.parquet")))
+        for formato in ("parquet", "csv", "xlsx"):
+            if formato == "xlsx" and funcionarios > 500:
+                continue  # openpyxl grava algumas dezenas de milhares de linhas/s
+            destino = os.path.join(pasta, formato)
+            medir(f"resumo_diario {formato}",
+                  lambda: db.exportar_colunar(destino, "resumo_diario", formato, incremental=False))
+        medir("marcacoes parquet", lambda: db.exportar_colunar(
+            os.path.join(pasta, "parquet"), "marcacoes", incremental=False))
+
+        for conjunto, linhas in (("resumo_diario", dias), ("marcacoes", marcacoes)):
+            tabela = ds.dataset(os.path.join(pasta, "parquet", conjunto), format="parquet",
+                                partitioning="hive").to_table()
+            assert tabela.num_rows == linhas, f"{conjunto}: {tabela.num_rows} linhas != {linhas}"
+
+        # Um dia de marcações novas para 10% dos funcionários
+        with db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa)
+                SELECT CPF, '2024-07-01T08:00:00-0300', 'entrada', empresa FROM cadastro_funcionario
+                WHERE id % 10 = 0
+            """)
+        print()
+        for conjunto in ("resumo_diario", "marcacoes"):
+            inicio = time.perf_counter()
+            estatisticas = db.exportar_colunar(os.path.join(pasta, "parquet"), conjunto)
+            print(f"incremental {conjunto:<28} {time.perf_counter() - inicio:7.3f} s   "
+                  f"{estatisticas['particoes']} partições, {estatisticas['linhas']:,} linhas")
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
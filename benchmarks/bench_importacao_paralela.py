@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da importação de vários arquivos do relógio (BancoSQLite.importar_arquivos).
+
+Gera um fechamento de mês sintético (um arquivo por REP por dia útil, com algumas
+linhas inválidas e um arquivo ilegível) e compara importar_afd arquivo a arquivo com
+importar_arquivos lendo no próprio processo e num pool de processos, conferindo
+que a tabela ponto fica igual nos três casos. Depois repete a importação (tudo
+pulado pelo manifesto) e importa cópias renomeadas (puladas pelo SHA-256).
+
+Uso: python benchmarks/bench_importacao_paralela.py [reps] [funcionarios_por_rep]
+"""
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+# "ANSI" só existe no Windows; no benchmark usamos o equivalente explícito
+ENCODING = "cp1252"
+
+
+def gerar_fechamento(pasta, reps, funcionarios):
+    """Um arquivo por REP por dia útil de fev/2025, quatro marcações por funcionário."""
+    random.seed(20)
+    os.makedirs(pasta)
+    for rep in range(reps):
+        cpfs = [f"{(rep * funcionarios + i) * 7919:011d}" for i in range(funcionarios)]
+        for dia in range(1, 29):
+            if dia % 7 in (1, 2):  # fins de semana
+                continue
+            nsr = 0
+            with open(os.path.join(pasta, f"rep{rep:03d}_2025-02-{dia:02d}.txt"), "w", encoding=ENCODING) as f:
+                for hora in ("08", "12", "13", "17"):
+                    for cpf in cpfs:
+                        nsr += 1
+                        f.write(f"{nsr:09d}3" f"2025-02-{dia:02d}T{hora}:{random.randrange(60):02d}:00-0300"
+                                f"{cpf}{random.randrange(16 ** 4):04X}\n")
+                if dia == 10:
+                    f.write("000000000Xlinha corrompida do REP\n")
+    # Arquivo que não decodifica em cp1252 (0x81 não é definido)
+    with open(os.path.join(pasta, "rep999_ilegivel.txt"), "wb") as f:
+        f.write(b"\x81\x81\x81\n")
+
+
+def conteudo(db):
+    return db.conn.execute("SELECT cpf, timestamp, tipo, codigo_empresa FROM ponto ORDER BY cpf, timestamp").fetchall()
+
+
+def medir(nome, funcao, linhas):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    decorrido = time.perf_counter() - inicio
+    print(f"{nome:<44} {decorrido:7.3f} s  {linhas / decorrido:>10,.0f} linhas/s")
+    return resultado, decorrido
+
+
+def main():
+    reps = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    funcionarios = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    configurar_logs(nivel="CRITICAL")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        origem = os.path.join(pasta, "fechamento")
+        gerar_fechamento(origem, reps, funcionarios)
+        arquivos = sorted(os.listdir(origem))
+        linhas = sum(1 for nome in arquivos for _ in open(os.path.join(origem, nome), "rb"))
+        print(f"{len(arquivos)} arquivos, {linhas:,} linhas, {os.cpu_count()} CPUs\n")
+
+        def serial():
+            db = BancoSQLite(Path(pasta) / "serial.db", perfil="importacao")
+            with contextlib.redirect_stdout(io.StringIO()):  # o leitor antigo faz print das linhas inválidas
+                for nome in arquivos:
+                    db.importar_afd(os.path.join(origem, nome), 1, encoding=ENCODING)
+            return db
+
+        referencia, t_serial = medir("importar_afd arquivo a arquivo", serial, linhas)
+        esperado = conteudo(referencia)
+        referencia.fechar_conexao()
+
+        for processos in (1, max(os.cpu_count() or 1, 2)):
+            db = BancoSQLite(Path(pasta) / f"paralelo{processos}.db", perfil="importacao")
+            nome = f"importar_arquivos processos={processos}"
+            resultado, decorrido = medir(nome, lambda: db.importar_arquivos(
+                origem, 1, processos=processos, encoding=ENCODING), linhas)
+            assert conteudo(db) == esperado, f"{nome}: tabela ponto diferente"
+            assert resultado["importados"] == len(arquivos) - 1 and len(resultado["falhas"]) == 1, resultado
+            assert resultado["erros"] == reps, resultado
+            print(f"  {resultado['inseridos']:,} inseridas, {resultado['erros']} linhas inválidas, "
+                  f"falha: {os.path.basename(resultado['falhas'][0]['caminho'])}, "
+                  f"{t_serial / decorrido:.1f}x o serial")
+
+            resultado, _ = medir("  reimportação (manifesto: caminho e data)",
+                                 lambda: db.importar_arquivos(origem, 1, encoding=ENCODING), linhas)
+            assert resultado["repetidos"] == len(arquivos) - 1 and resultado["inseridos"] == 0, resultado
+
+            copia = os.path.join(pasta, f"copia{processos}")
+            shutil.copytree(origem, copia)
+            for nome in os.listdir(copia):
+                os.rename(os.path.join(copia, nome), os.path.join(copia, "novo_" + nome))
+            resultado, _ = medir("  cópias renomeadas (manifesto: SHA-256)",
+                                 lambda: db.importar_arquivos(copia, 1, encoding=ENCODING), linhas)
+            assert resultado["repetidos"] == len(arquivos) - 1 and resultado["inseridos"] == 0, resultado
+            db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Custo da instrumentação (BancoSQLite.instrumentar): mesma carga com e sem medição,
+e com o progress handler desligado (melhor de 3 rodadas). No fim imprime o relatório da execução medida
+e grava as métricas no formato do Prometheus em metricas.prom (na pasta temporária).
+
+Carga: marcações gravadas uma a uma, consultas por CPF e a visão mensal.
+
+Uso: python benchmarks/bench_instrumentacao.py [marcacoes]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+
+def carga(db, marcacoes):
+    for i in range(marcacoes):
+        segundos = 5 * 3600 + i * 7
+        db.inserir_atualizar_ponto(
+            f"{i % 50:011d}", f"2025-02-{i % 28 + 1:02d}T{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:"
+                              f"{segundos % 60:02d}-0400", "entrada", 3)
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO cadastro_funcionario (nome, CPF, empresa, n_folha)
+            SELECT 'Funcionario ' || cpf, cpf, 3, ROW_NUMBER() OVER (ORDER BY cpf)
+            FROM (SELECT DISTINCT cpf FROM ponto)
+        """)
+    for i in range(marcacoes):
+        db.consultar_registros("ponto", {"cpf": f"{i % 50:011d}"})
+    for _ in range(5):
+        db.visualiza_ponto("02/2025")
+
+
+def medir(pasta, nome, marcacoes, **instrumentar):
+    db = BancoSQLite(Path(pasta) / f"{nome}.db")
+    db.criar_tabela("cadastro_funcionario", {
+        "nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER", "n_folha": "INTEGER", "pis_pasep": "TEXT",
+    })
+    instrumentacao = db.instrumentar(**instrumentar) if instrumentar else None
+    inicio = time.perf_counter()
+    carga(db, marcacoes)
+    decorrido = time.perf_counter() - inicio
+    db.fechar_conexao()
+    return decorrido, instrumentacao
+
+
+def main():
+    marcacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    configurar_logs(nivel="WARNING")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # Melhor de 3 rodadas, alternando as variantes para diluir o ruído da máquina
+        tempos = {"sem": [], "sem_passos": [], "com": []}
+        for rodada in range(3):
+            tempos["sem"].append(medir(pasta, f"sem{rodada}", marcacoes)[0])
+            tempos["sem_passos"].append(medir(pasta, f"sem_passos{rodada}", marcacoes, passos_progresso=None)[0])
+            decorrido, instrumentacao = medir(pasta, f"com{rodada}", marcacoes, limite_lento=0.05)
+            tempos["com"].append(decorrido)
+        base, sem_passos, completo = (min(tempos[nome]) for nome in ("sem", "sem_passos", "com"))
+
+        print(f"{'sem instrumentação':<36} {base:7.3f} s")
+        print(f"{'instrumentado, sem progress handler':<36} {sem_passos:7.3f} s  (+{(sem_passos / base - 1) * 100:.0f}%)")
+        print(f"{'instrumentado completo':<36} {completo:7.3f} s  (+{(completo / base - 1) * 100:.0f}%)\n")
+
+        print(instrumentacao.relatorio(limite_comandos=10))
+        destino = Path(pasta) / "metricas.prom"
+        instrumentacao.gravar_prometheus(destino)
+        print(f"\n{len(destino.read_text().splitlines())} linhas no formato Prometheus")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do leitor de arquivos do relógio: ler_registros (lista de dicts com
+strptime) contra o modo streaming (iterar_registros).
+
+Uso: python benchmarks/bench_leitor.py [quantidade_de_linhas]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.leitor_afd import iterar_registros, ler_registros  # noqa: E402
+
+# "ANSI" só existe no Windows; no benchmark usamos o equivalente explícito
+ENCODING = "cp1252"
+
+
+def gerar_arquivo(caminho, linhas):
+    """Gera um arquivo sintético no layout do REP (NSR + timestamp + CPF + CRC)."""
+    cpfs = [f"{random.randrange(10 ** 10, 10 ** 11):011d}" for _ in range(300)]
+    with open(caminho, "w", encoding=ENCODING) as f:
+        for nsr in range(linhas):
+            dia = 1 + (nsr // 20000) % 28
+            # Marcações em ordem cronológica, como no arquivo real do REP
+            segundos = 6 * 3600 + (nsr % 20000) * (14 * 3600) // 20000
+            h, resto = divmod(segundos, 3600)
+            m, s = divmod(resto, 60)
+            f.write(f"{nsr:09d}3"
+                    f"2025-02-{dia:02d}T{h:02d}:{m:02d}:{s:02d}-0400"
+                    f"{random.choice(cpfs)}"
+                    f"{random.randrange(16 ** 4):04X}\n")
+
+
+def medir(nome, funcao, linhas):
+    inicio = time.perf_counter()
+    total = funcao()
+    decorrido = time.perf_counter() - inicio
+    print(f"{nome:<28} {total:>10} registros  {decorrido:8.3f} s  {linhas / decorrido:>12,.0f} linhas/s")
+    return decorrido
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    fd, caminho = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        gerar_arquivo(caminho, linhas)
+
+        # Confere que os dois modos produzem os mesmos campos
+        for antigo, novo in zip(ler_registros(caminho, encoding=ENCODING)[:1000],
+                                iterar_registros(caminho, encoding=ENCODING)):
+            for campo in ("registro", "timestamp", "data", "hora", "codigo", "valor"):
+                assert antigo[campo] == novo[campo], (campo, antigo, novo)
+
+        antigo = medir("ler_registros (lista)", lambda: len(ler_registros(caminho, encoding=ENCODING)), linhas)
+        novo = medir("iterar_registros (stream)",
+                     lambda: sum(1 for _ in iterar_registros(caminho, encoding=ENCODING)), linhas)
+        print(f"Ganho: {antigo / novo:.1f}x")
+    finally:
+        os.remove(caminho)
+
+
+if __name__ == "__main__":
+    main()
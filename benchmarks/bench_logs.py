@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do custo de log por marcação gravada (como em inserir_atualizar_ponto).
+
+  antes: StreamHandler colorido síncrono em INFO e f-string montada a cada chamada
+         (uma linha no terminal por marcação)
+  depois, nível padrão: logger.debug no estilo % abaixo do nível + Agregador.contar
+  depois, DEBUG ligado: cada marcação vai para a fila (QueueHandler), com amostragem
+
+As linhas de log vão para stderr; rode no terminal para medir o custo real da escrita
+(python benchmarks/bench_logs.py 2>/dev/null mede só a formatação).
+
+Uso: python benchmarks/bench_logs.py [marcacoes]
+"""
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.registro_log import Agregador, configurar_logs, obter_logger, parar_logs  # noqa: E402
+
+
+def medir(nome, funcao, quantidade):
+    inicio = time.perf_counter()
+    funcao()
+    decorrido = time.perf_counter() - inicio
+    print(f"{nome:<32} {decorrido:7.3f} s  {decorrido / quantidade * 1e6:8.2f} µs/marcação", flush=True)
+    return decorrido
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    marcacoes = [(f"{i % 500:011d}", f"2025-02-{i % 28 + 1:02d}T08:00:00-0400") for i in range(quantidade)]
+
+    import colorlog
+    antigo = logging.getLogger("bench.antes")
+    antigo.propagate = False
+    handler = colorlog.StreamHandler()
+    handler.setFormatter(colorlog.ColoredFormatter('%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    antigo.addHandler(handler)
+    antigo.setLevel(logging.INFO)
+
+    def antes():
+        for cpf, timestamp in marcacoes:
+            antigo.info(f"Novo registro inserido para CPF {cpf} em {timestamp}.")
+
+    log_ponto = obter_logger("ponto")
+
+    def depois():
+        with Agregador(log_ponto, "Marcações gravadas") as contagem:
+            for cpf, timestamp in marcacoes:
+                log_ponto.debug("Novo registro inserido para CPF %s em %s.", cpf, timestamp)
+                contagem.contar(tipo="inseridas")
+
+    t_antes = medir("antes", antes, quantidade)
+
+    configurar_logs()
+    t_depois = medir("depois, nível padrão", depois, quantidade)
+
+    configurar_logs(niveis={"ponto": "DEBUG"})
+    medir("depois, DEBUG ligado (fila)", depois, quantidade)
+    parar_logs()
+
+    print(f"\nnível padrão: {t_antes / t_depois:.0f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
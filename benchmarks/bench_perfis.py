@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos perfis de conexão (banco.conexao.PERFIS): marcações gravadas uma a
+uma (inserir_atualizar_ponto, um commit por marcação), importação de arquivo do
+relógio e latência da visão mensal (visualiza_ponto). O perfil só de leitura
+(relatorio) mede só a visão mensal.
+
+Uso: python benchmarks/bench_perfis.py [marcacoes_avulsas] [linhas_do_arquivo]
+"""
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.conexao import PERFIL_PADRAO, PERFIS  # noqa: E402
+from bench_leitor import ENCODING, gerar_arquivo  # noqa: E402
+
+
+def medir_perfil(perfil, pasta, arquivo, avulsas):
+    db = BancoSQLite(Path(pasta) / f"{perfil}.db", perfil=perfil)
+    # Perfil só de leitura (query_only): a carga roda com o perfil padrão e só a visão mensal é medida
+    somente_leitura = PERFIS[perfil]["query_only"] == "ON"
+    with db.perfil(PERFIL_PADRAO) if somente_leitura else contextlib.nullcontext():
+        db.criar_tabela("cadastro_funcionario", {
+            "nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER", "n_folha": "INTEGER", "pis_pasep": "TEXT",
+        })
+
+        # Importação com o próprio perfil em teste (perfil=None não troca os PRAGMAs)
+        estatisticas = db.importar_afd(arquivo, 3, encoding=ENCODING, perfil=None)
+
+        with db.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO cadastro_funcionario (nome, CPF, empresa, n_folha)
+                SELECT 'Funcionario ' || cpf, cpf, 3, ROW_NUMBER() OVER (ORDER BY cpf)
+                FROM (SELECT DISTINCT cpf FROM ponto)
+            """)
+
+        inicio = time.perf_counter()
+        for i in range(avulsas):
+            segundos = 5 * 3600 + i * 7
+            db.inserir_atualizar_ponto(
+                f"{i % 50:011d}", f"2025-03-{i % 28 + 1:02d}T{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:"
+                                  f"{segundos % 60:02d}-0400", "entrada", 3)
+        por_segundo = avulsas / (time.perf_counter() - inicio)
+
+    latencias = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(5):
+            inicio = time.perf_counter()
+            db.visualiza_ponto("02/2025")
+            latencias.append(time.perf_counter() - inicio)
+
+    db.fechar_conexao()
+    if somente_leitura:
+        return None, None, statistics.median(latencias)
+    return por_segundo, estatisticas["linhas_por_segundo"], statistics.median(latencias)
+
+
+def main():
+    avulsas = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    linhas = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    logging.getLogger('SQLiteDB').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "afd.txt")
+        gerar_arquivo(arquivo, linhas)
+
+        print(f"{'perfil':<12} {'marcações/s':>12} {'importação linhas/s':>20} {'visão mensal':>14}")
+        for perfil in PERFIS:
+            avulsas_s, importacao_s, latencia = medir_perfil(perfil, pasta, arquivo, avulsas)
+            avulsas_s = "-" if avulsas_s is None else f"{avulsas_s:,.0f}"
+            importacao_s = "-" if importacao_s is None else f"{importacao_s:,}"
+            print(f"{perfil:<12} {avulsas_s:>12} {importacao_s:>20} {latencia * 1000:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memória da apuração de um ano inteiro: tuplas x PontoCompacto (banco.ponto_compacto).
+
+Um ano de marcações de todas as empresas é apurado de duas formas:
+  - apuração diária (recalcular ponto_dia do ano, que alimenta o espelho de ponto, o
+    relatório de horas e as exportações): fetchall das linhas + groupby + lista de
+    resultados, como era antes, x o _processar_ponto_dia_pendente atual;
+  - motor vetorizado de horas extras/faltantes: fetchall + zip + np.unique dos CPFs em
+    texto, como era antes, x o _calcular_horas_vetorizado atual.
+Mede o pico de memória alocada pelo Python (tracemalloc; NumPy também é contado) e o
+tempo (sem tracemalloc), e confere que ponto_dia e o relatório ficam iguais.
+
+Uso: python benchmarks/bench_ponto_compacto.py [funcionarios]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from itertools import groupby
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_datas_inteiras import preparar  # noqa: E402
+from banco.apuracao import ORDINAL_EPOCA, apurar_dia_convertidas, dia_local  # noqa: E402
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.migracoes import JORNADA_PADRAO_ID  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+EMPRESA = 1
+
+
+def apurar_tuplas(db):
+    """Apuração diária como era antes: todas as linhas em tuplas, agrupadas com groupby."""
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT q.cpf, q.data, p.segundo_local, substr(p.timestamp, 12, 8), p.tipo, p.codigo_empresa,
+               c.segundos_previstos
+        FROM ponto_dia_pendente q
+        LEFT JOIN ponto p ON p.cpf = q.cpf AND p.timestamp >= q.data AND p.timestamp < q.data || 'U'
+        LEFT JOIN jornada_funcionario jf ON jf.cpf = q.cpf
+        LEFT JOIN jornada_empresa je ON je.codigo_empresa = p.codigo_empresa
+        LEFT JOIN calendario_jornada c
+               ON c.jornada_id = COALESCE(jf.jornada_id, je.jornada_id, ?) AND c.data = q.data
+        ORDER BY q.cpf, q.data, p.timestamp
+    """, (JORNADA_PADRAO_ID,))
+    linhas = cursor.fetchall()
+    agora = datetime.now().isoformat()
+    atualizar = []
+    for (cpf, data), grupo in groupby(linhas, key=lambda linha: (linha[0], linha[1])):
+        grupo = [linha for linha in grupo if linha[3] is not None]
+        marcacoes = [(segundos, horario, tipo) for _, _, segundos, horario, tipo, _, _ in grupo]
+        _, _, _, _, _, codigo_empresa, jornada = grupo[-1]
+        atualizar.append((cpf, data, codigo_empresa, *apurar_dia_convertidas(data, marcacoes, jornada=jornada), agora))
+    cursor.executemany("INSERT OR REPLACE INTO ponto_dia VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", atualizar)
+    cursor.execute("DELETE FROM ponto_dia_pendente")
+
+
+def vetorizado_tuplas(db, empresa, inicio, fim):
+    """Motor vetorizado como era antes: fetchall, zip e np.unique dos CPFs em texto."""
+    import numpy as np
+    from banco import apuracao_vetorizada as vet
+
+    cursor = db.conn.cursor()
+    cursor.execute("""
+        SELECT p.cpf, p.dia_local, p.segundo_local,
+               CASE p.tipo WHEN 'entrada' THEN 0 WHEN 'saida' THEN 1 ELSE 2 END, c.segundos_previstos
+        FROM ponto p
+        JOIN cadastro_funcionario f ON p.cpf = f.CPF
+        LEFT JOIN jornada_funcionario jf ON jf.cpf = p.cpf
+        LEFT JOIN jornada_empresa je ON je.codigo_empresa = p.codigo_empresa
+        JOIN calendario_jornada c
+          ON c.jornada_id = COALESCE(jf.jornada_id, je.jornada_id, ?) AND c.data = substr(p.timestamp, 1, 10)
+        WHERE f.empresa = ? AND p.dia_local BETWEEN ? AND ?
+    """, (JORNADA_PADRAO_ID, empresa, dia_local(inicio), dia_local(fim)))
+    cpfs, dias, segundos, tipos, jornadas = zip(*cursor.fetchall())
+    cpfs_unicos, funcionarios = np.unique(np.array(cpfs), return_inverse=True)
+    funcionario, dia, trabalhado, _, extras, faltantes = vet.apurar_periodo(
+        funcionarios, np.array(dias, dtype=np.int64) + ORDINAL_EPOCA, np.array(segundos, dtype=np.int64),
+        np.array(tipos, dtype=np.int8), jornadas=np.array(jornadas, dtype=np.int64))
+    cursor.execute("SELECT CPF, nome, empresa FROM cadastro_funcionario WHERE empresa = ?", (empresa,))
+    cadastro = {cpf: (nome, emp) for cpf, nome, emp in cursor.fetchall()}
+    resultado = []
+    for codigo, ordinal, txt_trabalhado, txt_extras, txt_faltantes in zip(
+            funcionario.tolist(), dia.tolist(), vet.formatar_horas_vetor(trabalhado),
+            vet.formatar_horas_vetor(extras), vet.formatar_horas_vetor(faltantes)):
+        cpf = str(cpfs_unicos[codigo])
+        nome, emp = cadastro[cpf]
+        resultado.append((nome, emp, date.fromordinal(ordinal).isoformat(),
+                          txt_trabalhado, txt_extras, txt_faltantes, cpf))
+    resultado.sort(key=lambda linha: (linha[0], linha[2], linha[6]))
+    return [linha[:6] for linha in resultado]
+
+
+def enfileirar_ano(db):
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM ponto_dia")
+        cursor.execute("INSERT OR IGNORE INTO ponto_dia_pendente (cpf, data) "
+                       "SELECT DISTINCT cpf, substr(timestamp, 1, 10) FROM ponto")
+
+
+def medir(funcao):
+    """(resultado, segundos, pico de memória em bytes): uma execução cronometrada e outra com tracemalloc."""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    decorrido = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, decorrido, pico
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    configurar_logs(nivel="ERROR")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "compacto.db")
+        preparar(db, funcionarios)
+        db.criar_tabela("cadastro_funcionario", {"nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER"})
+        with db.transaction() as cursor:
+            # Todos numa empresa: o relatório vetorizado lê o ano de todos os funcionários
+            cursor.execute(f"""
+                INSERT INTO cadastro_funcionario (nome, CPF, empresa)
+                SELECT DISTINCT 'Funcionario ' || cpf, cpf, {EMPRESA} FROM ponto
+            """)
+        total = db.conn.execute("SELECT COUNT(*) FROM ponto").fetchone()[0]
+        print(f"{funcionarios} funcionários, {total:,} marcações em 2024 (10 empresas)\n")
+
+        def ponto_dia():
+            return db.conn.execute("SELECT * FROM ponto_dia ORDER BY cpf, data").fetchall()
+
+        def antes():
+            enfileirar_ano(db)
+            with db.transaction():
+                apurar_tuplas(db)
+
+        def depois():
+            enfileirar_ano(db)
+            with db.transaction():
+                db._processar_ponto_dia_pendente()
+
+        def sem_horario(linhas):
+            return [linha[:-1] for linha in linhas]  # atualizado_em muda a cada execução
+
+        _, t_antes, m_antes = medir(antes)
+        referencia = sem_horario(ponto_dia())
+        _, t_depois, m_depois = medir(depois)
+        assert sem_horario(ponto_dia()) == referencia, "ponto_dia diferente"
+        print(f"apuração diária do ano ({len(referencia):,} funcionário/dia)")
+        print(f"  tuplas + groupby        {m_antes / 2 ** 20:8.1f} MiB   {t_antes:6.2f} s")
+        print(f"  PontoCompacto           {m_depois / 2 ** 20:8.1f} MiB   {t_depois:6.2f} s   "
+              f"{m_antes / m_depois:.1f}x menos memória\n")
+
+        periodo = (EMPRESA, "2024-01-01", "2024-12-31")
+        lista_antes, t_antes, m_antes = medir(lambda: vetorizado_tuplas(db, *periodo))
+        lista_depois, t_depois, m_depois = medir(lambda: db._calcular_horas_vetorizado(*periodo))
+        assert lista_antes == lista_depois, "relatório vetorizado diferente"
+        print(f"horas extras/faltantes vetorizado do ano ({len(lista_depois):,} linhas)")
+        print(f"  tuplas + zip + np.unique {m_antes / 2 ** 20:7.1f} MiB   {t_antes:6.2f} s")
+        print(f"  PontoCompacto            {m_depois / 2 ** 20:7.1f} MiB   {t_depois:6.2f} s   "
+              f"{m_antes / m_depois:.1f}x menos memória")
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relatórios fora da thread da interface (janelas.tarefa_relatorio.TarefaRelatorio).
+
+Num QCoreApplication (sem janela), mede para cada relatório o tempo da chamada
+síncrona (o tempo que a interface ficava congelada), o tempo até o primeiro bloco
+chegar à thread principal pela TarefaRelatorio, o total e a maior pausa do laço de
+eventos durante a tarefa (um QTimer de 10 ms), e confere que os blocos somam a mesma
+lista da chamada síncrona. Depois cancela o relatório do ano inteiro logo depois de
+iniciado e mede quanto tempo o sinal cancelado leva para chegar.
+
+Uso: python benchmarks/bench_relatorios.py [funcionarios]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QThreadPool, QTimer  # noqa: E402
+
+from bench_horas_extras import EMPRESA, gerar_corpus  # noqa: E402
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+from janelas.tarefa_relatorio import iniciar_relatorio  # noqa: E402
+
+
+def executar(db, nome, *argumentos, cancelar_apos=None, **opcoes):
+    """Roda a tarefa até o fim (ou o cancelamento) com o laço de eventos girando."""
+    laco = QEventLoop()
+    estado = {"linhas": [], "primeiro": None, "fim": None, "situacao": None, "pausa": 0.0}
+    ultimo_tique = [time.perf_counter()]
+
+    def tique():
+        agora = time.perf_counter()
+        estado["pausa"] = max(estado["pausa"], agora - ultimo_tique[0])
+        ultimo_tique[0] = agora
+
+    def ao_bloco(bloco):
+        if estado["primeiro"] is None:
+            estado["primeiro"] = time.perf_counter() - inicio
+        estado["linhas"].extend(bloco)
+
+    def terminar(situacao):
+        estado["fim"] = time.perf_counter() - inicio
+        estado["situacao"] = situacao
+        laco.quit()
+
+    relogio = QTimer()
+    relogio.timeout.connect(tique)
+    relogio.start(10)
+    inicio = time.perf_counter()
+    tarefa = iniciar_relatorio(db, nome, *argumentos, ao_bloco=ao_bloco,
+                               ao_concluir=lambda total: terminar("concluido"),
+                               ao_cancelar=lambda: terminar("cancelado"),
+                               ao_erro=lambda erro: terminar(f"erro: {erro}"), **opcoes)
+    if cancelar_apos is not None:
+        QTimer.singleShot(int(cancelar_apos * 1000), tarefa.cancelar)
+    laco.exec()
+    relogio.stop()
+    return estado
+
+
+def main():
+    funcionarios = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    configurar_logs(nivel="ERROR")
+    app = QCoreApplication(sys.argv[:1])  # noqa: F841 (laço de eventos dos sinais)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "relatorios.db")
+        total = gerar_corpus(db, funcionarios, 42)
+        db.atualizar_ponto_dia()
+        print(f"{funcionarios} funcionários, {total:,} marcações no trimestre\n")
+
+        casos = [
+            ("ponto_mes", ("02/2025", "Nenhum selecionado"), {},
+             lambda: db.visualiza_ponto_filtro("02/2025", "Nenhum selecionado")),
+            ("horas_extras_faltantes", (EMPRESA, "01/01/2025", "31/03/2025"), {},
+             lambda: db.calcular_horas_extras_faltantes_por_empresa(EMPRESA, "01/01/2025", "31/03/2025")),
+            ("horas_extras_faltantes", (EMPRESA, "01/01/2025", "31/03/2025"), {"motor": "vetorizado"},
+             lambda: db.calcular_horas_extras_faltantes_por_empresa(EMPRESA, "01/01/2025", "31/03/2025",
+                                                                    motor="vetorizado")),
+        ]
+        print(f"{'relatório':<36} {'síncrono':>10} {'1º bloco':>10} {'total':>10} {'maior pausa':>12}")
+        for nome, argumentos, opcoes, sincrono in casos:
+            inicio = time.perf_counter()
+            lista = sincrono()
+            t_sincrono = time.perf_counter() - inicio
+            estado = executar(db, nome, *argumentos, **opcoes)
+            assert estado["situacao"] == "concluido" and estado["linhas"] == lista, (nome, estado["situacao"])
+            rotulo = f"{nome} {opcoes.get('motor', '')}".strip()
+            print(f"{rotulo:<36} {t_sincrono * 1000:8.0f} ms {estado['primeiro'] * 1000:7.0f} ms "
+                  f"{estado['fim'] * 1000:7.0f} ms {estado['pausa'] * 1000:9.0f} ms   {len(lista):,} linhas")
+
+        # Cancelamento: o ano inteiro (calendário de jornadas e consulta longos) cancelado após 50 ms
+        print()
+        for opcoes in ({}, {"motor": "vetorizado"}):
+            estado = executar(db, "horas_extras_faltantes", EMPRESA, "01/01/2024", "31/12/2025",
+                              cancelar_apos=0.05, **opcoes)
+            rotulo = f"cancelamento {opcoes.get('motor', 'materializado')}"
+            print(f"{rotulo:<36} {estado['situacao']} em {(estado['fim'] - 0.05) * 1000:.0f} ms após o pedido, "
+                  f"{len(estado['linhas']):,} linhas entregues")
+
+        QThreadPool.globalInstance().waitForDone()
+        db.fechar_conexao()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark da seleção dos horários do espelho de ponto (manhã/tarde).
+
+Compara o seleciona_registro antigo de visualiza_ponto (quatro filtros por dia,
+strptime e datetime.combine por candidato) com o SeletorHorarios de passada única,
+conferindo que o resultado é o mesmo.
+
+Uso: python benchmarks/bench_seletor.py [quantidade_de_dias]
+"""
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.apuracao import SeletorHorarios  # noqa: E402
+
+
+def seleciona_antigo(registros):
+    """Cópia da lógica original de visualiza_ponto para um funcionário/dia."""
+    def str_to_time(t_str):
+        return datetime.datetime.strptime(t_str, "%H:%M:%S").time()
+
+    def seleciona_registro(registros, target_time, expected_type):
+        candidatos = [r for r in registros if r[1] == expected_type]
+        if not candidatos:
+            return "00:00:00"
+        return min(
+            candidatos,
+            key=lambda r: abs(datetime.datetime.combine(datetime.date.today(), str_to_time(r[0])) -
+                              datetime.datetime.combine(datetime.date.today(), target_time))
+        )[0]
+
+    registros_manha = [r for r in registros if r[0] < '13:00:00']
+    registros_tarde = [r for r in registros if r[0] >= '13:00:00']
+    return (
+        seleciona_registro(registros_manha, datetime.time(8, 0, 0), 'entrada'),
+        seleciona_registro(registros_manha, datetime.time(12, 0, 0), 'saida'),
+        seleciona_registro(registros_tarde, datetime.time(13, 0, 0), 'entrada'),
+        seleciona_registro(registros_tarde, datetime.time(18, 0, 0), 'saida'),
+    )
+
+
+def gerar_dias(quantidade, semente=7):
+    rnd = random.Random(semente)
+    dias = []
+    for _ in range(quantidade):
+        segundos = sorted(rnd.randrange(5 * 3600, 22 * 3600) for _ in range(rnd.choice((2, 4, 4, 4, 6, 8))))
+        dias.append([(f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}", rnd.choice(("entrada", "saida")))
+                     for s in segundos])
+    return dias
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dias = gerar_dias(quantidade)
+    seletor = SeletorHorarios()
+
+    inicio = time.perf_counter()
+    antigos = [seleciona_antigo(dia) for dia in dias]
+    antigo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    novos = [seletor.selecionar(dia) for dia in dias]
+    novo = time.perf_counter() - inicio
+
+    if antigos != novos:
+        print("DIVERGÊNCIA:", next(par for par in zip(antigos, novos) if par[0] != par[1]))
+        sys.exit(1)
+
+    print(f"{quantidade} funcionário/dia, resultados idênticos")
+    print(f"seleciona_registro antigo: {antigo / quantidade * 1e6:8.2f} µs/dia")
+    print(f"SeletorHorarios:           {novo / quantidade * 1e6:8.2f} µs/dia  ({antigo / novo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
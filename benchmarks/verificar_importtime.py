@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Confere o custo de importação da camada de dados com `python -X importtime`.
+
+Para cada módulo de MODULOS: o tempo cumulativo de importação (mediana de algumas
+execuções) tem de ficar dentro do orçamento, nenhum módulo pesado de PROIBIDOS
+pode ser carregado e a importação não pode criar o arquivo do banco.
+Sai com código 1 se algum limite for violado.
+
+Uso: python benchmarks/verificar_importtime.py [execucoes]
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+BANCO_PADRAO = RAIZ / "banco" / "ponto_uniconte.db"
+
+# módulo -> orçamento em milissegundos (tempo cumulativo do próprio módulo)
+MODULOS = {
+    "banco": 15,
+    "banco.bancoSQlite": 80,
+    "main": 40,
+}
+# Carregados só quando usados (telas, motor vetorizado, exportações)
+PROIBIDOS = ("PyQt6", "numpy", "pandas", "pyarrow", "openpyxl", "colorlog")
+
+
+def importar(modulo):
+    """Importa o módulo num processo novo; retorna (microssegundos, módulos carregados)."""
+    # Mede com o bytecode em cache (__pycache__), como na aplicação instalada
+    ambiente = {nome: valor for nome, valor in os.environ.items() if nome != "PYTHONDONTWRITEBYTECODE"}
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True, env=ambiente,
+    ).stderr
+
+    carregados, cumulativo = set(), None
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = (parte.strip() for parte in linha.split("|"))
+        if not acumulado.isdigit():
+            continue  # cabeçalho
+        carregados.add(nome)
+        if nome == modulo:
+            cumulativo = int(acumulado)
+    return cumulativo, carregados
+
+
+def main():
+    execucoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    banco_existia = BANCO_PADRAO.exists()
+
+    falhas = 0
+    for modulo, orcamento in MODULOS.items():
+        # A primeira execução aquece o cache de bytecode e do sistema de arquivos
+        importar(modulo)
+        tempos, carregados = [], set()
+        for _ in range(execucoes):
+            tempo, modulos = importar(modulo)
+            tempos.append(tempo / 1000)
+            carregados |= modulos
+
+        mediana = statistics.median(tempos)
+        pesados = sorted(nome for nome in carregados if nome.split(".")[0] in PROIBIDOS)
+        ok = mediana <= orcamento and not pesados
+        falhas += not ok
+        print(f"{'OK ' if ok else 'ERRO'} {modulo:<20} {mediana:7.1f} ms (orçamento {orcamento} ms)"
+              + (f"  módulos pesados: {', '.join(pesados)}" if pesados else ""))
+
+    if not banco_existia and BANCO_PADRAO.exists():
+        print(f"ERRO importar a camada de dados criou {BANCO_PADRAO}")
+        falhas += 1
+
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Confere, via EXPLAIN QUERY PLAN, que as consultas quentes usam os índices das migrações.
+
+Roda os métodos reais do BancoSQLite num banco temporário, captura o SQL executado
+(set_trace_callback) e verifica o plano de cada consulta. Termina com código 1 se
+alguma consulta fizer varredura completa de ponto ou ponto_dia.
+
+Uso: python benchmarks/verificar_indices.py
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+
+# Consulta (trecho identificador) -> trecho que precisa aparecer no plano
+ESPERADO = {
+    "SELECT id FROM ponto WHERE cpf": "idx_ponto_cpf_timestamp",
+    "FROM ponto p": "idx_ponto_",
+    "FROM ponto_dia d": "SEARCH d USING",
+    "FROM ponto_dia_pendente q": "idx_ponto_cpf_timestamp",
+}
+# Varreduras completas que não podem aparecer (ponto e ponto_dia)
+VARREDURAS = ("SCAN p", "SCAN ponto", "SCAN d")
+
+
+def preparar(db):
+    db.criar_tabela("cadastro_empresa", {"nome": "TEXT"})
+    db.criar_tabela("cadastro_funcionario", {
+        "nome": "TEXT", "CPF": "TEXT", "empresa": "INTEGER", "n_folha": "INTEGER", "pis_pasep": "TEXT",
+    })
+    db.inserir_ou_atualizar_registro("cadastro_empresa", {"id": 3, "nome": "Empresa"}, "id")
+    for i in range(50):
+        db.inserir_ou_atualizar_registro("cadastro_funcionario", {
+            "nome": f"Funcionario {i:02d}", "CPF": f"{i:011d}", "empresa": 3, "n_folha": i, "pis_pasep": "",
+        }, "CPF")
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO ponto (cpf, timestamp, tipo, codigo_empresa) VALUES (?, ?, ?, 3)",
+            [(f"{i:011d}", f"2025-{mes:02d}-{dia:02d}T{hora}-0400", tipo)
+             for i in range(50) for mes in (1, 2, 3) for dia in range(1, 28)
+             for hora, tipo in (("08:00:00", "entrada"), ("12:00:00", "saida"))]
+        )
+        cursor.execute("ANALYZE")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        db = BancoSQLite(Path(pasta) / "indices.db")
+        preparar(db)
+
+        executadas = []
+        db.conn.set_trace_callback(executadas.append)
+        db.inserir_atualizar_ponto("00000000001", "2025-02-03T08:00:00-0400", "entrada", 3)
+        db.visualiza_ponto("02/2025")
+        db.visualiza_ponto_filtro("02/2025", 1)
+        db.exporta_ponto_periodo("01/02/2025", "28/02/2025")
+        db.conn.set_trace_callback(None)
+
+        falhas = 0
+        for sql in executadas:
+            indice = next((idx for trecho, idx in ESPERADO.items() if trecho in sql), None)
+            if indice is None:
+                continue
+            plano = db.plano_consulta(sql)
+            ok = any(indice in etapa for etapa in plano) and not any(
+                etapa.split(" USING")[0] in VARREDURAS for etapa in plano)
+            falhas += not ok
+            print(("OK   " if ok else "FALHA"), " ".join(sql.split())[:90])
+            for etapa in plano:
+                print("       ", etapa)
+
+        db.fechar_conexao()
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
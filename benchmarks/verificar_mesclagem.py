@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Confere a mesclagem de arquivos do relógio em ponto (BancoSQLite.importar_afd).
+
+Num banco temporário:
+  - reimportar o mesmo arquivo com outra empresa passa pelo ON CONFLICT ... DO UPDATE
+    (atualiza as marcações, sem erro dos triggers da apuração diária);
+  - uma correção de tipo feita na tela sobrevive à importação de uma marcação nova no
+    mesmo dia e à reimportação do arquivo;
+  - as marcações novas alternam entrada/saida a partir da última gravada com tipo.
+Termina com código 1 se alguma verificação falhar.
+
+Uso: python benchmarks/verificar_mesclagem.py
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from banco.bancoSQlite import BancoSQLite  # noqa: E402
+from banco.registro_log import configurar_logs  # noqa: E402
+
+CPF = "12345678901"
+
+
+def gravar_afd(caminho, horarios, dia="2025-02-03"):
+    """Arquivo AFD com uma marcação (registro tipo 3) do CPF por horário."""
+    with open(caminho, "w", encoding="utf-8") as f:
+        for nsr, horario in enumerate(horarios, 1):
+            f.write(f"{nsr:09d}3{dia}T{horario}-0300{CPF}ABCD\n")
+    return caminho
+
+
+def tipos(db, dia="2025-02-03"):
+    return dict(db.conn.execute(
+        "SELECT substr(timestamp, 12, 8), tipo FROM ponto WHERE cpf = ? AND timestamp LIKE ? ORDER BY timestamp",
+        (CPF, f"{dia}%")
+    ).fetchall())
+
+
+def main():
+    configurar_logs(nivel="ERROR")
+    falhas = 0
+
+    def conferir(descricao, obtido, esperado):
+        nonlocal falhas
+        ok = obtido == esperado
+        falhas += not ok
+        print("OK   " if ok else "FALHA", descricao if ok else f"{descricao} -> {obtido!r}, esperado {esperado!r}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        db = BancoSQLite(pasta / "mesclagem.db")
+        arquivo = gravar_afd(pasta / "a.txt", ("08:00:00", "12:00:00"))
+
+        resultado = db.importar_afd(arquivo, 1, encoding="utf-8")
+        conferir("primeira importação", resultado and resultado["inseridos"], 2)
+        resultado = db.importar_afd(arquivo, 2, encoding="utf-8")
+        conferir("reimportação com outra empresa (DO UPDATE)", resultado and resultado["atualizados"], 2)
+        conferir("empresa atualizada", db.conn.execute(
+            "SELECT DISTINCT codigo_empresa FROM ponto WHERE cpf = ?", (CPF,)).fetchall(), [(2,)])
+
+        db.inserir_atualizar_ponto(CPF, "2025-02-03T08:00:00-0300", "saida", 2)
+        resultado = db.importar_afd(gravar_afd(pasta / "b.txt", ("10:00:00",)), 2, encoding="utf-8")
+        conferir("marcação nova após correção manual", resultado and resultado["inseridos"], 1)
+        conferir("correção manual preservada", tipos(db),
+                 {"08:00:00": "saida", "10:00:00": "entrada", "12:00:00": "saida"})
+        resultado = db.importar_afd(arquivo, 2, encoding="utf-8")
+        conferir("reimportação após correção manual", resultado and resultado["atualizados"], 0)
+        conferir("tipos mantidos na reimportação", tipos(db),
+                 {"08:00:00": "saida", "10:00:00": "entrada", "12:00:00": "saida"})
+
+        db.importar_afd(gravar_afd(pasta / "c.txt", ("07:58:00", "12:01:00", "13:02:00", "18:00:00"),
+                                   dia="2025-02-04"), 2, encoding="utf-8")
+        conferir("dia novo alterna entrada/saida", list(tipos(db, "2025-02-04").values()),
+                 ["entrada", "saida", "entrada", "saida"])
+        conferir("apuração diária sem pendências", db.conn.execute(
+            "SELECT COUNT(*) FROM ponto_dia_pendente").fetchone()[0], 0)
+        db.fechar_conexao()
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+# Modelo de tabela que busca os registros sob demanda (paginação por chave)
+class ModeloTabelaPaginada(QAbstractTableModel):
+    """
+    Modelo para QTableView que carrega a tabela do banco página por página.
+
+    A view chama canFetchMore/fetchMore conforme o usuário rola, então só as páginas
+    já exibidas ficam na memória, mesmo em tabelas com milhões de linhas (ex.: ponto).
+
+    Exemplo:
+        modelo = ModeloTabelaPaginada(db, "ponto", chave=("cpf", "timestamp"))
+        tabela = QTableView()
+        tabela.setModel(modelo)
+    """
+
+    def __init__(self, db, nome_tabela, chave=("id",), filtros=None, tamanho_pagina=500, parent=None):
+        """
+        Args:
+            db: Instância de BancoSQLite
+            nome_tabela: Tabela exibida
+            chave: Colunas únicas usadas na paginação (ver BancoSQLite.consultar_pagina)
+            filtros: Filtros de igualdade opcionais
+            tamanho_pagina: Registros buscados a cada fetchMore
+        """
+        super().__init__(parent)
+        self.db = db
+        self.nome_tabela = nome_tabela
+        self.chave = tuple(chave)
+        self.filtros = filtros
+        self.tamanho_pagina = tamanho_pagina
+
+        self._colunas = [campo[1] for campo in db.estrutura_tabela(nome_tabela)]
+        self._linhas = []
+        self._apos = None
+        self._fim = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._colunas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        valor = self._linhas[index.row()][index.column()]
+        return "" if valor is None else str(valor)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._colunas[section] if section < len(self._colunas) else None
+        return section + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._fim
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fim:
+            return
+        registros, self._apos = self.db.consultar_pagina(
+            self.nome_tabela, self.tamanho_pagina, self._apos, self.chave, self.filtros
+        )
+        self._fim = self._apos is None
+        if not registros:
+            return
+
+        inicio = len(self._linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(registros) - 1)
+        self._linhas.extend(registros)
+        self.endInsertRows()
+
+    def recarregar(self, filtros=None):
+        """Descarta as páginas carregadas e volta ao início (ex.: após gravar ou trocar o filtro)."""
+        self.beginResetModel()
+        if filtros is not None:
+            self.filtros = filtros
+        self._linhas = []
+        self._apos = None
+        self._fim = False
+        self.endResetModel()
+
+
+# Modelo de tabela preenchido em blocos (ex.: pelos sinais de uma TarefaRelatorio)
+class ModeloLinhas(QAbstractTableModel):
+    """
+    Modelo para QTableView com linhas acrescentadas aos poucos.
+
+    Exemplo:
+        modelo = ModeloLinhas(RELATORIOS["ponto_mes"].colunas)
+        tarefa = iniciar_relatorio(db, "ponto_mes", "02/2025", "Nenhum selecionado",
+                                   ao_bloco=modelo.acrescentar)
+    """
+
+    def __init__(self, colunas, parent=None):
+        super().__init__(parent)
+        self._colunas = list(colunas)
+        self._linhas = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._colunas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        valor = self._linhas[index.row()][index.column()]
+        return "" if valor is None else str(valor)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._colunas[section] if section < len(self._colunas) else None
+        return section + 1
+
+    def acrescentar(self, bloco):
+        """Acrescenta um bloco de linhas no fim da tabela."""
+        if not bloco:
+            return
+        inicio = len(self._linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(bloco) - 1)
+        self._linhas.extend(bloco)
+        self.endInsertRows()
+
+    def limpar(self):
+        """Remove todas as linhas (ex.: antes de iniciar outro relatório)."""
+        self.beginResetModel()
+        self._linhas = []
+        self.endResetModel()
@@ -0,0 +1,105 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from banco.registro_log import obter_logger
+from banco.relatorios import RelatorioCancelado, executar_relatorio
+
+logger = obter_logger("consulta")
+
+
+class SinaisRelatorio(QObject):
+    """
+    Sinais de uma TarefaRelatorio. O objeto é criado na thread da interface, então os
+    slots conectados rodam nela (conexão enfileirada), não na thread do pool.
+    """
+    bloco = pyqtSignal(list)  # linhas de um bloco, na ordem do relatório
+    concluido = pyqtSignal(int)  # total de linhas
+    cancelado = pyqtSignal()
+    erro = pyqtSignal(str)
+
+
+# Relatório executado numa thread do QThreadPool, entregue em blocos por sinais
+class TarefaRelatorio(QRunnable):
+    """
+    Executa um relatório de banco.relatorios.RELATORIOS fora da thread da interface.
+
+    A thread do pool usa a sua própria conexão do PoolConexoes (fechada ao terminar) e
+    emite os blocos conforme chegam do SQLite, então a tabela começa a ser preenchida
+    antes de o relatório terminar. cancelar() interrompe a consulta em andamento.
+
+    Exemplo:
+        modelo = ModeloLinhas(RELATORIOS["ponto_mes"].colunas)
+        tarefa = iniciar_relatorio(db, "ponto_mes", "02/2025", "Nenhum selecionado",
+                                   ao_bloco=modelo.acrescentar)
+        botao_cancelar.clicked.connect(tarefa.cancelar)
+    """
+
+    def __init__(self, db, nome, *argumentos, tamanho_bloco=500, **opcoes):
+        """
+        Args:
+            db: Instância de BancoSQLite
+            nome: Nome do relatório em banco.relatorios.RELATORIOS
+            *argumentos, **opcoes: Argumentos do método do relatório
+            tamanho_bloco: Linhas por sinal bloco
+        """
+        super().__init__()
+        self.setAutoDelete(False)  # a janela guarda a tarefa para poder cancelar
+        self.db = db
+        self.nome = nome
+        self.argumentos = argumentos
+        self.opcoes = opcoes
+        self.tamanho_bloco = tamanho_bloco
+        self.sinais = SinaisRelatorio()
+        self._cancelamento = threading.Event()
+
+    def cancelar(self):
+        """Pede o cancelamento (pode ser chamado da thread da interface a qualquer momento)."""
+        self._cancelamento.set()
+
+    @property
+    def cancelada(self):
+        return self._cancelamento.is_set()
+
+    def run(self):
+        total = 0
+        try:
+            for bloco in executar_relatorio(self.db, self.nome, *self.argumentos, cancelamento=self._cancelamento,
+                                            tamanho_bloco=self.tamanho_bloco, **self.opcoes):
+                total += len(bloco)
+                self.sinais.bloco.emit(bloco)
+        except RelatorioCancelado:
+            logger.info("Relatório %s cancelado após %d linhas", self.nome, total)
+            self.sinais.cancelado.emit()
+            return
+        except Exception as e:
+            logger.error("Erro no relatório %s: %s", self.nome, e)
+            self.sinais.erro.emit(str(e))
+            return
+        finally:
+            self.db.pool.fechar_conexao_thread()
+        self.sinais.concluido.emit(total)
+
+
+def iniciar_relatorio(db, nome, *argumentos, ao_bloco=None, ao_concluir=None, ao_cancelar=None, ao_erro=None,
+                      pool=None, **opcoes):
+    """
+    Cria a TarefaRelatorio, conecta os sinais e a coloca no pool.
+
+    Args:
+        db: Instância de BancoSQLite
+        nome: Nome do relatório em banco.relatorios.RELATORIOS
+        *argumentos, **opcoes: Argumentos do método do relatório (e tamanho_bloco)
+        ao_bloco, ao_concluir, ao_cancelar, ao_erro: Slots dos sinais bloco, concluido, cancelado e erro
+        pool: QThreadPool usado (padrão: QThreadPool.globalInstance())
+
+    Returns:
+        TarefaRelatorio: A tarefa iniciada (guarde a referência para cancelar)
+    """
+    tarefa = TarefaRelatorio(db, nome, *argumentos, **opcoes)
+    for sinal, slot in ((tarefa.sinais.bloco, ao_bloco), (tarefa.sinais.concluido, ao_concluir),
+                        (tarefa.sinais.cancelado, ao_cancelar), (tarefa.sinais.erro, ao_erro)):
+        if slot is not None:
+            sinal.connect(slot)
+    (pool or QThreadPool.globalInstance()).start(tarefa)
+    return tarefa
@@ -1,63 +1,191 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from banco.bancoSQlite import BancoSQLite
-
+import os
+import sys
 from datetime import datetime
 
+# O leitor dos arquivos do relógio fica na camada de dados; os nomes continuam
+# disponíveis aqui (main.ler_registros) para quem já os importava deste módulo
+from banco.leitor_afd import RegistroPonto, iterar_registros, ler_registros  # noqa: F401
+
+
+def _abrir_banco(args, perfil):
+    """Banco único (--banco) ou, com --empresas, o banco da empresa --empresa naquela pasta."""
+    if args.empresas:
+        from banco.empresas import RoteadorEmpresas
+        return RoteadorEmpresas(args.empresas, perfil=perfil).banco(args.empresa)
+    from banco.bancoSQlite import BancoSQLite
+    return BancoSQLite(args.banco, perfil=perfil)
+
+
+def importar(argv=None):
+    """
+    Importa os arquivos do relógio de pastas/globs para o banco, lendo em paralelo.
+
+    Uso: python main.py importar <pasta|glob|arquivo>... --empresa N [--processos K]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py importar", description=importar.__doc__.strip().splitlines()[0])
+    parser.add_argument("origens", nargs="+", help="arquivos, pastas ou globs (ex.: 'fechamento/**/*.txt')")
+    parser.add_argument("--empresa", type=int, required=True, help="código da empresa dona das marcações")
+    parser.add_argument("--processos", type=int, default=None, help="processos de leitura (padrão: um por CPU)")
+    parser.add_argument("--padrao", default="*", help="padrão dos arquivos dentro das pastas (padrão: *)")
+    parser.add_argument("--encoding", default="ANSI", help="codificação dos arquivos (padrão: ANSI)")
+    parser.add_argument("--banco", default=None, help="arquivo do banco (padrão: banco/ponto_uniconte.db)")
+    parser.add_argument("--empresas", default=None, metavar="PASTA",
+                        help="grava no banco da empresa nesta pasta (ver 'main.py dividir') em vez de --banco")
+    args = parser.parse_args(argv)
+
+    def progresso(concluidos, total, caminho, situacao):
+        print(f"\r[{concluidos}/{total}] {situacao:<9} {os.path.basename(caminho)[-60:]:<60}", end="", flush=True)
 
-def _parse_line(line):
+    db = _abrir_banco(args, perfil="importacao")
     try:
-        """
-        Faz o parsing de uma linha de registro com o seguinte layout:
-          - posições 0 a 9: Identificador (registro)
-          - posições 10 a 33: Timestamp (24 caracteres)
-          - posições 34 a 44: Código (11 caracteres)
-          - posições 45 em diante: Valor (ex: '1AFA', 'A1F5', etc.)
-        Caso a linha não contenha todos os campos, os campos ausentes serão tratados como vazios.
-        """
-        registro = line[:10]
-        timestamp = line[10:34]
-
-        # Converter o timestamp para um objeto datetime
-        dt = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S%z")
-        # Formatar a data como dd/mm/aaaa
-        data_formatada = dt.strftime("%d/%m/%Y")
-        # Extrair a hora no formato HH:MM:SS
-        hora_formatada = dt.strftime("%H:%M:%S")
-
-        # Se a linha tiver pelo menos 45 caracteres, extrai o código; caso contrário, pega o que houver a partir do índice 34
-        codigo = line[34:45] if 45 <= len(line) < 90 else line[34:]
-        # Se a linha tiver mais de 45 caracteres, extrai o valor (removendo espaços extras)
-        valor = line[45:].strip() if len(line) > 45 else ""
-
-        return {
-            "registro": registro,
-            "timestamp": timestamp,
-            "data": data_formatada,
-            "hora": hora_formatada,
-            "codigo": codigo.strip(),
-            "valor": valor
-        }
-    except Exception as e:
+        resultado = db.importar_arquivos(args.origens, args.empresa, processos=args.processos, padrao=args.padrao,
+                                         encoding=args.encoding, progresso=progresso)
+    finally:
+        db.fechar_conexao()
+    print()
+    if resultado is None:
+        return 1
+
+    print(f"{resultado['arquivos']} arquivos: {resultado['importados']} importados, "
+          f"{resultado['repetidos']} já importados, {len(resultado['falhas'])} com falha")
+    print(f"{resultado['lidos']} linhas lidas, {resultado['inseridos']} marcações inseridas, "
+          f"{resultado['atualizados']} atualizadas, {resultado['erros']} linhas inválidas "
+          f"em {resultado['segundos']} s")
+    for falha in resultado["falhas"]:
+        print(f"  falha: {falha['caminho']}: {falha['erro']}")
+    return 1 if resultado["falhas"] else 0
+
+
+def acompanhar(argv=None):
+    """
+    Acompanha os arquivos do relógio e grava as marcações novas em segundos (Ctrl+C encerra).
+
+    Uso: python main.py acompanhar <arquivo|pasta|glob>... --empresa N [--intervalo S]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py acompanhar",
+                                     description=acompanhar.__doc__.strip().splitlines()[0])
+    parser.add_argument("origens", nargs="+", help="arquivos, pastas ou globs acompanhados")
+    parser.add_argument("--empresa", type=int, required=True, help="código da empresa dona das marcações")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="segundos entre verificações no polling")
+    parser.add_argument("--polling", action="store_true", help="não usa o inotify (ex.: pasta de rede)")
+    parser.add_argument("--padrao", default="*", help="padrão dos arquivos dentro das pastas (padrão: *)")
+    parser.add_argument("--encoding", default="ANSI", help="codificação dos arquivos (padrão: ANSI)")
+    parser.add_argument("--banco", default=None, help="arquivo do banco (padrão: banco/ponto_uniconte.db)")
+    parser.add_argument("--empresas", default=None, metavar="PASTA",
+                        help="grava no banco da empresa nesta pasta (ver 'main.py dividir') em vez de --banco")
+    args = parser.parse_args(argv)
+
+    def ao_gravar(caminho, resultado):
+        print(f"{datetime.now():%H:%M:%S} {os.path.basename(caminho)}: {resultado['lidos']} linhas, "
+              f"{resultado['inseridos']} marcações novas")
+
+    db = _abrir_banco(args, perfil="interativo")
+    try:
+        db.acompanhar_arquivos(args.origens, args.empresa, intervalo=args.intervalo, padrao=args.padrao,
+                               encoding=args.encoding, inotify=not args.polling, ao_gravar=ao_gravar)
+    finally:
+        db.fechar_conexao()
+    return 0
+
+
+def dividir(argv=None):
+    """
+    Separa o banco único em um banco por empresa (banco/empresas/empresa_0003.db, ...).
+
+    Uso: python main.py dividir [--banco ARQUIVO] [--destino PASTA] [--empresa N ...]
+    """
+    import argparse
+
+    from banco.empresas import dividir_banco
+
+    parser = argparse.ArgumentParser(prog="main.py dividir", description=dividir.__doc__.strip().splitlines()[0])
+    parser.add_argument("--banco", default=None, help="banco único de origem (padrão: banco/ponto_uniconte.db)")
+    parser.add_argument("--destino", default=None, help="pasta dos bancos por empresa (padrão: banco/empresas)")
+    parser.add_argument("--empresa", type=int, action="append", dest="empresas",
+                        help="separa só esta empresa (pode repetir; padrão: todas)")
+    args = parser.parse_args(argv)
+
+    origem = args.banco or os.path.join(os.path.dirname(os.path.abspath(__file__)), "banco", "ponto_uniconte.db")
+    try:
+        resumo = dividir_banco(origem, args.destino, args.empresas)
+    except FileExistsError as e:
         print(e)
+        return 1
+    for codigo, copiadas in resumo.items():
+        print(f"empresa {codigo}: {copiadas.get('ponto', 0)} marcações, "
+              f"{copiadas.get('ponto_dia', 0)} dias apurados, {copiadas.get('cadastro_funcionario', 0)} funcionários")
+    return 0
+
+
+def backup(argv=None):
+    """
+    Faz um snapshot do banco com o sistema aberto e, se pedido, verifica, compacta ou restaura.
+
+    Uso: python main.py backup [--banco ARQUIVO] [--pasta PASTA] [--manter N] [--verificar]
+                               [--compactar [--converter]] [--restaurar [SNAPSHOT]]
+    """
+    import argparse
 
+    from banco.bkp_banco import BackupBanco
 
-def ler_registros(arquivo):
+    parser = argparse.ArgumentParser(prog="main.py backup", description=backup.__doc__.strip().splitlines()[0])
+    parser.add_argument("--banco", default=None, help="arquivo do banco (padrão: banco/ponto_uniconte.db)")
+    parser.add_argument("--pasta", default=None, help="pasta dos snapshots (padrão: backups/ ao lado do banco)")
+    parser.add_argument("--manter", type=int, default=7, help="snapshots mantidos (padrão: 7)")
+    parser.add_argument("--forcar", action="store_true", help="copia mesmo sem alterações desde o último snapshot")
+    parser.add_argument("--verificar", action="store_true", help="restaura o snapshot num arquivo à parte e confere")
+    parser.add_argument("--compactar", action="store_true", help="libera as páginas livres e roda PRAGMA optimize")
+    parser.add_argument("--converter", action="store_true",
+                        help="com --compactar: converte o banco para auto_vacuum=INCREMENTAL (VACUUM completo)")
+    parser.add_argument("--restaurar", nargs="?", const="", default=None, metavar="SNAPSHOT",
+                        help="substitui o banco pelo snapshot (padrão: o mais recente) em vez de copiar")
+    args = parser.parse_args(argv)
+
+    from banco.bancoSQlite import BancoSQLite
+    db = BancoSQLite(args.banco)
+    servico = BackupBanco(db, args.pasta, manter=args.manter)
     try:
-        """
-                Abre o arquivo e lê todos os registros, aplicando a função de parsing para cada linha.
-                """
-        registros = []
-        with open(arquivo, encoding="ANSI") as f:
-            for linha in f:
-                linha = linha.rstrip("\n")
-                if linha.strip():  # ignora linhas vazias
-                    registros.append(_parse_line(linha))
-        return registros
-    except Exception as e:
+        if args.restaurar is not None:
+            entrada = servico.restaurar(args.restaurar or None)
+            print(f"banco restaurado de {entrada['arquivo']} ({entrada['criado_em']})")
+            return 0
+        entrada = servico.snapshot(forcar=args.forcar)
+        if entrada is None:
+            print("banco sem alterações desde o último snapshot")
+        else:
+            print(f"{entrada['arquivo']}: {entrada['bytes'] / 2 ** 20:.1f} MiB em {entrada['segundos']:.1f} s")
+        if args.verificar:
+            resultado = servico.verificar_restauracao()
+            print(f"verificação de {resultado['arquivo']}: {'ok' if resultado['ok'] else 'FALHOU'} "
+                  f"(restauração {resultado['segundos_restauracao']:.1f} s, "
+                  f"verificação {resultado['segundos_verificacao']:.1f} s)")
+            for erro in resultado["erros"]:
+                print(f"  {erro}")
+            if not resultado["ok"]:
+                return 1
+        if args.compactar:
+            resultado = servico.compactar(converter=args.converter)
+            print(f"compactação: {resultado['paginas_liberadas']} páginas liberadas, "
+                  f"{resultado['bytes_antes'] / 2 ** 20:.1f} -> {resultado['bytes_depois'] / 2 ** 20:.1f} MiB")
+    except FileNotFoundError as e:
         print(e)
+        return 1
+    finally:
+        db.fechar_conexao()
+    return 0
+
 
 def main():
+    comandos = {"importar": importar, "acompanhar": acompanhar, "dividir": dividir, "backup": backup}
+    if sys.argv[1:2] and sys.argv[1] in comandos:
+        sys.exit(comandos[sys.argv[1]](sys.argv[2:]))
+
     arquivo = r"C:\Users\eliba\Área de Trabalho\André_ponto\00004004330218916.txt"  # nome do arquivo com os registros
     registros = ler_registros(arquivo)
 